@@ -0,0 +1,13 @@
+"""
+CodeFileExecutorLib 基准套件
+
+在仓库根目录运行 python -m benchmarks（详见 __main__.py）；
+bench_*.py 为针对单项优化的独立脚本，也可直接运行
+"""
+import os
+import sys
+
+# 未安装时从源码目录导入
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,46 @@
+"""
+基准套件入口
+
+用法: python -m benchmarks [--quick] [--only parser,e2e] [--repeat N] [--output results.json]
+                          [--compare baseline.json] [--threshold 0.1]
+指定 --compare 时打印与基线的比值，存在超过阈值的变慢项时退出码为 1
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.harness import Recorder, compare, print_comparison
+from benchmarks.suite import GROUPS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="CodeFileExecutorLib 基准套件")
+    parser.add_argument("--quick", action="store_true", help="缩小各场景的任务数，用于快速检查")
+    parser.add_argument("--only", default="", help=f"只运行指定分组（逗号分隔）：{', '.join(GROUPS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="每项的计时次数，取最好成绩")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--compare", help="与之前输出的 JSON 结果比较")
+    parser.add_argument("--threshold", type=float, default=0.10, help="判定为变慢的比例阈值")
+    args = parser.parse_args(argv)
+
+    groups = [name for name in args.only.split(",") if name] or list(GROUPS)
+    unknown = [name for name in groups if name not in GROUPS]
+    if unknown:
+        parser.error(f"未知分组: {', '.join(unknown)}")
+
+    recorder = Recorder()
+    for name in groups:
+        GROUPS[name](recorder, args.quick, max(1, args.repeat))
+    if args.output:
+        recorder.write(args.output)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(recorder.to_dict(), json.load(f), args.threshold)
+        print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+执行器构造基准：测量 CodeFileExecutor() 的单次构造耗时，并检查构造过程是否触及文件系统
+
+用法: python benchmarks/bench_construct.py [次数]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import benchmarks  # noqa: E402,F401  把 src 加入 sys.path
+
+from codefileexecutorlib import CodeFileExecutor  # noqa: E402
+
+
+def measure(rounds: int, **kwargs) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        CodeFileExecutor(**kwargs)
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    work_dir = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        for label, kwargs in (("默认", {}), ("log_dir=None", {"log_dir": None})):
+            elapsed = measure(rounds, **kwargs)
+            print(f"{label:<14} {elapsed * 1e6:>8.2f}µs/次")
+        print(f"工作目录中的条目: {os.listdir(work_dir) or '无'}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
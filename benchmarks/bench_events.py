@@ -0,0 +1,46 @@
+"""
+流式事件开销基准：同一批次分别以 dict / typed 格式及不同输出级别执行，比较耗时与事件数量
+
+用法: python benchmarks/bench_events.py [任务数]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import benchmarks  # noqa: E402,F401  把 src 加入 sys.path
+
+from benchmarks.generators import build_content  # noqa: E402
+from codefileexecutorlib import CodeFileExecutor  # noqa: E402
+
+CONFIGS = (
+    ("dict/all", {"event_mode": "dict", "verbosity": "all"}),
+    ("typed/all", {"event_mode": "typed", "verbosity": "all"}),
+    ("typed/results", {"event_mode": "typed", "verbosity": "results"}),
+    ("typed/summary", {"event_mode": "typed", "verbosity": "summary"}),
+)
+
+
+def main():
+    tasks = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    content = build_content(tasks, code_lines=1, language="python", action="Update file")
+    root = tempfile.mkdtemp()
+    try:
+        # 先执行一次使目标全部存在且内容一致，之后各配置只比较事件的生成开销
+        for _ in CodeFileExecutor(log_dir=None, backup_enabled=False).codeFileExecutHelper(root, content):
+            pass
+        for label, options in CONFIGS:
+            executor = CodeFileExecutor(log_dir=None, backup_enabled=False, **options)
+            start = time.perf_counter()
+            events = sum(1 for _ in executor.codeFileExecutHelper(root, content))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<14} {elapsed * 1000:>9.1f}ms  事件 {events:>6}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+解析吞吐量基准：对数 MB 的合成指令文本测量 ContentParser 的 MB/s
+
+用法: python benchmarks/bench_parser.py [目标大小MB]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import benchmarks  # noqa: E402,F401  把 src 加入 sys.path
+
+from benchmarks.generators import build_sized_content  # noqa: E402
+from codefileexecutorlib.core.parser import ContentParser  # noqa: E402
+
+
+def measure(label: str, func, content: str, repeat: int = 3):
+    mb = len(content.encode("utf-8")) / (1024 * 1024)
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(content)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {mb:8.2f} MB  {best * 1000:9.1f} ms  {mb / best:9.1f} MB/s  ({len(result)} 项)")
+
+
+def main():
+    target_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 8
+    content = build_sized_content(int(target_mb * 1024 * 1024))
+    measure("split_content", ContentParser.split_content, content)
+    measure("parse_content (单遍)", ContentParser.parse_content, content)
+    measure("split + parse_task_block", lambda c: [ContentParser.parse_task_block(b)
+                                                   for b in ContentParser.split_content(c)], content)
+
+
+if __name__ == "__main__":
+    main()
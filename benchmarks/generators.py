@@ -0,0 +1,130 @@
+"""
+合成指令文本生成器：按任务数、代码大小、嵌套围栏、思索片段与每个任务的代码块数生成 files_content
+"""
+from typing import List
+
+# 各语言的代码行模板，包含 ------、泛型与括号，覆盖解析与校验的关键路径
+CODE_LINES = {
+    "csharp": [
+        "public async Task<IActionResult> Get(int id)",
+        "{",
+        "    var items = new List<string>();",
+        "    // ------ section ------",
+        "    return Ok(items);",
+        "}",
+    ],
+    "python": [
+        "def handler(request: dict) -> dict:",
+        "    items = [value for value in request.get('items', [])]",
+        "    # ------ section ------",
+        "    return {'count': len(items), 'items': items}",
+        "",
+    ],
+}
+EXTENSIONS = {"csharp": "cs", "python": "py"}
+
+
+def make_code(lines: int, language: str = "csharp") -> str:
+    """生成约 lines 行的代码"""
+    template = CODE_LINES[language]
+    repeat = max(1, -(-lines // len(template)))
+    return "\n".join((template * repeat)[:max(1, lines)])
+
+
+def _nested_document(code: str, language: str) -> str:
+    """Markdown 文档内嵌带语言标识的代码围栏"""
+    return f"# 说明\n\n示例代码：\n\n```{language}\n{code}\n```\n\n以上代码中的 ------ 不是任务分隔符。\n"
+
+
+def build_content(tasks: int, code_lines: int = 40, language: str = "csharp", nested_fences: bool = False,
+                  think: bool = False, blocks_per_task: int = 1, action: str = "Create file") -> str:
+    """
+    生成 files_content
+    Args:
+        tasks: 任务数
+        code_lines: 每个代码块的行数
+        language: 代码语言（csharp / python）
+        nested_fences: 代码块为内嵌代码围栏的 Markdown 文档
+        think: 开头附带含分隔符与围栏的 <think> 片段、结尾附带 [to be continued]
+        blocks_per_task: 每个任务的代码块数量（执行器使用最大的一个）
+        action: 操作类型
+    """
+    code = make_code(code_lines, language)
+    extension = "md" if nested_fences else EXTENSIONS[language]
+    body = _nested_document(code, language) if nested_fences else code
+    fence = "markdown" if nested_fences else language
+    blocks: List[str] = []
+    for idx in range(1, tasks + 1):
+        parts = [
+            f"Step [{idx}/{tasks}] - 生成文件 {idx}",
+            f"Action: {action}",
+            f"File Path: src/module{idx % 20}/file{idx}.{extension}",
+            "",
+        ]
+        for extra in range(blocks_per_task - 1):
+            parts.append(f"```{language}\n// 片段 {extra}\n```")
+        parts.append(f"```{fence}\n{body}\n```")
+        blocks.append("\n".join(parts))
+    content = "\n------\n\n".join(blocks)
+    if think:
+        content = (
+            "<think>\n先规划目录结构。\n------\n```python\nprint('draft')\n```\n</think>\n\n"
+            + content + "\n[to be continued]"
+        )
+    return content
+
+
+def build_sized_content(target_bytes: int, code_lines: int = 240, language: str = "csharp") -> str:
+    """生成约 target_bytes 大小的指令文本（用于吞吐量测量）"""
+    sample = build_content(1, code_lines, language)
+    tasks = max(1, target_bytes // (len(sample.encode("utf-8")) + 8))
+    return build_content(tasks, code_lines, language)
+
+
+# 基准套件使用的场景：名称 -> build_content 参数
+SCENARIOS = {
+    "small_tasks": {"tasks": 2000, "code_lines": 5},
+    "large_code": {"tasks": 50, "code_lines": 4000},
+    "nested_fences": {"tasks": 500, "code_lines": 40, "nested_fences": True},
+    "think_tags": {"tasks": 500, "code_lines": 40, "think": True},
+    "many_blocks": {"tasks": 300, "code_lines": 40, "blocks_per_task": 8},
+    "python": {"tasks": 500, "code_lines": 40, "language": "python"},
+}
+
+# --quick 时使用的缩小比例
+QUICK_FACTOR = 10
+
+
+def scenario_content(name: str, quick: bool = False) -> str:
+    params = dict(SCENARIOS[name])
+    if quick:
+        params["tasks"] = max(1, params["tasks"] // QUICK_FACTOR)
+    return build_content(**params)
+
+
+def _tail_task() -> str:
+    return build_content(1, 5)
+
+
+# 针对预处理器的对抗输入：名称 -> 生成约 size 字节文本的函数
+# 开头为大量可剥离的片段（逐段剥离时若每次复制剩余文本即为平方复杂度），或为无法闭合、需要扫描到末尾的结构
+ADVERSARIAL = {
+    # 大量 > 引用行
+    "quote_lines": lambda size: "> 引用\n" * (size // 9) + _tail_task(),
+    # 大量 Thinking... (Ns elapsed) 行，每行之间夹一行推理，使每行都是独立的一段
+    "thinking_elapsed": lambda size: "Thinking... (3s elapsed)\nReasoning: step\n" * (size // 40) + _tail_task(),
+    # 大量闭合的短 <think> 片段
+    "think_blocks": lambda size: "<think>x</think>\n" * (size // 17) + _tail_task(),
+    # 未闭合的 <think>：惰性匹配需要扫描到末尾
+    "unclosed_think": lambda size: "<think>\n" + "推理内容 " * (size // 13) + "\n" + _tail_task(),
+    # 开头大段空白后不是可剥离的片段：分支若以 \s* 开头会在空白上反复回溯
+    "leading_space": lambda size: " " * size + "x\n" + _tail_task(),
+    # 空白 + 列表符号 + 空白，且其后不是 Thinking: 等标签
+    "leading_space_bullet": lambda size: " " * (size // 2) + "-" + " " * (size // 2) + "x\n" + _tail_task(),
+    # 末尾大段空白且没有 [to be continued]
+    "trailing_space": lambda size: _tail_task() + " " * size + "x" + " " * size,
+}
+
+
+def adversarial_content(name: str, size: int) -> str:
+    return ADVERSARIAL[name](size)
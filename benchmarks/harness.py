@@ -0,0 +1,123 @@
+"""
+计时、结果记录与版本间比较
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+
+def measure(func: Callable[[], object], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """
+    多次调用 func 计时
+    Returns:
+        {"best_ms", "median_ms", "mean_ms", "repeat"}，以及 func 最后一次的返回值（"_result"）
+    """
+    result = None
+    for _ in range(warmup):
+        result = func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return {
+        "best_ms": round(min(samples) * 1000, 4),
+        "median_ms": round(statistics.median(samples) * 1000, 4),
+        "mean_ms": round(statistics.mean(samples) * 1000, 4),
+        "repeat": repeat,
+        "_result": result,
+    }
+
+
+def fast_tmpdir() -> Optional[str]:
+    """优先使用 tmpfs（/dev/shm），使端到端基准不受磁盘波动影响；不可用时返回 None（系统临时目录）"""
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
+
+def make_tmpdir() -> str:
+    return tempfile.mkdtemp(prefix="cfe-bench-", dir=fast_tmpdir())
+
+
+class Recorder:
+    """收集基准结果，打印表格并输出 JSON"""
+
+    def __init__(self):
+        self.results: List[dict] = []
+
+    def add(self, name: str, timing: Dict[str, float], size_bytes: int = 0, items: Optional[int] = None,
+            **params) -> dict:
+        entry = {"name": name, **{k: v for k, v in timing.items() if not k.startswith("_")}}
+        if size_bytes:
+            entry["bytes"] = size_bytes
+            entry["mb_per_s"] = round(size_bytes / (1024 * 1024) / (timing["best_ms"] / 1000), 2) \
+                if timing["best_ms"] else None
+        if items is not None:
+            entry["items"] = items
+        if params:
+            entry["params"] = params
+        self.results.append(entry)
+        throughput = f"{entry['mb_per_s']:>9.1f} MB/s" if entry.get("mb_per_s") else " " * 14
+        print(f"{name:<44} {timing['best_ms']:>10.2f} ms  {throughput}", flush=True)
+        return entry
+
+    def to_dict(self) -> dict:
+        return {"meta": metadata(), "results": self.results}
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+def metadata() -> dict:
+    try:
+        from importlib.metadata import version
+        package_version = version("codefileexecutorlib")
+    except Exception:
+        package_version = None
+    return {
+        "package_version": package_version,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "tmpdir": fast_tmpdir() or tempfile.gettempdir(),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.10) -> List[dict]:
+    """
+    按名称比较两份结果的 best_ms
+    Returns:
+        [{"name", "baseline_ms", "current_ms", "ratio", "regression"}]，ratio > 1 表示变慢
+    """
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    rows = []
+    for entry in current.get("results", []):
+        old = previous.get(entry["name"])
+        if not old or not old.get("best_ms"):
+            continue
+        ratio = entry["best_ms"] / old["best_ms"]
+        rows.append({
+            "name": entry["name"],
+            "baseline_ms": old["best_ms"],
+            "current_ms": entry["best_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: List[dict]):
+    print(f"\n{'名称':<44} {'基线':>10} {'当前':>10} {'比值':>7}")
+    for row in rows:
+        flag = "  变慢" if row["regression"] else ""
+        print(f"{row['name']:<44} {row['baseline_ms']:>8.2f}ms {row['current_ms']:>8.2f}ms "
+              f"{row['ratio']:>7.3f}{flag}")
@@ -0,0 +1,147 @@
+"""
+基准定义：预处理、拆分/解析、内容校验、路径解析与端到端执行
+"""
+import shutil
+from typing import Callable, Dict, List
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.parser import ContentParser
+from codefileexecutorlib.core.path_handler import PathHandler
+from codefileexecutorlib.utils.content_validator import ContentValidator
+from codefileexecutorlib.utils.preprocessor import Preprocessor
+from codefileexecutorlib.utils.syntax_checker import SyntaxChecker
+from codefileexecutorlib.utils.validator_engine import ValidatorEngine
+
+from benchmarks.generators import ADVERSARIAL, SCENARIOS, adversarial_content, scenario_content
+from benchmarks.harness import Recorder, make_tmpdir, measure
+
+
+def _size(content: str) -> int:
+    return len(content.encode("utf-8"))
+
+
+def bench_preprocess(recorder: Recorder, quick: bool, repeat: int):
+    for name in SCENARIOS:
+        content = scenario_content(name, quick)
+        timing = measure(lambda: Preprocessor.trim_assistant_reply(content), repeat)
+        recorder.add(f"preprocess/{name}", timing, _size(content))
+    # 对抗输入按两种规模各测一次：线性复杂度下两者的 MB/s 应大致相同
+    sizes = (64 * 1024, 256 * 1024) if quick else (256 * 1024, 1024 * 1024)
+    for name in ADVERSARIAL:
+        for size in sizes:
+            content = adversarial_content(name, size)
+            timing = measure(lambda: Preprocessor.trim_assistant_reply(content), repeat)
+            recorder.add(f"preprocess_adversarial/{name}/{size // 1024}k", timing, _size(content))
+
+
+def bench_parser(recorder: Recorder, quick: bool, repeat: int):
+    for name in SCENARIOS:
+        content = Preprocessor.trim_assistant_reply(scenario_content(name, quick))
+        size = _size(content)
+        timing = measure(lambda: ContentParser.split_content(content), repeat)
+        recorder.add(f"split_content/{name}", timing, size, len(timing["_result"]))
+        blocks = timing["_result"]
+        timing = measure(lambda: [ContentParser.parse_task_block(block) for block in blocks], repeat)
+        recorder.add(f"parse_task_block/{name}", timing, size, len(blocks))
+        timing = measure(lambda: ContentParser.parse_content(content), repeat)
+        recorder.add(f"parse_content/{name}", timing, size, len(timing["_result"]))
+
+
+def bench_validator(recorder: Recorder, quick: bool, repeat: int):
+    for name in ("small_tasks", "large_code", "python"):
+        tasks = ContentParser.parse_content(scenario_content(name, quick))
+        pairs = [(task.content, task.file_path.rsplit(".", 1)[-1]) for task in tasks]
+        size = sum(_size(code) for code, _ in pairs)
+
+        def integrity():
+            return [ContentValidator.validate_content_integrity(code, code) for code, _ in pairs]
+
+        def syntax():
+            return [ContentValidator.check_code_syntax_integrity(code, code, ext) for code, ext in pairs]
+
+        recorder.add(f"validate_content_integrity/{name}", measure(integrity, repeat), size, len(pairs))
+        recorder.add(f"check_code_syntax_integrity/{name}", measure(syntax, repeat), size, len(pairs))
+
+        # 提取结果缺少末行时需比较签名：冷缓存为每次新建引擎，热缓存为重复校验同一批内容
+        truncated = [(code, code.rsplit("\n", 1)[0], ext) for code, ext in pairs]
+        engine = ValidatorEngine(cache_size=len(pairs) * 8)
+
+        def engine_checks(target: ValidatorEngine):
+            return [(target.validate_content_integrity(code, cut), target.check_code_syntax_integrity(code, cut, ext))
+                    for code, cut, ext in truncated]
+
+        recorder.add(f"validator_engine_cold/{name}", measure(lambda: engine_checks(ValidatorEngine()), repeat),
+                     size, len(pairs))
+        recorder.add(f"validator_engine_warm/{name}", measure(lambda: engine_checks(engine), repeat), size, len(pairs))
+
+        # 语法检查：当前进程逐个检查 vs 整批提交进程池（进程池已预热）
+        items = [(task.file_path, task.content) for task in tasks]
+        checker = SyntaxChecker(min_pool_bytes=0)
+        try:
+            recorder.add(f"syntax_check_inline/{name}",
+                         measure(lambda: [checker.check(path, code) for path, code in items], repeat), size, len(items))
+            checker.submit(items)
+            pooled = measure(lambda: [handle.result() for handle in checker.submit(items) if handle], repeat)
+            recorder.add(f"syntax_check_pool/{name}", pooled, size, len(items))
+        finally:
+            checker.close()
+
+
+def bench_paths(recorder: Recorder, quick: bool, repeat: int):
+    count = 2000 if quick else 10000
+    paths = [f"src/module{i % 100}/sub{i % 7}/file{i}.cs" for i in range(count)]
+    root = make_tmpdir()
+    size = sum(len(path) for path in paths)
+    try:
+        def unmemoized():
+            handler = PathHandler(root)
+            return [handler.validate_path_security(handler._full_path(path)) for path in paths]
+
+        recorder.add("paths/unmemoized", measure(unmemoized, repeat), size, count)
+        recorder.add("paths/resolve_many", measure(lambda: PathHandler(root).resolve_many(paths), repeat), size, count)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+# 端到端配置：名称 -> CodeFileExecutor 参数
+E2E_CONFIGS = {
+    "default": {},
+    "parallel4": {"max_workers": 4},
+    "atomic": {"atomic_write": True},
+    "verify_size": {"verify_mode": "size"},
+    "syntax_check": {"syntax_check": True},
+}
+
+
+def bench_e2e(recorder: Recorder, quick: bool, repeat: int):
+    for scenario in ("small_tasks", "large_code"):
+        content = scenario_content(scenario, quick)
+        size = _size(content)
+        for label, options in E2E_CONFIGS.items():
+            executor = CodeFileExecutor(log_dir=None, **options)
+            dirs: List[str] = []
+
+            def fresh():
+                root = make_tmpdir()
+                dirs.append(root)
+                return sum(1 for _ in executor.codeFileExecutHelper(root, content))
+
+            try:
+                recorder.add(f"e2e_create/{scenario}/{label}", measure(fresh, repeat), size, **options)
+                # 目标已存在且内容一致：衡量比较与跳过写入的开销
+                rerun_root = dirs[-1]
+                rerun = measure(lambda: sum(1 for _ in executor.codeFileExecutHelper(rerun_root, content)), repeat)
+                recorder.add(f"e2e_unchanged/{scenario}/{label}", rerun, size, **options)
+            finally:
+                executor.close()
+                for root in dirs:
+                    shutil.rmtree(root, ignore_errors=True)
+
+
+GROUPS: Dict[str, Callable[[Recorder, bool, int], None]] = {
+    "preprocess": bench_preprocess,
+    "parser": bench_parser,
+    "validator": bench_validator,
+    "paths": bench_paths,
+    "e2e": bench_e2e,
+}
@@ -1,2 +1,5 @@
 from .core.executor import CodeFileExecutor
-__all__ = ["CodeFileExecutor"]
\ No newline at end of file
+from .core.async_executor import AsyncCodeFileExecutor
+from .core.executor_pool import ExecutorPool, BatchHandle
+from .core.backup_store import BackupStore
+__all__ = ["CodeFileExecutor", "AsyncCodeFileExecutor", "ExecutorPool", "BatchHandle", "BackupStore"]
\ No newline at end of file
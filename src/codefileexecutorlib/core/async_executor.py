@@ -0,0 +1,108 @@
+"""
+asyncio 原生的执行器接口：文件操作在有界线程池中进行，不阻塞事件循环
+"""
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Generator, Optional
+
+from codefileexecutorlib.core.executor import CodeFileExecutor, _StreamingSession
+
+_DONE = object()
+
+
+def _step(gen: Generator):
+    """在工作线程中推进生成器一步；生成器结束时返回 _DONE"""
+    try:
+        return next(gen)
+    except StopIteration:
+        return _DONE
+
+
+async def _iterate_in_pool(gen: Generator, pool: Executor) -> AsyncIterator[dict]:
+    """逐个事件在线程池中推进生成器，两次推进之间把控制权交还事件循环"""
+    pending: Optional[Future] = None
+    try:
+        while True:
+            pending = pool.submit(_step, gen)
+            event = await asyncio.wrap_future(pending)
+            pending = None
+            if event is _DONE:
+                return
+            yield event
+    finally:
+        # 被取消时工作线程可能仍在推进生成器，需等这一步结束后才能关闭
+        if pending is not None and not pending.done():
+            await asyncio.shield(asyncio.wrap_future(pending))
+        if gen.gi_frame is not None:
+            await asyncio.wrap_future(pool.submit(gen.close))
+
+
+class AsyncCodeFileExecutor:
+    """
+    CodeFileExecutor 的异步包装
+    1. 同步执行流程按事件逐步在线程池中推进，两次推进之间把控制权交还事件循环
+    2. 线程池大小有上限，多个批次并发时共享同一个池；每个批次使用独立的文件操作处理器，
+       系统调用计数与目录缓存互不干扰
+    3. 消费方取消任务或提前停止迭代时，当前这一步执行完毕后即关闭生成器，
+       其后的任务不再执行（协作式取消，不会中断正在写入的文件）
+    """
+
+    def __init__(self, max_threads: int = 4, **executor_options):
+        """
+        Args:
+            max_threads: 线程池最大线程数
+            executor_options: 传给 CodeFileExecutor 的构造参数
+        """
+        self.max_threads = max(1, max_threads)
+        self.executor = CodeFileExecutor(**executor_options)
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    async def codeFileExecutHelper(self, root_dir: str, files_content: str) -> AsyncIterator[dict]:
+        """
+        codeFileExecutHelper 的异步版本
+        Yields:
+            dict: 与 CodeFileExecutor.codeFileExecutHelper 相同格式的流式执行结果
+        """
+        executor = self.executor._for_batch()
+        async for event in self._iterate(executor.codeFileExecutHelper(root_dir, files_content)):
+            yield event
+
+    async def codeFileExecutStreamHelper(self, root_dir: str, content_chunks: AsyncIterable[str]) -> AsyncIterator[dict]:
+        """
+        边接收异步文本流边执行已闭合的任务块，解析与文件操作均在线程池中进行
+        Yields:
+            dict: 与 CodeFileExecutor.codeFileExecutHelper 相同格式的流式执行结果
+        """
+        session = _StreamingSession(self.executor._for_batch(), root_dir)
+        try:
+            async for chunk in content_chunks:
+                async for event in self._iterate(session.feed(chunk)):
+                    yield event
+            async for event in self._iterate(session.finish()):
+                yield event
+        finally:
+            await self._run(self.executor.logger.flush)
+
+    async def close(self):
+        """关闭线程池并写出剩余日志"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+        self.executor.close()
+
+    async def __aenter__(self) -> "AsyncCodeFileExecutor":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix="codefile-async")
+        return self._pool
+
+    async def _run(self, func, *args):
+        return await asyncio.wrap_future(self._get_pool().submit(func, *args))
+
+    def _iterate(self, gen: Generator) -> AsyncIterator[dict]:
+        return _iterate_in_pool(gen, self._get_pool())
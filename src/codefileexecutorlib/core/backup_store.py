@@ -0,0 +1,235 @@
+"""
+集中式备份仓库：按内容寻址存储备份，相同内容只保存一份，并按数量/时间/总大小清理
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+from codefileexecutorlib.models.backup_model import BackupEntry
+
+
+class BackupStore:
+    """
+    备份仓库目录结构：
+        objects/<摘要前两位>/<SHA-256 摘要>   备份内容（只读，多个备份可共享）
+        index.jsonl                          每行一条备份记录：路径、时间、摘要、大小
+    1. 备份记录按追加方式写入索引，同一文件在同一秒内多次备份也不会互相覆盖
+    2. 清理时按保留策略删除记录并改写索引，随后删除不再被引用的内容
+    3. 同一进程内可被多个线程共享；不支持多个进程同时写入同一仓库
+    """
+
+    INDEX = "index.jsonl"
+    OBJECTS = "objects"
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, store_dir: str, keep: Optional[int] = None, max_age: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Args:
+            store_dir: 仓库目录，首次备份时才创建
+            keep: 每个文件保留的最新备份数量；None 表示不限
+            max_age: 备份的最长保留时间（秒）；None 表示不限
+            max_bytes: 仓库内容总字节数上限，超出时从最早的备份开始删除；None 表示不限
+        """
+        if keep is not None and keep < 1:
+            raise ValueError(f"keep 必须大于 0: {keep}")
+        self.store_dir = os.path.abspath(store_dir)
+        self.keep = keep
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._entries: Optional[List[BackupEntry]] = None
+        self._dirty = False
+        self._lock = threading.RLock()
+
+    @property
+    def has_retention(self) -> bool:
+        return self.keep is not None or self.max_age is not None or self.max_bytes is not None
+
+    def blob_path(self, blob: str) -> str:
+        return os.path.join(self.store_dir, self.OBJECTS, blob[:2], blob)
+
+    def save(self, path: str, source: Optional[str] = None,
+             clone: Optional[Callable[[str, str], object]] = None) -> str:
+        """
+        备份一个文件
+        Args:
+            path: 被备份文件的路径（记录在索引中）
+            source: 实际读取的文件，默认即 path
+            clone: 把 source 复制到仓库临时文件的函数 (src, dst)；默认边复制边计算摘要，只读一遍
+        Returns:
+            备份内容在仓库中的路径
+        """
+        source = source or path
+        tmp_dir = os.path.join(self.store_dir, self.OBJECTS)
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, f".tmp-{uuid.uuid4().hex}")
+        try:
+            if clone is None:
+                blob, size = self._copy_hashed(source, tmp_path)
+            else:
+                clone(source, tmp_path)
+                blob, size = self._hash_file(tmp_path)
+            blob_path = self.blob_path(blob)
+            # 与 prune 互斥，避免刚确认存在的内容被当作无引用删除
+            with self._lock:
+                if os.path.exists(blob_path):
+                    os.remove(tmp_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(tmp_path, blob_path)
+                self._append(BackupEntry(os.path.abspath(path), time.time(), blob, size))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return blob_path
+
+    def entries(self, path: Optional[str] = None) -> List[BackupEntry]:
+        """按时间顺序返回备份记录；指定 path 时只返回该文件的记录"""
+        with self._lock:
+            entries = list(self._load())
+        if path is None:
+            return entries
+        path = os.path.abspath(path)
+        return [entry for entry in entries if entry.path == path]
+
+    def restore(self, path: str, entry: Optional[BackupEntry] = None, dest: Optional[str] = None) -> str:
+        """
+        恢复备份
+        Args:
+            path: 被备份文件的路径
+            entry: 要恢复的备份记录，默认为该文件最新的备份
+            dest: 恢复到的路径，默认为原路径
+        Returns:
+            恢复后的文件路径
+        """
+        if entry is None:
+            history = self.entries(path)
+            if not history:
+                raise FileNotFoundError(f"没有找到备份: {path}")
+            entry = history[-1]
+        dest = dest or entry.path
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        shutil.copyfile(self.blob_path(entry.blob), dest)
+        return dest
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """
+        按保留策略删除备份记录，并删除不再被引用的内容
+        Returns:
+            删除的备份记录数量
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            entries = self._load()
+            kept = entries
+            if self.max_age is not None:
+                kept = [entry for entry in kept if now - entry.timestamp <= self.max_age]
+            if self.keep is not None:
+                counts: Dict[str, int] = {}
+                newest_first = []
+                for entry in reversed(kept):
+                    counts[entry.path] = counts.get(entry.path, 0) + 1
+                    if counts[entry.path] <= self.keep:
+                        newest_first.append(entry)
+                kept = newest_first[::-1]
+            if self.max_bytes is not None:
+                kept = self._limit_bytes(kept)
+            removed = len(entries) - len(kept)
+            if removed:
+                self._rewrite(kept)
+                self._collect_garbage({entry.blob for entry in kept}, {entry.blob for entry in entries})
+            self._dirty = False
+            return removed
+
+    def prune_if_needed(self) -> int:
+        """本次调用以来有新备份且配置了保留策略时执行清理"""
+        if not self._dirty or not self.has_retention:
+            return 0
+        return self.prune()
+
+    def _limit_bytes(self, entries: List[BackupEntry]) -> List[BackupEntry]:
+        """从最早的记录开始删除，直到仍被引用的内容总大小不超过上限"""
+        refs: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for entry in entries:
+            refs[entry.blob] = refs.get(entry.blob, 0) + 1
+            sizes[entry.blob] = entry.size
+        total = sum(sizes.values())
+        start = 0
+        while total > self.max_bytes and start < len(entries):
+            blob = entries[start].blob
+            refs[blob] -= 1
+            if refs[blob] == 0:
+                total -= sizes[blob]
+            start += 1
+        return entries[start:]
+
+    def _load(self) -> List[BackupEntry]:
+        """首次访问时读取索引（需持有 _lock）"""
+        if self._entries is None:
+            entries = []
+            try:
+                with open(os.path.join(self.store_dir, self.INDEX), encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entries.append(BackupEntry(**json.loads(line)))
+                        except (ValueError, TypeError):
+                            continue   # 写了一半的行
+            except OSError:
+                pass
+            self._entries = entries
+        return self._entries
+
+    def _append(self, entry: BackupEntry):
+        line = json.dumps(entry.to_dict(), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._load().append(entry)
+            with open(os.path.join(self.store_dir, self.INDEX), "a", encoding="utf-8") as f:
+                f.write(line)
+            self._dirty = True
+
+    def _rewrite(self, entries: List[BackupEntry]):
+        index_path = os.path.join(self.store_dir, self.INDEX)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry.to_dict(), ensure_ascii=False) + "\n")
+        os.replace(tmp_path, index_path)
+        self._entries = list(entries)
+
+    def _collect_garbage(self, live: set, candidates: set):
+        for blob in candidates - live:
+            blob_path = self.blob_path(blob)
+            try:
+                os.remove(blob_path)
+                os.rmdir(os.path.dirname(blob_path))
+            except OSError:
+                pass
+
+    def _copy_hashed(self, src: str, dst: str):
+        hasher = hashlib.sha256()
+        size = 0
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            for chunk in iter(lambda: fsrc.read(self.CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                fdst.write(chunk)
+                size += len(chunk)
+        shutil.copystat(src, dst)
+        return hasher.hexdigest(), size
+
+    def _hash_file(self, path: str):
+        hasher = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.CHUNK_SIZE), b""):
+                hasher.update(chunk)
+                size += len(chunk)
+        return hasher.hexdigest(), size
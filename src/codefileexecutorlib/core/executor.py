@@ -1,40 +1,151 @@
-from typing import Generator
+import asyncio
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Generator, Iterable, Optional, Union
 from codefileexecutorlib.utils.logger import Logger
 from codefileexecutorlib.core.file_operations import FileOperationHandler
 from codefileexecutorlib.core.parser import ContentParser
+from codefileexecutorlib.core.incremental_parser import IncrementalContentParser
+from codefileexecutorlib.core.scheduler import TaskScheduler
+from codefileexecutorlib.core.optimizer import TaskCoalescer, SUPERSEDED, DELETED
+from codefileexecutorlib.core.transaction import Transaction
+from codefileexecutorlib.core.patcher import Patcher
+from codefileexecutorlib.core.backup_store import BackupStore
+from codefileexecutorlib.core.profiler import NULL_SCOPE, PhaseHooks, PhaseTimer, TaskScope
 from codefileexecutorlib.core.path_handler import PathHandler
 from codefileexecutorlib.utils.validators import (
-    is_safe_filename, is_safe_path, is_content_length_valid
+    is_safe_filename, is_safe_path, is_content_size_valid
 )
 from codefileexecutorlib.utils.stream_handler import StreamHandler
+from codefileexecutorlib.utils.validator_engine import ValidatorEngine
+from codefileexecutorlib.utils.syntax_checker import SyntaxChecker
+from codefileexecutorlib.exceptions.custom_exceptions import InvalidTaskFormatException
 from codefileexecutorlib.models.task_model import TaskModel
 from codefileexecutorlib.models.result_model import OperationResult
+from codefileexecutorlib.models.plan_model import ExecutionPlan, PlannedTask
 from codefileexecutorlib.models.stream_data import StreamData
-from codefileexecutorlib.models import StreamType
+from codefileexecutorlib.models import StreamType, EventCode
 from codefileexecutorlib.utils.preprocessor import Preprocessor
 import time
+import stat
 import os
 
 
+SUPPORTED_ACTIONS = ("create folder", "delete folder", "create file", "update file", "patch file", "delete file")
+# 语法检查的对象：内容即完整文件的操作（补丁内容是 diff，不检查）
+_SYNTAX_ACTIONS = ("create file", "update file")
+
+
 def is_path_length_valid(path: str, max_chars: int = 260) -> bool:
     """验证路径长度是否有效"""
     return len(path) <= max_chars
 
 
+@dataclass
+class _PreparedTask:
+    """通过解析与校验、等待执行的任务"""
+    step_num: int
+    task: TaskModel
+    full_path: str
+    action: str
+    elision: Optional[tuple] = None   # 被合并时为 (原因, 使其失效的任务 step_num, 需确保存在的目录)
+    syntax: Optional[object] = None   # 已提交的语法检查结果句柄，见 SyntaxChecker.submit
+    syntax_warning: Optional[str] = None   # 括号平衡等启发式检查未通过的说明，执行结果之前作为警告输出
+
+
 class CodeFileExecutor:
     """主执行器类，负责批量文件操作的执行"""
 
-    def __init__(self, log_level: str = 'INFO', backup_enabled: bool = True):
+    def __init__(self, log_level: str = 'INFO', backup_enabled: bool = True, max_workers: int = 1,
+                 zero_copy: bool = False, verify_mode: str = "full", atomic_write: bool = False,
+                 fsync_mode: str = "none", backup_strategy: str = "copy", skip_unchanged: bool = True,
+                 log_flush_interval: Optional[float] = None, log_dir: Optional[str] = 'log',
+                 coalesce: bool = False, transactional: bool = False, backup_dir: Optional[str] = None,
+                 backup_keep: Optional[int] = None, backup_max_age: Optional[float] = None,
+                 backup_max_bytes: Optional[int] = None, event_mode: str = "dict", verbosity: str = "all",
+                 profile: bool = False, profile_tasks: bool = False,
+                 phase_hooks: Optional[Iterable[PhaseHooks]] = None, validate_content: bool = False,
+                 validator_cache_size: int = ValidatorEngine.DEFAULT_CACHE_SIZE, syntax_check: bool = False,
+                 syntax_workers: Optional[int] = None, verify_digest: bool = False):
         """
         初始化执行器
         Args:
             log_level: 日志级别 ('DEBUG', 'INFO', 'WARNING', 'ERROR')
             backup_enabled: 是否启用文件备份
+            max_workers: 并行执行文件操作的线程数，1 表示串行执行
+            zero_copy: 是否启用零拷贝模式：输入只编码一次为 UTF-8 缓冲区，
+                任务内容以偏移量携带并直接从缓冲区写入文件
+            verify_mode: 写入验证策略 ('none', 'size', 'hash', 'full')，详见 FileOperationHandler
+            atomic_write: 是否先写临时文件再 os.replace 到目标路径，避免崩溃时留下截断的文件
+            fsync_mode: 持久化策略 ('none', 'file', 'batch')；file 每个文件写入后立即 fsync（原子模式下再 fsync 父目录）；
+                batch 把文件与父目录的 fsync 推迟到批次结束，每个文件、每个目录各一次（原子模式下临时文件仍在替换前
+                fsync，只推迟父目录），只保证批次结束后本批次写入的内容已落盘，批次进行中崩溃可能丢失已写入的内容
+            backup_strategy: 备份策略 ('copy', 'hardlink', 'reflink', 'auto')，详见 FileOperationHandler
+            skip_unchanged: 创建/更新文件时若磁盘内容与新内容一致，则跳过备份与写入
+            log_flush_interval: 日志后台写出间隔（秒）；None 表示在缓冲区写满及每个批次结束时写出
+            log_dir: 日志目录（相对于当前工作目录），首次写日志时才创建；None 表示不记录日志文件
+            coalesce: 是否在执行前合并冗余操作（同一文件的多次写入、其后被删除目录中的操作、重复的目录创建），
+                详见 TaskCoalescer；启用后先解析校验全部任务再执行
+            transactional: 是否以事务方式执行：写入先暂存到根目录下的 .txn，全部任务成功后才一次性提交，
+                否则不修改任何文件；批次开始时自动恢复崩溃遗留的事务，详见 Transaction
+            backup_dir: 集中式备份仓库目录（相对于当前工作目录）；None 表示备份到各文件同目录的 .backup，
+                详见 BackupStore
+            backup_keep: 备份仓库中每个文件保留的最新备份数量
+            backup_max_age: 备份仓库中备份的最长保留时间（秒）
+            backup_max_bytes: 备份仓库内容总字节数上限；以上三项在每个批次结束时检查
+            event_mode: 流式结果格式 ('dict', 'typed')；typed 输出 StreamEvent 对象，详见 StreamHandler
+            verbosity: 输出级别 ('all', 'results', 'errors', 'summary')，被过滤的事件不会生成
+            profile: 是否分阶段计时，汇总中增加 phase_timings（各阶段次数、总耗时与 p50/p95/max），详见 PhaseTimer
+            profile_tasks: 是否在每个任务的 success 消息 data 中附带该任务各阶段的耗时（隐含 profile）
+            phase_hooks: 阶段钩子（PhaseHooks 实例），在每个阶段开始与结束时调用（隐含 profile）
+            validate_content: 是否在校验阶段对写入内容做结构检查（泛型、括号平衡、语言关键字），
+                不通过时输出警告；结果按内容摘要缓存，详见 ValidatorEngine
+            validator_cache_size: 结构检查缓存的条目上限
+            syntax_check: 是否在写入前按扩展名做语法检查（Python/JSON/TOML/XML 真实解析，C 系语言括号平衡），
+                不通过的任务判为失败且不写入；启用后先解析校验全部任务，整批内容提交到进程池检查，详见 SyntaxChecker
+            syntax_workers: 语法检查进程池的进程数，None 表示 CPU 核数
+            verify_digest: 是否在批次结束时重新读取本批次写入的文件，与写入时记录的 SHA-256 摘要比对
+                （需要 verify_mode='hash'），不一致的任务改判为失败
         """
-        self.logger = Logger()
-        self.op_handler = FileOperationHandler(backup_enabled=backup_enabled)
+        if verify_digest and verify_mode != "hash":
+            raise ValueError("verify_digest 需要 verify_mode='hash'")
+        self.logger = Logger(log_dir, level=log_level, flush_interval=log_flush_interval)
+        self.backup_store = None
+        if backup_dir is not None:
+            self.backup_store = BackupStore(backup_dir, keep=backup_keep, max_age=backup_max_age,
+                                            max_bytes=backup_max_bytes)
+        self.op_handler = FileOperationHandler(
+            backup_enabled=backup_enabled,
+            verify_mode=verify_mode,
+            atomic_write=atomic_write,
+            fsync_mode=fsync_mode,
+            backup_strategy=backup_strategy,
+            skip_unchanged=skip_unchanged,
+            backup_store=self.backup_store,
+        )
         self.log_level = log_level
         self.backup_enabled = backup_enabled
+        self.max_workers = max(1, max_workers)
+        self.zero_copy = zero_copy
+        self.verify_mode = verify_mode
+        self.verify_digest = verify_digest
+        self.atomic_write = atomic_write
+        self.fsync_mode = fsync_mode
+        self.backup_strategy = backup_strategy
+        self.skip_unchanged = skip_unchanged
+        self.coalesce = coalesce
+        self.transactional = transactional
+        # 提前校验参数，每个批次再创建各自的 StreamHandler
+        StreamHandler(event_mode, verbosity)
+        self.event_mode = event_mode
+        self.verbosity = verbosity
+        self.phase_hooks = list(phase_hooks or ())
+        self.profile_tasks = profile_tasks
+        self.profile = profile or profile_tasks or bool(self.phase_hooks)
+        # 跨批次共用，同一内容重复校验时直接命中缓存
+        self.validator = ValidatorEngine(validator_cache_size) if validate_content else None
+        self.syntax_checker = SyntaxChecker(syntax_workers) if syntax_check else None
 
     def codeFileExecutHelper(self, root_dir: str, files_content: str) -> Generator[dict, None, dict]:
         """
@@ -45,193 +156,968 @@ class CodeFileExecutor:
         Yields:
             dict: 流式执行结果，包含消息、类型、时间戳等信息
         """
+        try:
+            summary_data = yield from self._execute_content(root_dir, files_content)
+            return summary_data
+        finally:
+            self.logger.flush()
+
+    def close(self):
+        """写出剩余日志并关闭日志文件（启用 log_flush_interval 时同时停止后台线程），关闭语法检查进程池"""
+        self.logger.close()
+        if self.syntax_checker is not None:
+            self.syntax_checker.close()
+
+    def plan(self, root_dir: str, files_content: str) -> ExecutionPlan:
+        """
+        试运行：完成预处理、解析与路径校验，并对每个目标执行一次 stat，不修改任何文件
+        Args:
+            root_dir: 根目录路径
+            files_content: 包含操作指令的内容
+        Returns:
+            ExecutionPlan，可交给 execute 执行而无需再次解析与校验
+        """
+        try:
+            return self._build_plan(root_dir, files_content)
+        finally:
+            self.logger.flush()
+
+    def execute(self, plan: ExecutionPlan) -> Generator[dict, None, dict]:
+        """
+        执行 plan 生成的计划，输出与 codeFileExecutHelper 相同格式的流式结果
+        计划中记录的校验消息按原顺序重新输出，目标状态以执行时的磁盘为准
+        """
+        try:
+            summary_data = yield from self._execute_plan(plan)
+            return summary_data
+        finally:
+            self.logger.flush()
+
+    def _build_plan(self, root_dir: str, files_content: str) -> ExecutionPlan:
+        plan = ExecutionPlan(root_dir=root_dir)
+        plan.stats = self._new_stats()
+        try:
+            with self._phase(plan.stats, "preprocess"):
+                source = Preprocessor.trim_assistant_reply(files_content)
+        except Exception as e:
+            plan.error = f"预处理失败: {str(e)}"
+            plan.error_code = EventCode.PREPROCESS_FAILED
+            self.logger.error(plan.error)
+            return plan
+        if source != files_content:
+            plan.notices.append(("已完成输入预处理", StreamType.INFO, EventCode.PREPROCESSED))
+        try:
+            with self._phase(plan.stats, "parse"):
+                if self.zero_copy:
+                    source = source.encode("utf-8")
+                tasks = ContentParser.parse_content(source)
+        except Exception as e:
+            plan.error = f"内容解析失败: {str(e)}"
+            plan.error_code = EventCode.PARSE_FAILED
+            self.logger.error(plan.error)
+            return plan
+        plan.source = source
+        path_handler = PathHandler(root_dir)
+        # 记录全部校验消息及其事件代码，执行时再按执行器的格式与输出级别重新输出
+        stream = StreamHandler("typed")
+        total_tasks = len(tasks)
+        for idx, task in enumerate(tasks):
+            step_num = idx + 1
+            gen = self._prepare_block(task, source, step_num, total_tasks, path_handler, stream, plan.stats)
+            messages = []
+            while True:
+                try:
+                    event = next(gen)
+                except StopIteration as stop:
+                    prepared = stop.value
+                    break
+                messages.append((event.message, event.type, event.code))
+            plan.tasks.append(self._plan_task(step_num, task, prepared, messages))
+        return plan
+
+    def _plan_task(self, step_num: int, task: TaskModel, prepared: Optional[_PreparedTask],
+                   messages: list) -> PlannedTask:
+        """根据校验结果与目标的 stat 信息确定计划状态"""
+        action = task.action.lower().strip()
+        size = task.content_size if task.requires_content else 0
+        planned = PlannedTask(step_num, action, None, size, "invalid", task, messages=messages)
+        if prepared is None:
+            errors = [message for message, type_, _ in messages if type_ == StreamType.ERROR]
+            planned.error = errors[-1] if errors else "任务未通过校验"
+            return planned
+        planned.path = prepared.full_path
+        planned.prepared = prepared
+        if action not in SUPPORTED_ACTIONS:
+            planned.error = f"不支持的操作类型: {action}"
+            return planned
+        try:
+            st = os.stat(prepared.full_path)
+            kind = "dir" if stat.S_ISDIR(st.st_mode) else "file"
+        except OSError:
+            st, kind = None, None
+        wants_dir = action in ("create folder", "delete folder")
+        if kind is None:
+            planned.status = "missing" if task.is_delete_operation or task.is_patch_operation else "new"
+            if task.is_patch_operation:
+                planned.error = "补丁的目标文件不存在"
+        elif (kind == "dir") != wants_dir:
+            planned.status = "conflict"
+        elif task.is_patch_operation:
+            # 试应用补丁，不写入
+            try:
+                original, patched = self.op_handler.apply_patch(prepared.full_path, task.get_payload())
+                planned.status = "unchanged" if patched == original else "exists"
+            except Exception as e:
+                planned.status = "conflict"
+                planned.error = f"补丁无法应用: {str(e)}"
+        elif task.requires_content and self.op_handler._is_unchanged(prepared.full_path, task.get_payload(), st):
+            planned.status = "unchanged"
+        else:
+            planned.status = "exists"
+        return planned
+
+    def _execute_plan(self, plan: ExecutionPlan) -> Generator[dict, None, Optional[dict]]:
+        start_time = time.time()
+        stream = self._new_stream()
+        for message, type_, code in plan.notices:
+            yield from stream.emit(message, type_, code=code)
+        if plan.error:
+            yield from stream.emit(plan.error, StreamType.ERROR, code=plan.error_code)
+            return None
+        total_tasks = len(plan.tasks)
+        yield from stream.emit(f"一共{total_tasks}个待执行任务", StreamType.INFO, code=EventCode.BATCH_START)
+        self.logger.info(f"执行计划: 一共{total_tasks}个待执行任务")
+        # 只沿用计划阶段的计数（校验失败、警告等）；计时器、摘要等可变状态每次执行重新创建，
+        # 同一计划重复执行时互不影响
+        stats = self._new_stats()
+        stats.update((key, value) for key, value in plan.stats.items()
+                     if type(value) is int and key != "syscall_baseline")
+        txn = None
+        if self.transactional:
+            txn = yield from self._begin_transaction(plan.root_dir, stream)
+        if self._batched or txn is not None:
+            for planned in plan.tasks:
+                yield from self._replay_messages(planned, stream)
+            prepared_tasks = [planned.prepared for planned in plan.tasks if planned.prepared is not None]
+            yield from self._execute_batch(prepared_tasks, stream, stats, txn)
+            if txn is not None:
+                yield from self._complete_transaction(txn, stream, stats)
+        else:
+            for planned in plan.tasks:
+                yield from self._replay_messages(planned, stream)
+                if planned.prepared is not None:
+                    yield from self._execute_prepared(planned.prepared, stream, stats)
+        summary_data = yield from self._finish(stream, stats, total_tasks, start_time)
+        return summary_data
+
+    @staticmethod
+    def _replay_messages(planned: PlannedTask, stream: StreamHandler) -> Generator[dict, None, None]:
+        stream.set_task(planned.step_num, planned.task.file_path)
+        for message, type_, code in planned.messages:
+            yield from stream.emit(message, type_, code=code)
+
+    def _execute_content(self, root_dir: str, files_content: str) -> Generator[dict, None, Optional[dict]]:
+        """codeFileExecutHelper 的执行体；预处理或解析失败时返回 None"""
         start_time = time.time()
         path_handler = PathHandler(root_dir)
         # 使用实例而不是类，以避免属性名被错误替换或污染
-        stream = StreamHandler()
+        stream = self._new_stream()
         parser = ContentParser
+        stats = self._new_stats()
 
         # 预处理：在解析之前对整体文本做规整
         try:
-            preprocessed_content = Preprocessor.trim_assistant_reply(files_content)
+            with self._phase(stats, "preprocess"):
+                preprocessed_content = Preprocessor.trim_assistant_reply(files_content)
             if preprocessed_content != files_content:
                 self.logger.info("已对输入内容进行预处理（剥离思索片段与尾部占位）")
-                yield stream.build_stream("已完成输入预处理", StreamType.INFO)
+                yield from stream.emit("已完成输入预处理", StreamType.INFO, code=EventCode.PREPROCESSED)
         except Exception as e:
-            yield stream.build_stream(f"预处理失败: {str(e)}", StreamType.ERROR)
+            yield from stream.emit(f"预处理失败: {str(e)}", StreamType.ERROR, code=EventCode.PREPROCESS_FAILED)
             self.logger.error(f"预处理失败: {str(e)}")
             return
 
         try:
-            blocks = parser.split_content(preprocessed_content)
-            total_tasks = len(blocks)
-            yield stream.build_stream(f"一共{total_tasks}个待执行任务", StreamType.INFO)
+            with self._phase(stats, "parse"):
+                if self.zero_copy:
+                    preprocessed_content = preprocessed_content.encode("utf-8")
+                tasks = parser.parse_content(preprocessed_content)
+            total_tasks = len(tasks)
+            yield from stream.emit(f"一共{total_tasks}个待执行任务", StreamType.INFO, code=EventCode.BATCH_START)
             self.logger.info(f"一共{total_tasks}个待执行任务")
         except Exception as e:
-            yield stream.build_stream(f"内容解析失败: {str(e)}", StreamType.ERROR)
+            yield from stream.emit(f"内容解析失败: {str(e)}", StreamType.ERROR, code=EventCode.PARSE_FAILED)
             self.logger.error(f"内容解析失败: {str(e)}")
             return
 
-        successful_tasks = 0
-        failed_tasks = 0
-        invalid_tasks = 0
-        content_integrity_warnings = 0
+        txn = None
+        if self.transactional:
+            txn = yield from self._begin_transaction(root_dir, stream)
+        if self._batched or txn is not None:
+            yield from self._run_batched(tasks, preprocessed_content, total_tasks, path_handler, stream, stats, txn)
+        else:
+            for idx, task in enumerate(tasks):
+                yield from self._process_task(
+                    task, preprocessed_content, idx + 1, total_tasks, path_handler, stream, stats
+                )
+        if txn is not None:
+            yield from self._complete_transaction(txn, stream, stats)
 
-        for idx, block in enumerate(blocks):
-            step_num = idx + 1
-            yield stream.build_stream(f"正在解析第【{step_num}/{total_tasks}】个任务", StreamType.PROGRESS)
-            self.logger.info(f"开始解析第{step_num}个任务块", step_num=step_num)
+        summary_data = yield from self._finish(stream, stats, total_tasks, start_time)
+        return summary_data
+
+    def codeFileExecutStreamHelper(self, root_dir: str, content_chunks: Iterable[str]) -> Generator[dict, None, dict]:
+        """
+        流式执行批量文件操作：边接收 LLM 回复边执行已闭合的任务块
+        Args:
+            root_dir: 根目录路径
+            content_chunks: 逐段到达的指令文本（任意切分）
+        Yields:
+            dict: 与 codeFileExecutHelper 相同格式的流式执行结果
+        """
+        session = _StreamingSession(self, root_dir)
+        try:
+            for chunk in content_chunks:
+                yield from session.feed(chunk)
+            summary_data = yield from session.finish()
+            return summary_data
+        finally:
+            self.logger.flush()
+
+    async def acodeFileExecutStreamHelper(self, root_dir: str, content_chunks: AsyncIterable[str]) -> AsyncIterator[dict]:
+        """
+        codeFileExecutStreamHelper 的异步版本，接收异步文本流
+        解析与文件操作在一个专用线程中逐个事件推进，不阻塞事件循环（与 AsyncCodeFileExecutor 相同）
+        Args:
+            root_dir: 根目录路径
+            content_chunks: 异步迭代的指令文本片段
+        Yields:
+            dict: 与 codeFileExecutHelper 相同格式的流式执行结果
+        """
+        from codefileexecutorlib.core.async_executor import _iterate_in_pool  # 避免循环导入
+        session = _StreamingSession(self, root_dir)
+        # 会话的各步必须依次执行，一个线程即可
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="codefile-stream")
+        try:
+            async for chunk in content_chunks:
+                async for event in _iterate_in_pool(session.feed(chunk), pool):
+                    yield event
+            async for event in _iterate_in_pool(session.finish(), pool):
+                yield event
+        finally:
+            await asyncio.wrap_future(pool.submit(self.logger.flush))
+            pool.shutdown(wait=False)
+
+    def _for_batch(self) -> "CodeFileExecutor":
+        """
+        供并发批次使用的浅拷贝：共用配置、日志与校验缓存，文件操作处理器换成独占的一份，
+        各批次的系统调用计数与目录缓存互不干扰（见 ExecutorPool、AsyncCodeFileExecutor）
+        """
+        executor = copy.copy(self)
+        executor.op_handler = self.op_handler.clone()
+        return executor
+
+    @property
+    def _batched(self) -> bool:
+        """是否先解析校验全部任务再整体执行"""
+        return self.max_workers > 1 or self.coalesce or self.syntax_checker is not None
+
+    def _new_stream(self) -> StreamHandler:
+        return StreamHandler(self.event_mode, self.verbosity)
+
+    def _new_stats(self) -> dict:
+        """新批次的统计数据；同时清空文件操作的目录缓存"""
+        self.op_handler.reset_dir_cache()
+        return {
+            "syscall_baseline": self.op_handler.syscall_count,
+            "successful_tasks": 0,
+            "failed_tasks": 0,
+            "invalid_tasks": 0,
+            "unchanged_tasks": 0,
+            "coalesced_tasks": 0,
+            "rolled_back_tasks": 0,
+            "content_integrity_warnings": 0,
+            # 完整路径 -> (step_num, 最后一次写入的摘要)，批次结束时复核；文件随后被删除或未写入时摘要为 None
+            "digests": {} if self.verify_digest else None,
+            "timer": PhaseTimer(self.phase_hooks) if self.profile else None,
+        }
+
+    @staticmethod
+    def _phase(stats: dict, name: str, step: Optional[int] = None):
+        """批次未启用计时时返回空上下文"""
+        timer = stats["timer"]
+        if timer is None:
+            return NULL_SCOPE.phase(name)
+        return timer.phase(name, step)
+
+    @staticmethod
+    def _scope(stats: dict, step: int) -> TaskScope:
+        timer = stats["timer"]
+        return NULL_SCOPE if timer is None else timer.scope(step)
+
+    def _process_task(self, task: TaskModel, source: Union[str, bytes], step_num: int, total_tasks: Optional[int],
+                      path_handler: PathHandler, stream: StreamHandler, stats: dict) -> Generator[dict, None, None]:
+        """校验并执行单个任务"""
+        prepared = yield from self._prepare_block(task, source, step_num, total_tasks, path_handler, stream, stats)
+        if prepared is not None:
+            yield from self._execute_prepared(prepared, stream, stats)
+
+    def _prepare_block(self, task: TaskModel, source: Union[str, bytes], step_num: int, total_tasks: Optional[int],
+                       path_handler: PathHandler, stream: StreamHandler,
+                       stats: dict) -> Generator[dict, None, Optional[_PreparedTask]]:
+        """输出进度并校验单个任务块；无法执行时返回 None"""
+        stream.set_task(step_num, task.file_path)
+        if total_tasks is None:
+            yield from stream.emit(f"正在解析第【{step_num}】个任务", StreamType.PROGRESS, code=EventCode.TASK_PROGRESS)
+        else:
+            yield from stream.emit(f"正在解析第【{step_num}/{total_tasks}】个任务", StreamType.PROGRESS, code=EventCode.TASK_PROGRESS)
+        self.logger.info(f"开始解析第{step_num}个任务块", step_num=step_num)
+        try:
+            validation = self._prepare_task(task, source, step_num, path_handler, stream, stats)
+            if stats["timer"] is not None:
+                validation = stats["timer"].timed(validation, "validate", step_num)
+            prepared = yield from validation
+            return prepared
+        except Exception as task_ex:
+            stats["failed_tasks"] += 1
+            error_msg = f"任务处理异常: {str(task_ex)}"
+            yield from stream.emit(error_msg, StreamType.ERROR, code=EventCode.TASK_ERROR)
+            self.logger.error(error_msg, step_num=step_num)
+            return None
+
+    def _run_batched(self, tasks: list, source: Union[str, bytes], total_tasks: int, path_handler: PathHandler,
+                     stream: StreamHandler, stats: dict,
+                     txn: Optional[Transaction] = None) -> Generator[dict, None, None]:
+        """
+        先依次解析校验全部任务，再整体执行（合并冗余操作、并行调度），结果按任务顺序输出
+        """
+        prepared_tasks = []
+        for idx, task in enumerate(tasks):
+            prepared = yield from self._prepare_block(
+                task, source, idx + 1, total_tasks, path_handler, stream, stats
+            )
+            if prepared is not None:
+                prepared_tasks.append(prepared)
+        yield from self._execute_batch(prepared_tasks, stream, stats, txn)
+
+    def _execute_batch(self, prepared_tasks: list, stream: StreamHandler, stats: dict,
+                       txn: Optional[Transaction] = None) -> Generator[dict, None, None]:
+        """执行一批已准备好的任务；启用 coalesce 时先合并冗余操作，事务模式下只写入暂存区"""
+        if self.coalesce:
+            prepared_tasks = self._coalesce(prepared_tasks)
+        if self.syntax_checker is not None:
+            self._submit_syntax(prepared_tasks)
+        if txn is not None:
+            yield from self._stage_batch(txn, prepared_tasks, stream, stats)
+            return
+        if self.max_workers > 1:
+            yield from self._execute_parallel(prepared_tasks, stream, stats)
+            return
+        for prepared in prepared_tasks:
+            yield from self._execute_prepared(prepared, stream, stats)
+
+    def _begin_transaction(self, root_dir: str, stream: StreamHandler) -> Generator[dict, None, Transaction]:
+        """恢复根目录下遗留的事务并开始新事务"""
+        stream.set_task(None)
+        try:
+            recovered = Transaction.recover(root_dir, self.op_handler)
+        except Exception as e:
+            recovered = []
+            yield from stream.emit(f"恢复遗留事务失败: {str(e)}", StreamType.WARNING, code=EventCode.TXN_RECOVERY_FAILED)
+            self.logger.warning(f"恢复遗留事务失败: {str(e)}")
+        labels = {"rolled_back": "已回滚", "completed": "已完成提交", "discarded": "已丢弃未提交的暂存数据"}
+        for txn_id, outcome in recovered:
+            msg = f"发现遗留事务 {txn_id}，{labels[outcome]}"
+            yield from stream.emit(msg, StreamType.WARNING, code=EventCode.TXN_RECOVERED)
+            self.logger.warning(msg)
+        return Transaction(root_dir, self.op_handler)
+
+    def _stage_batch(self, txn: Transaction, prepared_tasks: list, stream: StreamHandler,
+                     stats: dict) -> Generator[dict, None, None]:
+        """按顺序登记任务，再把写入内容写入暂存区（max_workers > 1 时并行写入），结果按任务顺序输出"""
+        staged = []
+        for prepared in prepared_tasks:
+            if prepared.action not in SUPPORTED_ACTIONS:
+                yield from self._report_unsupported(prepared, stream, stats)
+                continue
+            index = None
+            if prepared.elision is None:
+                index = txn.add(prepared.action, prepared.full_path)
+            elif prepared.elision[2]:
+                index = txn.add("create folder", prepared.full_path)
+            staged.append((prepared, index))
+
+        def stage(item):
+            prepared, index = item
+            try:
+                if index is None:
+                    return OperationResult(True, "任务已合并"), None
+                scope = self._scope(stats, prepared.step_num)
+                failure = self._syntax_failure(prepared, scope)
+                if failure is not None:
+                    return failure, None
+                if prepared.action == "patch file":
+                    return txn.patch(index, prepared.task.get_payload(), scope), None
+                if txn.needs_content(index):
+                    return txn.write(index, prepared.task.get_payload(), scope), None
+                return OperationResult(True, "已暂存", staged=True), None
+            except Exception as ex:
+                return None, ex
+
+        # 补丁以此前暂存的写入为基准，在其余写入完成后按顺序暂存
+        writes = [item for item in staged if item[0].action != "patch file"]
+        patches = [item for item in staged if item[0].action == "patch file"]
+        if self.max_workers > 1 and len(writes) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = dict(zip(map(id, writes), pool.map(stage, writes)))
+        else:
+            results = {id(item): stage(item) for item in writes}
+        results.update((id(item), stage(item)) for item in patches)
+        for item in staged:
+            op_result, error = results[id(item)]
+            yield from self._report_result(item[0], op_result, error, stream, stats)
+
+    def _complete_transaction(self, txn: Transaction, stream: StreamHandler,
+                              stats: dict) -> Generator[dict, None, None]:
+        """全部任务成功时提交事务，否则回滚"""
+        stream.set_task(None)
+        if stats["failed_tasks"] or stats["invalid_tasks"]:
+            txn.rollback()
+            self._mark_rolled_back(stats)
+            msg = "存在失败或无效的任务，事务已回滚，未修改任何文件"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.TXN_ROLLED_BACK)
+            self.logger.error(msg)
+            return
+        try:
+            with self._phase(stats, "commit"):
+                applied = txn.commit()
+        except Exception as e:
+            self._mark_rolled_back(stats)
+            msg = f"事务提交失败，已回滚: {str(e)}"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.TXN_COMMIT_FAILED)
+            self.logger.error(msg)
+            return
+        stats["transaction"] = "committed"
+        msg = f"事务已提交，应用{applied}项变更"
+        yield from stream.emit(msg, StreamType.INFO, code=EventCode.TXN_COMMITTED)
+        self.logger.info(msg)
+
+    @staticmethod
+    def _mark_rolled_back(stats: dict):
+        """已暂存的任务随事务回滚，不再计为成功，汇总与磁盘状态一致"""
+        stats["transaction"] = "rolled_back"
+        stats["rolled_back_tasks"] = stats["successful_tasks"]
+        stats["successful_tasks"] = stats["unchanged_tasks"] = stats["coalesced_tasks"] = 0
+
+    @staticmethod
+    def _coalesce(prepared_tasks: list) -> list:
+        """把可省略的任务替换为带 elision 标记的任务，执行时至多确保一个目录存在"""
+        candidates = [idx for idx, prepared in enumerate(prepared_tasks) if prepared.action in SUPPORTED_ACTIONS]
+        elided = TaskCoalescer.coalesce(
+            [(prepared_tasks[idx].action, prepared_tasks[idx].full_path) for idx in candidates]
+        )
+        result = list(prepared_tasks)
+        for pos, (reason, by, ensure_dir) in elided.items():
+            prepared = prepared_tasks[candidates[pos]]
+            by_step = prepared_tasks[candidates[by]].step_num
+            result[candidates[pos]] = _PreparedTask(
+                prepared.step_num, prepared.task, ensure_dir or prepared.full_path, prepared.action,
+                elision=(reason, by_step, ensure_dir),
+            )
+        return result
+
+    def _report_coalesced(self, prepared: _PreparedTask, stream: StreamHandler,
+                          stats: dict) -> Generator[dict, None, None]:
+        reason, by_step, _ = prepared.elision
+        if reason == SUPERSEDED:
+            detail = f"文件随后在第{by_step}步被重新写入或删除"
+        elif reason == DELETED:
+            detail = f"所在目录随后在第{by_step}步被删除"
+        else:
+            detail = f"目录已在第{by_step}步创建"
+        msg = f"任务已合并，跳过执行：{detail}"
+        stats["successful_tasks"] += 1
+        stats["coalesced_tasks"] += 1
+        yield from stream.emit(msg, StreamType.SUCCESS, {"coalesced": reason, "superseded_by": by_step}, code=EventCode.TASK_COALESCED)
+        self.logger.info(msg, step_num=prepared.step_num)
+
+    def _execute_parallel(self, prepared_tasks: list, stream: StreamHandler,
+                          stats: dict) -> Generator[dict, None, None]:
+        """交由调度器并行执行已准备好的任务，结果按任务顺序输出"""
+        runnable = []
+        for prepared in prepared_tasks:
+            if prepared.action in SUPPORTED_ACTIONS:
+                runnable.append(prepared)
+                continue
+            yield from self._report_unsupported(prepared, stream, stats)
+
+        scheduler = TaskScheduler(self.max_workers)
+        paths = [prepared.full_path for prepared in runnable]
+        operation = lambda i: self._run_operation(runnable[i], self._scope(stats, runnable[i].step_num))
+        for idx, op_result, error in scheduler.run(paths, operation):
+            yield from self._report_result(runnable[idx], op_result, error, stream, stats)
+
+    def _prepare_task(self, task: TaskModel, source: Union[str, bytes], step_num: int, path_handler: PathHandler,
+                      stream: StreamHandler, stats: dict) -> Generator[dict, None, Optional[_PreparedTask]]:
+        """完成任务的内容、路径校验；校验失败时返回 None"""
+        parser = ContentParser
+        if not task.is_valid:
+            stats["invalid_tasks"] += 1
+            error_msg = task.error_message or "未知错误"
+            yield from stream.emit(f"无效任务: {error_msg}", StreamType.ERROR, code=EventCode.TASK_INVALID)
+            self.logger.error(f"无效任务: {error_msg}", step_num=step_num)
+            return None
+
+        yield from stream.emit(task.step_line, StreamType.INFO, code=EventCode.TASK_START)
+
+        if task.code_block_count > 1:
+            msg = f"发现{task.code_block_count}个代码块，将使用最大的一个"
+            yield from stream.emit(msg, StreamType.WARNING, code=EventCode.MULTIPLE_CODE_BLOCKS)
+            self.logger.warning(msg, step_num=step_num)
+
+        content_valid, content_msg = task.validate_content_requirement()
+        if not content_valid:
+            stats["failed_tasks"] += 1
+            yield from stream.emit(f"内容验证失败: {content_msg}", StreamType.ERROR, code=EventCode.CONTENT_INVALID)
+            self.logger.error(f"内容验证失败: {content_msg}", step_num=step_num)
+            return None
+
+        if task.requires_content and task.content_length:
             try:
-                task: TaskModel = parser.parse_task_block(block)
-                if not task.is_valid:
-                    invalid_tasks += 1
-                    error_msg = task.error_message or "未知错误"
-                    yield stream.build_stream(f"无效任务: {error_msg}", StreamType.ERROR)
-                    self.logger.error(f"无效任务: {error_msg}", step_num=step_num)
-                    continue
-
-                yield stream.build_stream(task.step_line, StreamType.INFO)
-
-                if task.code_block_count > 1:
-                    msg = f"发现{task.code_block_count}个代码块，将使用最大的一个"
-                    yield stream.build_stream(msg, StreamType.WARNING)
+                content_verification = parser.verify_task_content(source, task)
+                if not content_verification[0]:
+                    stats["content_integrity_warnings"] += 1
+                    msg = f"代码提取完整性警告: {content_verification[1]}"
+                    yield from stream.emit(msg, StreamType.WARNING, code=EventCode.CONTENT_INTEGRITY)
                     self.logger.warning(msg, step_num=step_num)
+            except Exception as e:
+                yield from stream.emit(f"内容验证过程出错: {str(e)}", StreamType.WARNING, code=EventCode.CONTENT_INTEGRITY)
+                self.logger.warning(f"内容验证过程出错: {str(e)}", step_num=step_num)
 
-                content_valid, content_msg = task.validate_content_requirement()
-                if not content_valid:
-                    failed_tasks += 1
-                    yield stream.build_stream(f"内容验证失败: {content_msg}", StreamType.ERROR)
-                    self.logger.error(f"内容验证失败: {content_msg}", step_num=step_num)
-                    continue
-
-                if task.requires_content and task.content:
-                    try:
-                        content_verification = parser.verify_extracted_content(block, task.content)
-                        if not content_verification[0]:
-                            content_integrity_warnings += 1
-                            msg = f"代码提取完整性警告: {content_verification[1]}"
-                            yield stream.build_stream(msg, StreamType.WARNING)
-                            self.logger.warning(msg, step_num=step_num)
-                    except Exception as e:
-                        yield stream.build_stream(f"内容验证过程出错: {str(e)}", StreamType.WARNING)
-                        self.logger.warning(f"内容验证过程出错: {str(e)}", step_num=step_num)
-
-                if not is_content_length_valid(task.content):
-                    failed_tasks += 1
-                    msg = "文件内容超过10MB，跳过"
-                    yield stream.build_stream(msg, StreamType.ERROR)
-                    self.logger.error(msg, step_num=step_num)
-                    continue
-
-                if not is_path_length_valid(task.file_path):
-                    failed_tasks += 1
-                    msg = "路径长度超过限制，跳过"
-                    yield stream.build_stream(msg, StreamType.ERROR)
-                    self.logger.error(msg, step_num=step_num)
-                    continue
-
-                file_path = task.file_path
-                is_abs = path_handler.is_absolute_path(file_path)
-                if is_abs:
-                    msg = "检测到绝对路径"
-                    yield stream.build_stream(msg, StreamType.WARNING)
-                    self.logger.warning(f"{msg}: {file_path}", step_num=step_num)
-                    full_path = path_handler.normalize_path(file_path)
-                else:
-                    full_path = path_handler.get_full_path(file_path)
-
-                if not path_handler.validate_path_security(full_path):
-                    failed_tasks += 1
-                    msg = "路径安全校验失败，跳过"
-                    yield stream.build_stream(msg, StreamType.ERROR)
-                    self.logger.error(f"{msg}: {full_path}", step_num=step_num)
-                    continue
-
-                filename = os.path.basename(full_path)
-                if filename and not is_safe_filename(filename):
-                    failed_tasks += 1
-                    msg = "文件名包含非法字符，跳过"
-                    yield stream.build_stream(msg, StreamType.ERROR)
-                    self.logger.error(f"{msg}: {filename}", step_num=step_num)
-                    continue
+        if not is_content_size_valid(task.content_size):
+            stats["failed_tasks"] += 1
+            msg = "文件内容超过10MB，跳过"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.CONTENT_TOO_LARGE)
+            self.logger.error(msg, step_num=step_num)
+            return None
 
-                try:
-                    op_result = None
-                    action = task.action.lower().strip()
-                    operation_summary = task.get_operation_summary()
-                    self.logger.info(f"执行操作: {operation_summary}", step_num=step_num)
-
-                    if action == "create folder":
-                        op_result = self.op_handler.create_folder(full_path)
-                    elif action == "delete folder":
-                        op_result = self.op_handler.delete_folder(full_path)
-                    elif action == "create file":
-                        content_length = len(task.content)
-                        self.logger.info(f"创建文件，内容长度: {content_length}", step_num=step_num)
-                        op_result = self.op_handler.create_file(full_path, task.content)
-                    elif action == "update file":
-                        content_length = len(task.content)
-                        self.logger.info(f"更新文件，内容长度: {content_length}", step_num=step_num)
-                        op_result = self.op_handler.update_file(full_path, task.content)
-                    elif action == "delete file":
-                        op_result = self.op_handler.delete_file(full_path)
-                    else:
-                        msg = f"不支持的操作类型: {action}"
-                        failed_tasks += 1
-                        yield stream.build_stream(msg, StreamType.ERROR)
-                        self.logger.error(msg, step_num=step_num)
-                        continue
-
-                    if op_result and op_result.success:
-                        successful_tasks += 1
-                        lines_count = 0
-                        if task.requires_content and task.content:
-                            lines_count = len(task.content.splitlines())
-                        success_msg = f"任务执行成功，更新{lines_count}行代码"
-                        if op_result.backup_path:
-                            success_msg += f" (备份: {op_result.backup_path})"
-                        yield stream.build_stream(success_msg, StreamType.SUCCESS)
-                        self.logger.info(f"{success_msg}: {op_result.message}", step_num=step_num)
-                    else:
-                        failed_tasks += 1
-                        error_msg = op_result.error if op_result else "操作返回空结果"
-                        yield stream.build_stream(f"执行任务失败: {error_msg}", StreamType.ERROR)
-                        self.logger.error(f"执行任务失败: {error_msg}", step_num=step_num)
-                except Exception as ex:
-                    failed_tasks += 1
-                    error_msg = f"执行任务异常: {str(ex)}"
-                    yield stream.build_stream(error_msg, StreamType.ERROR)
-                    self.logger.error(error_msg, step_num=step_num)
-                    continue
-            except Exception as task_ex:
-                failed_tasks += 1
-                error_msg = f"任务处理异常: {str(task_ex)}"
-                yield stream.build_stream(error_msg, StreamType.ERROR)
-                self.logger.error(error_msg, step_num=step_num)
+        if task.is_patch_operation:
+            try:
+                Patcher.parse(task.get_content())
+            except InvalidTaskFormatException as e:
+                stats["failed_tasks"] += 1
+                msg = f"补丁格式无效: {str(e)}"
+                yield from stream.emit(msg, StreamType.ERROR, code=EventCode.PATCH_INVALID)
+                self.logger.error(msg, step_num=step_num)
+                return None
+
+        if self.validator is not None and task.requires_content and not task.is_patch_operation \
+                and task.content_length:
+            content = task.get_content()
+            extension = os.path.splitext(task.file_path)[1] or None
+            # 以原始任务块为基准：块中出现的泛型等签名须保留在提取出的代码中
+            original = self._block_text(source, task)
+            structure_valid, structure_msg = self.validator.check_code_syntax_integrity(original, content, extension)
+            if not structure_valid:
+                stats["content_integrity_warnings"] += 1
+                msg = f"代码结构检查警告: {structure_msg}"
+                yield from stream.emit(msg, StreamType.WARNING, code=EventCode.CONTENT_STRUCTURE)
+                self.logger.warning(msg, step_num=step_num)
+
+        if not is_path_length_valid(task.file_path):
+            stats["failed_tasks"] += 1
+            msg = "路径长度超过限制，跳过"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.PATH_TOO_LONG)
+            self.logger.error(msg, step_num=step_num)
+            return None
+
+        file_path = task.file_path
+        is_abs = path_handler.is_absolute_path(file_path)
+        if is_abs:
+            msg = "检测到绝对路径"
+            yield from stream.emit(msg, StreamType.WARNING, code=EventCode.ABSOLUTE_PATH)
+            self.logger.warning(f"{msg}: {file_path}", step_num=step_num)
+        full_path, inside_root = path_handler.resolve(file_path)
+
+        if not inside_root:
+            stats["failed_tasks"] += 1
+            msg = "路径安全校验失败，跳过"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.PATH_UNSAFE)
+            self.logger.error(f"{msg}: {full_path}", step_num=step_num)
+            return None
+
+        filename = os.path.basename(full_path)
+        if filename and not is_safe_filename(filename):
+            stats["failed_tasks"] += 1
+            msg = "文件名包含非法字符，跳过"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.FILENAME_UNSAFE)
+            self.logger.error(f"{msg}: {filename}", step_num=step_num)
+            return None
+
+        return _PreparedTask(step_num, task, full_path, task.action.lower().strip())
+
+    @staticmethod
+    def _block_text(source: Union[str, bytes], task: TaskModel) -> str:
+        """任务块的原始文本（零拷贝模式下解码对应片段）"""
+        if task.block_span is None:
+            return source.decode("utf-8") if isinstance(source, bytes) else source
+        block = source[task.block_span[0]:task.block_span[1]]
+        return block.decode("utf-8") if isinstance(block, bytes) else block
+
+    def _execute_prepared(self, prepared: _PreparedTask, stream: StreamHandler,
+                          stats: dict) -> Generator[dict, None, None]:
+        """执行已准备好的任务并输出结果"""
+        if prepared.action not in SUPPORTED_ACTIONS:
+            yield from self._report_unsupported(prepared, stream, stats)
+            return
+        op_result, error = None, None
+        try:
+            op_result = self._run_operation(prepared, self._scope(stats, prepared.step_num))
+        except Exception as ex:
+            error = ex
+        yield from self._report_result(prepared, op_result, error, stream, stats)
+
+    def _run_operation(self, prepared: _PreparedTask, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        """执行文件操作（可在工作线程中调用，不产生流式输出）"""
+        task = prepared.task
+        step_num = prepared.step_num
+        full_path = prepared.full_path
+        action = prepared.action
+        if prepared.elision is not None:
+            ensure_dir = prepared.elision[2]
+            if ensure_dir:
+                return self.op_handler.create_folder(ensure_dir, timer)
+            return OperationResult(True, "任务已合并")
+        failure = self._syntax_failure(prepared, timer)
+        if failure is not None:
+            return failure
+        operation_summary = task.get_operation_summary()
+        self.logger.info(f"执行操作: {operation_summary}", step_num=step_num)
+
+        if action == "create folder":
+            return self.op_handler.create_folder(full_path, timer)
+        elif action == "delete folder":
+            return self.op_handler.delete_folder(full_path, timer)
+        elif action == "create file":
+            content_length = task.content_length
+            self.logger.info(f"创建文件，内容长度: {content_length}", step_num=step_num)
+            return self.op_handler.create_file(full_path, task.get_payload(), timer)
+        elif action == "update file":
+            content_length = task.content_length
+            self.logger.info(f"更新文件，内容长度: {content_length}", step_num=step_num)
+            return self.op_handler.update_file(full_path, task.get_payload(), timer)
+        elif action == "patch file":
+            self.logger.info(f"应用补丁，补丁长度: {task.content_length}", step_num=step_num)
+            return self.op_handler.patch_file(full_path, task.get_payload(), timer)
+        elif action == "delete file":
+            return self.op_handler.delete_file(full_path, timer)
+        raise ValueError(f"不支持的操作类型: {action}")
+
+    def _submit_syntax(self, prepared_tasks: list):
+        """把整批待写入的内容一次提交语法检查，检查与前面任务的文件操作同时进行"""
+        checked = [prepared for prepared in prepared_tasks
+                   if prepared.elision is None and prepared.action in _SYNTAX_ACTIONS]
+        handles = self.syntax_checker.submit(
+            [(prepared.full_path, prepared.task.get_content()) for prepared in checked])
+        for prepared, handle in zip(checked, handles):
+            prepared.syntax = handle
+
+    def _syntax_failure(self, prepared: _PreparedTask, timer: TaskScope = NULL_SCOPE) -> Optional[OperationResult]:
+        """
+        语法检查不通过时返回失败结果；未提交检查的任务（如流式执行）在此直接检查
+        只有真实解析器的结论作为失败，括号平衡检查未通过时记为警告，任务照常执行
+        """
+        if self.syntax_checker is None or prepared.elision is not None or prepared.action not in _SYNTAX_ACTIONS:
+            return None
+        with timer.phase("syntax"):
+            if prepared.syntax is not None:
+                error = prepared.syntax.result()
+            else:
+                error = self.syntax_checker.check(prepared.full_path, prepared.task.get_content())
+        if error is None:
+            return None
+        if not self.syntax_checker.is_strict(prepared.full_path):
+            prepared.syntax_warning = error
+            return None
+        return OperationResult(False, "语法检查未通过", error=f"语法检查未通过: {error}")
+
+    def _report_unsupported(self, prepared: _PreparedTask, stream: StreamHandler,
+                            stats: dict) -> Generator[dict, None, None]:
+        stream.set_task(prepared.step_num, prepared.task.file_path)
+        msg = f"不支持的操作类型: {prepared.action}"
+        stats["failed_tasks"] += 1
+        yield from stream.emit(msg, StreamType.ERROR, code=EventCode.UNSUPPORTED_ACTION)
+        self.logger.error(msg, step_num=prepared.step_num)
+
+    def _report_result(self, prepared: _PreparedTask, op_result: Optional[OperationResult],
+                       error: Optional[BaseException], stream: StreamHandler,
+                       stats: dict) -> Generator[dict, None, None]:
+        """根据操作结果输出成功或失败信息"""
+        task = prepared.task
+        step_num = prepared.step_num
+        stream.set_task(step_num, task.file_path)
+        if prepared.syntax_warning is not None:
+            stats["content_integrity_warnings"] += 1
+            msg = f"语法检查警告: {prepared.syntax_warning}"
+            yield from stream.emit(msg, StreamType.WARNING, code=EventCode.SYNTAX_WARNING)
+            self.logger.warning(msg, step_num=step_num)
+        if error is not None:
+            stats["failed_tasks"] += 1
+            error_msg = f"执行任务异常: {str(error)}"
+            yield from stream.emit(error_msg, StreamType.ERROR, code=EventCode.TASK_ERROR)
+            self.logger.error(error_msg, step_num=step_num)
+        elif op_result and op_result.success and prepared.elision is not None:
+            yield from self._report_coalesced(prepared, stream, stats)
+        elif op_result and op_result.success:
+            stats["successful_tasks"] += 1
+            if stats["digests"] is not None:
+                self._track_digest(prepared, op_result.digest, stats["digests"])
+            if op_result.unchanged:
+                stats["unchanged_tasks"] += 1
+                success_msg = "任务执行成功，文件内容未变化，跳过写入"
+                if stream.wants(StreamType.SUCCESS):
+                    data = self._with_timings({"unchanged": True}, stats, step_num)
+                    yield stream.build_stream(success_msg, StreamType.SUCCESS, data, code=EventCode.TASK_UNCHANGED)
+                self.logger.info(success_msg, step_num=step_num)
+                return
+            lines_count = 0
+            if task.requires_content and task.content_length:
+                lines_count = task.line_count
+            change = f"应用{lines_count}行补丁" if task.is_patch_operation else f"更新{lines_count}行代码"
+            success_msg = f"任务执行成功，{change}"
+            if op_result.staged:
+                success_msg = f"任务已暂存，{change}（等待事务提交）"
+            if op_result.backup_path:
+                success_msg += f" (备份: {op_result.backup_path})"
+            if stream.wants(StreamType.SUCCESS):
+                code = EventCode.TASK_STAGED if op_result.staged else EventCode.TASK_SUCCESS
+                data = self._with_timings({"digest": op_result.digest} if op_result.digest else None, stats, step_num)
+                yield stream.build_stream(success_msg, StreamType.SUCCESS, data, code=code)
+            self.logger.info(f"{success_msg}: {op_result.message}", step_num=step_num)
+        else:
+            stats["failed_tasks"] += 1
+            error_msg = op_result.error if op_result else "操作返回空结果"
+            yield from stream.emit(f"执行任务失败: {error_msg}", StreamType.ERROR, code=EventCode.TASK_FAILED)
+            self.logger.error(f"执行任务失败: {error_msg}", step_num=step_num)
+
+    @staticmethod
+    def _track_digest(prepared: _PreparedTask, digest: Optional[str], digests: dict):
+        """记录路径最后一次写入的摘要；删除目录时其下的文件不再复核"""
+        if prepared.action == "delete folder":
+            prefix = prepared.full_path.rstrip(os.sep) + os.sep
+            for path in [path for path in digests if path.startswith(prefix)]:
+                del digests[path]
+        digests[prepared.full_path] = (prepared.step_num, digest)
+
+    def _verify_digests(self, stream: StreamHandler, stats: dict) -> Generator[dict, None, None]:
+        """批次结束时按写入时的摘要复核磁盘内容，不一致的任务由成功改判为失败"""
+        digests = stats["digests"]
+        if not digests or stats.get("transaction") == "rolled_back":
+            return
+        with self._phase(stats, "verify"):
+            mismatched = [(step_num, path, self.op_handler.verify_digest(path, digest))
+                          for path, (step_num, digest) in digests.items() if digest is not None]
+        for step_num, path, (ok, detail) in mismatched:
+            if ok:
                 continue
+            stats["successful_tasks"] -= 1
+            stats["failed_tasks"] += 1
+            stream.set_task(step_num, path)
+            msg = f"摘要复核失败: {detail}"
+            yield from stream.emit(msg, StreamType.ERROR, code=EventCode.DIGEST_MISMATCH)
+            self.logger.error(f"{msg}: {path}", step_num=step_num)
+        stream.set_task(None)
 
+    def _with_timings(self, data: Optional[dict], stats: dict, step_num: int) -> Optional[dict]:
+        """profile_tasks 时在 success 消息中附带该任务各阶段的耗时（毫秒）"""
+        if not self.profile_tasks or stats["timer"] is None:
+            return data
+        data = dict(data) if data else {}
+        data["timings"] = stats["timer"].task_timings(step_num)
+        return data
+
+    def _finish(self, stream: StreamHandler, stats: dict, total_tasks: int,
+                start_time: float) -> Generator[dict, None, dict]:
+        """输出汇总信息并返回统计数据"""
+        yield from self._verify_digests(stream, stats)
+        stream.set_task(None)
+        try:
+            synced_files, synced_dirs = self.op_handler.flush_pending_syncs()
+            if synced_files or synced_dirs:
+                self.logger.info(f"批量同步: 文件{synced_files}个, 目录{synced_dirs}个")
+        except Exception as e:
+            yield from stream.emit(f"目录同步失败: {str(e)}", StreamType.WARNING, code=EventCode.SYNC_FAILED)
+            self.logger.warning(f"目录同步失败: {str(e)}")
+        if self.backup_store is not None:
+            try:
+                pruned = self.backup_store.prune_if_needed()
+                if pruned:
+                    self.logger.info(f"清理过期备份: {pruned}个")
+            except Exception as e:
+                yield from stream.emit(f"备份清理失败: {str(e)}", StreamType.WARNING, code=EventCode.BACKUP_PRUNE_FAILED)
+                self.logger.warning(f"备份清理失败: {str(e)}")
+        successful_tasks = stats["successful_tasks"]
+        failed_tasks = stats["failed_tasks"]
+        invalid_tasks = stats["invalid_tasks"]
+        unchanged_tasks = stats["unchanged_tasks"]
+        coalesced_tasks = stats["coalesced_tasks"]
+        content_integrity_warnings = stats["content_integrity_warnings"]
         end_time = time.time()
         execution_time = end_time - start_time
-        log_file_path = getattr(self.logger, 'log_file', 'N/A')
+        log_file_path = self.logger.log_file or 'N/A'
         success_rate = (successful_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        fs_syscalls = self.op_handler.syscall_count - stats["syscall_baseline"]
 
         summary_data = {
             "total_tasks": total_tasks,
             "successful_tasks": successful_tasks,
             "failed_tasks": failed_tasks,
             "invalid_tasks": invalid_tasks,
+            "unchanged_tasks": unchanged_tasks,
+            "coalesced_tasks": coalesced_tasks,
             "content_integrity_warnings": content_integrity_warnings,
             "success_rate": f"{success_rate:.1f}%",
             "execution_time": f"{execution_time:.2f}s",
+            "verify_mode": self.op_handler.verify_mode,
+            "fs_syscalls": fs_syscalls,
             "log_file": log_file_path
         }
+        if "transaction" in stats:
+            summary_data["transaction"] = stats["transaction"]
+            summary_data["rolled_back_tasks"] = stats["rolled_back_tasks"]
+        if self.validator is not None:
+            summary_data["validator_cache"] = self.validator.cache_info()
+        timer = stats["timer"]
+        if timer is not None:
+            with timer.phase("log"):
+                self.logger.flush()
+            summary_data["phase_timings"] = timer.summary()
         summary_msg = f"执行完成 - 成功: {successful_tasks}, 失败: {failed_tasks}, 无效: {invalid_tasks}"
+        if unchanged_tasks > 0:
+            summary_msg += f", 未变化: {unchanged_tasks}"
+        if coalesced_tasks > 0:
+            summary_msg += f", 已合并: {coalesced_tasks}"
         if content_integrity_warnings > 0:
             summary_msg += f", 内容警告: {content_integrity_warnings}"
-        yield stream.build_stream(summary_msg, StreamType.SUMMARY, summary_data)
+        if stats.get("transaction") == "rolled_back":
+            summary_msg += f", 已回滚: {stats['rolled_back_tasks']}（事务已回滚）"
+        yield from stream.emit(summary_msg, StreamType.SUMMARY, summary_data, code=EventCode.SUMMARY)
         self.logger.info(
             f"执行统计: 总任务{total_tasks}, 成功{successful_tasks}, "
-            f"失败{failed_tasks}, 无效{invalid_tasks}, 内容警告{content_integrity_warnings}, "
-            f"成功率{success_rate:.1f}%, 耗时{execution_time:.2f}s"
+            f"失败{failed_tasks}, 无效{invalid_tasks}, 未变化{unchanged_tasks}, 已合并{coalesced_tasks}, 内容警告{content_integrity_warnings}, "
+            f"成功率{success_rate:.1f}%, 耗时{execution_time:.2f}s, 文件系统调用{fs_syscalls}次"
+        )
+        return summary_data
+
+
+class _StreamingSession:
+    """
+    流式执行会话：把逐段到达的文本交给增量解析器，任务块一旦闭合立即执行
+    事务模式下任务块闭合时写入暂存区，输入结束后统一提交或回滚
+    """
+
+    _THINK_OPEN = "<think>"
+    _THINK_CLOSE = "</think>"
+
+    def __init__(self, executor: CodeFileExecutor, root_dir: str):
+        self.executor = executor
+        self.root_dir = root_dir
+        self.path_handler = PathHandler(root_dir)
+        self.stream = executor._new_stream()
+        self.parser = IncrementalContentParser()
+        self.stats = executor._new_stats()
+        self.start_time = time.time()
+        self.step_num = 0
+        self.txn: Optional[Transaction] = None
+        self._txn_pending = executor.transactional
+        # 开头的 <think> 片段可能包含分隔符或围栏，需等其闭合后整体剥离
+        self._head: Optional[str] = ""
+        self._think_parts: Optional[list] = None
+        self._think_tail = ""
+
+    def feed(self, chunk: str) -> Generator[dict, None, None]:
+        if self._txn_pending:
+            yield from self._begin_transaction()
+        if self._head is not None:
+            chunk = self._consume_head(chunk)
+            if not chunk:
+                return
+        with self.executor._phase(self.stats, "parse"):
+            blocks = self.parser.feed(chunk)
+        for block in blocks:
+            yield from self._run_block(block)
+
+    def finish(self) -> Generator[dict, None, dict]:
+        if self._txn_pending:
+            yield from self._begin_transaction()
+        if self._head is not None:
+            # 输入结束时开头仍未确定（如 <think> 未闭合）：按原样交给解析器
+            pending = self._head
+            if self._think_parts is not None:
+                pending = self._THINK_OPEN + "".join(self._think_parts)
+            self._head = None
+            with self.executor._phase(self.stats, "parse"):
+                blocks = self.parser.feed(pending)
+            for block in blocks:
+                yield from self._run_block(block)
+        with self.executor._phase(self.stats, "parse"):
+            blocks = self.parser.close()
+        for block in blocks:
+            yield from self._run_block(block)
+        if self.txn is not None:
+            yield from self.executor._complete_transaction(self.txn, self.stream, self.stats)
+        summary_data = yield from self.executor._finish(
+            self.stream, self.stats, self.step_num, self.start_time
+        )
+        return summary_data
+
+    def _begin_transaction(self) -> Generator[dict, None, None]:
+        self._txn_pending = False
+        self.txn = yield from self.executor._begin_transaction(self.root_dir, self.stream)
+
+    def _consume_head(self, chunk: str) -> str:
+        """缓存开头可能属于 <think> 片段的文本，确定后返回可交给解析器的部分"""
+        if self._think_parts is not None:
+            self._think_parts.append(chunk)
+            window = self._think_tail + chunk
+            close = window.find(self._THINK_CLOSE)
+            if close == -1:
+                self._think_tail = window[-(len(self._THINK_CLOSE) - 1):]
+                return ""
+            self._head = None
+            self._think_parts = None
+            return window[close + len(self._THINK_CLOSE):]
+        head = self._head + chunk
+        stripped = head.lstrip()
+        if not stripped or self._THINK_OPEN.startswith(stripped):
+            self._head = head
+            return ""
+        if not stripped.startswith(self._THINK_OPEN):
+            self._head = None
+            return head
+        self._think_parts = []
+        return self._consume_head(stripped[len(self._THINK_OPEN):])
+
+    def _run_block(self, block: str) -> Generator[dict, None, None]:
+        try:
+            with self.executor._phase(self.stats, "preprocess"):
+                block = Preprocessor.trim_assistant_reply(block)
+        except Exception as e:
+            yield from self.stream.emit(f"预处理失败: {str(e)}", StreamType.ERROR, code=EventCode.PREPROCESS_FAILED)
+            self.executor.logger.error(f"预处理失败: {str(e)}")
+            return
+        if not block:
+            return
+        self.step_num += 1
+        with self.executor._phase(self.stats, "parse", self.step_num):
+            task = ContentParser.parse_task_block(block)
+        if self.txn is None:
+            yield from self.executor._process_task(
+                task, block, self.step_num, None, self.path_handler, self.stream, self.stats
+            )
+            return
+        prepared = yield from self.executor._prepare_block(
+            task, block, self.step_num, None, self.path_handler, self.stream, self.stats
         )
-        return summary_data
\ No newline at end of file
+        if prepared is not None:
+            yield from self.executor._execute_batch([prepared], self.stream, self.stats, self.txn)
@@ -0,0 +1,193 @@
+"""
+多批次执行池：多个调用方提交的批次共享同一线程池，按根目录互斥
+"""
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
+
+from codefileexecutorlib.core.executor import CodeFileExecutor
+
+_END = object()
+
+
+def _root_key(root_dir: str) -> str:
+    return os.path.normcase(os.path.realpath(os.path.abspath(root_dir)))
+
+
+def _roots_overlap(first: str, second: str) -> bool:
+    """两个根目录相同或互为祖先时，批次可能作用于同一路径"""
+    if first == second:
+        return True
+    first_prefix = first if first.endswith(os.sep) else first + os.sep
+    second_prefix = second if second.endswith(os.sep) else second + os.sep
+    return first.startswith(second_prefix) or second.startswith(first_prefix)
+
+
+class BatchHandle:
+    """
+    已提交批次的句柄
+    迭代句柄即可按顺序取得该批次的流式结果（阻塞直至下一条结果到达），
+    result() 等待批次结束并返回汇总数据
+    """
+
+    def __init__(self, pool: "ExecutorPool", root_dir: str, files_content: str):
+        self.root_dir = root_dir
+        self.files_content = files_content
+        self._pool = pool
+        self._key = _root_key(root_dir)
+        self._events: "queue.Queue" = queue.Queue()
+        self._done = threading.Event()
+        self._cancelled = False
+        self._summary: Optional[dict] = None
+        self._error: Optional[BaseException] = None
+
+    def __iter__(self) -> Iterator[dict]:
+        while True:
+            item = self._events.get()
+            if item is _END:
+                # 放回结束标记，使重复迭代或其他线程的迭代也能结束
+                self._events.put(_END)
+                return
+            yield item
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        """取消批次：尚未开始的批次不再执行，执行中的批次在当前任务结束后停止"""
+        self._cancelled = True
+        self._pool._discard(self)
+
+    def result(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        等待批次结束
+        Returns:
+            汇总数据；批次被取消或预处理/解析失败时为 None
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"批次尚未完成: {self.root_dir}")
+        if self._error is not None:
+            raise self._error
+        return self._summary
+
+    def _finish(self, summary: Optional[dict], error: Optional[BaseException]):
+        self._summary = summary
+        self._error = error
+        self._events.put(_END)
+        self._done.set()
+
+
+class ExecutorPool:
+    """
+    长期运行的批次执行池
+    1. 所有批次共享一个 CodeFileExecutor 的配置、日志与校验缓存，以及一个线程池；
+       每个批次使用各自的 FileOperationHandler，系统调用计数与目录缓存互不干扰
+    2. 根目录相同或互为祖先的批次按提交顺序串行，互不重叠的批次并行执行
+    3. 等待中的批次不占用工作线程：批次结束时才把可以开始的批次交给线程池
+    """
+
+    def __init__(self, max_workers: int = 4, **executor_options):
+        """
+        Args:
+            max_workers: 同时执行的批次数上限
+            executor_options: 传给 CodeFileExecutor 的构造参数
+        """
+        self.max_workers = max(1, max_workers)
+        self.executor = CodeFileExecutor(**executor_options)
+        self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="codefile-pool")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)   # 等待队列与执行中的批次均为空时通知
+        self._waiting: List[BatchHandle] = []
+        self._active: List[str] = []
+        self._closed = False
+
+    def submit(self, root_dir: str, files_content: str) -> BatchHandle:
+        """
+        提交一个批次
+        Returns:
+            BatchHandle，可迭代取得该批次的流式结果
+        """
+        handle = BatchHandle(self, root_dir, files_content)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("执行池已关闭")
+            self._waiting.append(handle)
+            self._dispatch()
+        return handle
+
+    def shutdown(self, wait: bool = True, cancel_pending: bool = False):
+        """
+        关闭执行池，之后不再接受新批次
+        Args:
+            wait: 是否等待全部批次执行完毕；为 False 时尚未开始的批次一律取消
+            cancel_pending: 是否取消尚未开始的批次；否则这些批次仍会依次执行
+        """
+        with self._idle:
+            self._closed = True
+            pending = []
+            if cancel_pending or not wait:
+                pending, self._waiting = self._waiting, []
+            if wait:
+                self._idle.wait_for(lambda: not self._waiting and not self._active)
+        for handle in pending:
+            handle._cancelled = True
+            handle._finish(None, None)
+        self._threads.shutdown(wait=wait)
+        self.executor.close()
+
+    def __enter__(self) -> "ExecutorPool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+    def _dispatch(self):
+        """把与执行中、以及排在前面的批次根目录均不重叠的批次交给线程池（需持有 _lock）"""
+        blocked = list(self._active)
+        for handle in list(self._waiting):
+            if any(_roots_overlap(handle._key, key) for key in blocked):
+                blocked.append(handle._key)
+                continue
+            self._waiting.remove(handle)
+            self._active.append(handle._key)
+            blocked.append(handle._key)
+            self._threads.submit(self._run, handle)
+
+    def _discard(self, handle: BatchHandle):
+        with self._lock:
+            if handle not in self._waiting:
+                return
+            self._waiting.remove(handle)
+            self._dispatch()
+            self._idle.notify_all()
+        handle._finish(None, None)
+
+    def _run(self, handle: BatchHandle):
+        summary, error = None, None
+        gen = self.executor._for_batch().codeFileExecutHelper(handle.root_dir, handle.files_content)
+        try:
+            while True:
+                if handle._cancelled:
+                    gen.close()
+                    break
+                try:
+                    event = next(gen)
+                except StopIteration as stop:
+                    summary = stop.value
+                    break
+                handle._events.put(event)
+        except BaseException as e:
+            error = e
+        finally:
+            with self._lock:
+                self._active.remove(handle._key)
+                self._dispatch()
+                self._idle.notify_all()
+            handle._finish(summary, error)
@@ -1,85 +1,506 @@
 import os
+import stat
+import uuid
 import shutil
+import hashlib
 import datetime
+import threading
+from typing import Optional, Set, Tuple, Union
 from codefileexecutorlib.models.result_model import OperationResult
+from codefileexecutorlib.core.backup_store import BackupStore
+from codefileexecutorlib.core.patcher import Patcher
+from codefileexecutorlib.core.profiler import NULL_SCOPE, TaskScope
+try:
+    import fcntl
+except ImportError:  # Windows 等平台不支持 reflink
+    fcntl = None
+Content = Union[str, bytes, memoryview]
+FICLONE = 0x40049409  # Linux ioctl：在 btrfs/xfs 等文件系统上创建写时复制副本
 class FileOperationHandler:
-    def __init__(self, backup_enabled: bool = True):
+    # 写入验证策略：
+    #   none - 不验证
+    #   size - 写入后用 os.fstat 比较文件大小与编码后的字节数
+    #   hash - 在写入过程中计算 SHA-256 摘要（记录在结果中）并比较大小；
+    #          需要时再调用 verify_digest 对磁盘内容做摘要比对
+    #   full - 重新读取文件并逐字节比较（默认，与历史行为一致）
+    VERIFY_MODES = ("none", "size", "hash", "full")
+    # 持久化策略：
+    #   none  - 不调用 fsync
+    #   file  - 每个文件写入后 fsync 文件，原子模式下再 fsync 其父目录
+    #   batch - 文件与父目录的 fsync 推迟到 flush_pending_syncs，批次中每个文件、每个目录只同步一次；
+    #           原子模式下临时文件仍在替换前 fsync（保证替换后的内容完整），只推迟父目录
+    FSYNC_MODES = ("none", "file", "batch")
+    # 备份策略：
+    #   copy     - shutil.copy2 完整复制（默认）
+    #   hardlink - 硬链接原文件，O(1)；仅在原 inode 不会被就地修改时使用
+    #              （删除文件、原子写入模式下的更新），否则退回复制
+    #   reflink  - FICLONE 写时复制克隆，文件系统不支持时退回复制
+    #   auto     - 依次尝试 reflink、hardlink、copy
+    BACKUP_STRATEGIES = ("copy", "hardlink", "reflink", "auto")
+    COMPARE_CHUNK_SIZE = 1024 * 1024
+    def __init__(self, backup_enabled: bool = True, verify_mode: str = "full",
+                 atomic_write: bool = False, fsync_mode: str = "none", backup_strategy: str = "copy",
+                 skip_unchanged: bool = True, backup_store: Optional[BackupStore] = None):
+        if verify_mode not in self.VERIFY_MODES:
+            raise ValueError(f"不支持的验证模式: {verify_mode}")
+        if fsync_mode not in self.FSYNC_MODES:
+            raise ValueError(f"不支持的同步模式: {fsync_mode}")
+        if backup_strategy not in self.BACKUP_STRATEGIES:
+            raise ValueError(f"不支持的备份策略: {backup_strategy}")
+        self.backup_strategy = backup_strategy
         self.backup_enabled = backup_enabled
-    def create_folder(self, path: str) -> OperationResult:
+        self.verify_mode = verify_mode
+        # 原子写入：先写同目录临时文件，验证并 fsync 后再 os.replace 到目标路径
+        self.atomic_write = atomic_write
+        self.fsync_mode = fsync_mode
+        # 目标文件内容与新内容完全一致时跳过备份与写入
+        self.skip_unchanged = skip_unchanged
+        # 集中式备份仓库；为 None 时沿用同目录 .backup 文件夹
+        self.backup_store = backup_store
+        # batch 模式下待同步的文件与目录
+        self._pending_files: Set[str] = set()
+        self._pending_dirs: Set[str] = set()
+        # 已确认存在的目录（规范化路径），同一批次中每个目录至多 stat/创建一次；delete_folder 时失效
+        self._known_dirs: Set[str] = set()
+        self._syscalls = 0
+        self._lock = threading.Lock()
+    @property
+    def syscall_count(self) -> int:
+        """累计发起的文件系统调用次数（近似值，用于衡量批次的 I/O 开销）"""
+        return self._syscalls
+    def clone(self) -> "FileOperationHandler":
+        """相同配置（共用备份仓库）、独立的系统调用计数与目录缓存，供并发执行的批次各自使用"""
+        return FileOperationHandler(
+            backup_enabled=self.backup_enabled, verify_mode=self.verify_mode, atomic_write=self.atomic_write,
+            fsync_mode=self.fsync_mode, backup_strategy=self.backup_strategy,
+            skip_unchanged=self.skip_unchanged, backup_store=self.backup_store,
+        )
+    def reset_dir_cache(self):
+        """清空目录缓存；每个批次开始时调用，避免沿用批次之间被外部删除的目录"""
+        with self._lock:
+            self._known_dirs.clear()
+    # 以下操作的 timer 参数用于分阶段计时（见 PhaseTimer），默认不计时
+    def create_folder(self, path: str, timer: TaskScope = NULL_SCOPE) -> OperationResult:
         try:
-            os.makedirs(path, exist_ok=True)
+            with timer.phase("write"):
+                self._ensure_dir(path)
             return OperationResult(True, "目录创建成功")
         except Exception as e:
             return OperationResult(False, "目录创建失败", error=str(e))
-    def delete_folder(self, path: str) -> OperationResult:
+    def delete_folder(self, path: str, timer: TaskScope = NULL_SCOPE) -> OperationResult:
         try:
+            self._count()
             if os.path.isdir(path):
-                shutil.rmtree(path)
+                self._forget_dirs(path)
+                self._count()
+                with timer.phase("write"):
+                    shutil.rmtree(path)
                 return OperationResult(True, "目录删除成功")
             else:
                 return OperationResult(True, "目录不存在，跳过删除")
         except Exception as e:
             return OperationResult(False, "目录删除失败", error=str(e))
-    def create_file(self, path: str, content: str) -> OperationResult:
-        try:
-            dir_path = os.path.dirname(path)
-            if dir_path and not os.path.exists(dir_path):
-                os.makedirs(dir_path, exist_ok=True)
-            with open(path, "w", encoding="utf-8", newline='') as f:
-                f.write(content)
-            verification_result = self._verify_file_content(path, content)
+    def create_file(self, path: str, content: Content, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        try:
+            content = self._as_bytes(content)
+            if self.skip_unchanged:
+                with timer.phase("compare"):
+                    st = self._stat(path)
+                    unchanged = st is not None and self._is_unchanged(path, content, st)
+                if unchanged:
+                    return OperationResult(True, "文件内容未变化，跳过写入", unchanged=True)
+            verification_result, digest = self._write_and_verify(path, content, timer, ensure_dir=True)
             if not verification_result[0]:
                 return OperationResult(False, "文件内容验证失败", error=verification_result[1])
-            return OperationResult(True, "文件创建成功")
+            return OperationResult(True, "文件创建成功", digest=digest)
         except Exception as e:
             return OperationResult(False, "文件创建失败", error=str(e))
-    def update_file(self, path: str, content: str) -> OperationResult:
+    def update_file(self, path: str, content: Content, timer: TaskScope = NULL_SCOPE) -> OperationResult:
         try:
+            content = self._as_bytes(content)
+            with timer.phase("compare"):
+                st = self._stat(path) if self.skip_unchanged or self.backup_enabled else None
+                unchanged = self.skip_unchanged and st is not None and self._is_unchanged(path, content, st)
+            if unchanged:
+                return OperationResult(True, "文件内容未变化，跳过写入", unchanged=True)
             backup_path = None
-            if self.backup_enabled and os.path.exists(path):
-                backup_path = self.backup_file(path)
-            dir_path = os.path.dirname(path)
-            if dir_path and not os.path.exists(dir_path):
-                os.makedirs(dir_path, exist_ok=True)
-            with open(path, "w", encoding="utf-8", newline='') as f:
-                f.write(content)
-            verification_result = self._verify_file_content(path, content)
+            if self.backup_enabled and st is not None:
+                with timer.phase("backup"):
+                    backup_path = self.backup_file(path)
+            verification_result, digest = self._write_and_verify(path, content, timer, ensure_dir=True)
             if not verification_result[0]:
-                if backup_path and os.path.exists(backup_path):
+                # 原子模式下目标文件未被改动，无需从备份恢复
+                if not self.atomic_write and backup_path and os.path.exists(backup_path):
                     try:
                         shutil.copy2(backup_path, path)
                     except:
                         pass
                 return OperationResult(False, "文件内容验证失败", error=verification_result[1])
-            return OperationResult(True, "文件更新成功", backup_path=backup_path)
+            return OperationResult(True, "文件更新成功", backup_path=backup_path, digest=digest)
         except Exception as e:
             return OperationResult(False, "文件更新失败", error=str(e))
-    def delete_file(self, path: str) -> OperationResult:
+    def patch_file(self, path: str, patch: Content, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        """读取磁盘上的文件并应用补丁（格式见 Patcher），补丁无法匹配时不改动文件"""
         try:
-            if os.path.exists(path) and os.path.isfile(path):
+            st = self._stat(path)
+            if st is None or not stat.S_ISREG(st.st_mode):
+                return OperationResult(False, "补丁应用失败", error="目标文件不存在")
+            with timer.phase("patch"):
+                original, patched = self.apply_patch(path, patch)
+            if self.skip_unchanged and patched == original:
+                return OperationResult(True, "补丁未改变文件内容，跳过写入", unchanged=True)
+            backup_path = None
+            if self.backup_enabled:
+                with timer.phase("backup"):
+                    backup_path = self.backup_file(path)
+            verification_result, digest = self._write_and_verify(path, patched, timer)
+            if not verification_result[0]:
+                if not self.atomic_write and backup_path and os.path.exists(backup_path):
+                    try:
+                        shutil.copy2(backup_path, path)
+                    except:
+                        pass
+                return OperationResult(False, "文件内容验证失败", error=verification_result[1])
+            return OperationResult(True, "补丁应用成功", backup_path=backup_path, digest=digest)
+        except Exception as e:
+            return OperationResult(False, "补丁应用失败", error=str(e))
+    def apply_patch(self, path: str, patch: Content, base: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+        """
+        计算补丁应用后的内容，不写入磁盘
+        Args:
+            base: 补丁的基准内容；为 None 时读取 path
+        Returns:
+            (基准内容, 应用补丁后的内容)，均为 UTF-8 字节
+        Raises:
+            InvalidTaskFormatException / PatchConflictException
+        """
+        if base is None:
+            self._count(3)   # open + read + close
+            with open(path, "rb") as f:
+                base = f.read()
+        patch_text = patch if isinstance(patch, str) else bytes(patch).decode("utf-8")
+        patched = Patcher.apply(base.decode("utf-8"), patch_text)
+        return base, patched.encode("utf-8")
+    def delete_file(self, path: str, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        try:
+            st = self._stat(path)
+            if st is not None and stat.S_ISREG(st.st_mode):
                 if self.backup_enabled:
-                    self.backup_file(path)
-                os.remove(path)
+                    # 原文件随后被 unlink，硬链接备份始终安全
+                    with timer.phase("backup"):
+                        self.backup_file(path, allow_link=True)
+                self._count()
+                with timer.phase("write"):
+                    os.remove(path)
                 return OperationResult(True, "文件删除成功")
             else:
                 return OperationResult(True, "文件不存在，记录警告但不报错")
         except Exception as e:
             return OperationResult(False, "文件删除失败", error=str(e))
-    def backup_file(self, path: str) -> str:
-        try:
-            backup_dir = os.path.join(os.path.dirname(path), ".backup")
-            os.makedirs(backup_dir, exist_ok=True)
-            base_name = os.path.basename(path)
-            now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(backup_dir, f"{base_name}.{now}.bak")
-            shutil.copy2(path, backup_path)
+    def backup_file(self, path: str, allow_link: Optional[bool] = None) -> str:
+        """
+        备份文件到备份仓库，未配置仓库时备份到同目录的 .backup 文件夹
+        Args:
+            path: 待备份文件
+            allow_link: 原 inode 之后是否不会被就地修改（允许硬链接）；默认取决于是否为原子写入模式
+        """
+        try:
+            if allow_link is None:
+                allow_link = self.atomic_write
+            self._count()
+            if self.backup_store is not None:
+                # copy 策略由仓库边复制边计算摘要，其余策略先克隆再计算
+                clone = None
+                if self.backup_strategy != "copy":
+                    clone = lambda src, dst: self._clone_file(src, dst, allow_link)
+                return self.backup_store.save(path, clone=clone)
+            backup_path = self._backup_target(path)
+            self._clone_file(path, backup_path, allow_link)
             return backup_path
         except Exception as e:
             return f"备份失败: {str(e)}"
-    def _verify_file_content(self, file_path: str, expected_content: str) -> tuple[bool, str]:
-        """验证文件内容是否与期望一致"""
+    def _backup_target(self, path: str) -> str:
+        """确保 .backup 目录存在并返回本次备份的文件路径"""
+        backup_dir = os.path.join(os.path.dirname(path), ".backup")
+        self._ensure_dir(backup_dir)
+        base_name = os.path.basename(path)
+        now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(backup_dir, f"{base_name}.{now}.bak")
+    def _clone_file(self, src: str, dst: str, allow_link: bool) -> str:
+        """
+        按备份策略复制文件
+        Returns:
+            实际使用的方式: reflink / hardlink / copy
+        """
+        strategy = self.backup_strategy
+        if strategy in ("reflink", "auto") and self._reflink(src, dst):
+            return "reflink"
+        if strategy in ("hardlink", "auto") and allow_link:
+            try:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                os.link(src, dst)
+                return "hardlink"
+            except OSError:
+                pass
+        shutil.copy2(src, dst)
+        return "copy"
+    @staticmethod
+    def _reflink(src: str, dst: str) -> bool:
+        """尝试以 FICLONE 创建写时复制副本，失败时清理目标并返回 False"""
+        if fcntl is None:
+            return False
+        try:
+            src_fd = os.open(src, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        except OSError:
+            os.close(src_fd)
+            return False
+        cloned = False
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            cloned = True
+        except OSError:
+            pass
+        finally:
+            os.close(dst_fd)
+            os.close(src_fd)
+        if not cloned:
+            try:
+                os.remove(dst)
+            except OSError:
+                pass
+            return False
+        shutil.copystat(src, dst)
+        return True
+    def verify_digest(self, path: str, expected_digest: str, chunk_size: int = 1024 * 1024) -> Tuple[bool, str]:
+        """按块读取磁盘上的文件计算 SHA-256，并与写入时记录的摘要比较"""
+        try:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    hasher.update(chunk)
+            if hasher.hexdigest() != expected_digest:
+                return False, "文件摘要与写入时不一致"
+            return True, "摘要验证通过"
+        except Exception as e:
+            return False, f"验证过程出错: {str(e)}"
+    def flush_pending_syncs(self) -> Tuple[int, int]:
+        """
+        对 batch 模式下累积的文件与父目录各执行一次 fsync：先同步文件数据，再同步目录项
+        批次中已被删除的文件直接跳过；文件同步出错时仍同步其余文件与目录，最后抛出第一个错误
+        Returns:
+            (已同步的文件数量, 已同步的目录数量)
+        """
+        with self._lock:
+            files, self._pending_files = self._pending_files, set()
+            dirs, self._pending_dirs = self._pending_dirs, set()
+        error = None
+        for path in files:
+            try:
+                self._fsync_file(path)
+            except OSError as e:
+                error = error or e
+        for dir_path in dirs:
+            self._fsync_directory(dir_path)
+        if error is not None:
+            raise error
+        return len(files), len(dirs)
+    def _count(self, calls: int = 1):
+        with self._lock:
+            self._syscalls += calls
+    def _stat(self, path: str) -> Optional[os.stat_result]:
+        self._count()
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+    @staticmethod
+    def _dir_key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+    def _ensure_dir(self, dir_path: str):
+        """确保目录存在；已确认存在的目录直接返回，不再访问文件系统"""
+        if not dir_path:
+            return
+        key = self._dir_key(dir_path)
+        with self._lock:
+            if key in self._known_dirs:
+                return
+        self._count()
+        if not os.path.isdir(dir_path):
+            self._count()
+            os.makedirs(dir_path, exist_ok=True)
+        with self._lock:
+            # 目录存在意味着其各级上级目录也存在
+            while key not in self._known_dirs:
+                self._known_dirs.add(key)
+                parent = os.path.dirname(key)
+                if parent == key:
+                    break
+                key = parent
+    def _forget_dirs(self, dir_path: str):
+        """目录被删除后，从缓存中移除该目录及其全部子目录"""
+        key = self._dir_key(dir_path)
+        prefix = key if key.endswith(os.sep) else key + os.sep
+        with self._lock:
+            self._known_dirs = {known for known in self._known_dirs
+                                if known != key and not known.startswith(prefix)}
+    def _fsync_file(self, path: str):
+        """重新打开已写入的文件并同步其数据；文件已不存在时跳过"""
+        self._count(3)
+        try:
+            fd = os.open(path, os.O_WRONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    def _fsync_directory(self, dir_path: str):
+        """同步目录项；不支持打开目录的平台（如 Windows）直接跳过"""
+        self._count(3)
+        try:
+            fd = os.open(dir_path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    @staticmethod
+    def _as_bytes(content: Content) -> memoryview:
+        """文本只编码一次，后续比较、写入与验证共用同一缓冲区"""
+        return memoryview(content.encode("utf-8") if isinstance(content, str) else content)
+    def _is_unchanged(self, path: str, content: Content, st: Optional[os.stat_result] = None) -> bool:
+        """
+        判断磁盘上的文件是否已与新内容逐字节一致
+        先用 os.stat 比较大小（绝大多数有变化的文件在此即可判定），大小相同时再分块读取比较，
+        遇到第一个不同的块立即返回；调用方已取得 stat 结果时可通过 st 传入
+        """
+        data = self._as_bytes(content)
+        if st is None:
+            st = self._stat(path)
+            if st is None:
+                return False
+        if not stat.S_ISREG(st.st_mode) or st.st_size != data.nbytes:
+            return False
+        chunk_size = self.COMPARE_CHUNK_SIZE
+        self._count(2 + data.nbytes // chunk_size)   # open + 每块一次 read + close
+        try:
+            with open(path, "rb") as f:
+                offset = 0
+                while offset < data.nbytes:
+                    chunk = f.read(chunk_size)
+                    if not chunk or data[offset:offset + len(chunk)] != chunk:
+                        return False
+                    offset += len(chunk)
+                return not f.read(1)
+        except OSError:
+            return False
+    def _write_and_verify(self, path: str, content: Content, timer: TaskScope = NULL_SCOPE,
+                          ensure_dir: bool = False) -> Tuple[Tuple[bool, str], Optional[str]]:
+        """
+        写入并验证文件
+        原子模式下验证的是临时文件，只有验证通过才替换目标文件
+        Args:
+            ensure_dir: 写入前是否确保父目录存在
+        Returns:
+            ((是否通过, 说明), hash 模式下的摘要)
+        """
+        if not self.atomic_write:
+            with timer.phase("write"):
+                if ensure_dir:
+                    self._ensure_dir(os.path.dirname(path))
+                data, digest, size = self._write_content(path, content, defer_sync=self.fsync_mode == "batch")
+            if self.fsync_mode == "batch":
+                with self._lock:
+                    self._pending_files.add(path)
+                    self._pending_dirs.add(os.path.dirname(path) or ".")
+            with timer.phase("verify"):
+                return self._verify_written(path, data, size), digest
+        dir_path = os.path.dirname(path) or "."
+        tmp_path = os.path.join(dir_path, f".{os.path.basename(path)}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            with timer.phase("write"):
+                if ensure_dir:
+                    self._ensure_dir(os.path.dirname(path))
+                data, digest, size = self._write_content(tmp_path, content, exclusive=True)
+            with timer.phase("verify"):
+                verification_result = self._verify_written(tmp_path, data, size)
+            if not verification_result[0]:
+                os.remove(tmp_path)
+                return verification_result, digest
+            self._count(3)
+            with timer.phase("write"):
+                try:
+                    shutil.copymode(path, tmp_path)
+                except OSError:
+                    pass
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        if self.fsync_mode == "file":
+            self._fsync_directory(dir_path)
+        elif self.fsync_mode == "batch":
+            with self._lock:
+                self._pending_dirs.add(dir_path)
+        return verification_result, digest
+    def _write_content(self, path: str, content: Content, exclusive: bool = False,
+                       defer_sync: bool = False) -> Tuple[memoryview, Optional[str], int]:
+        """
+        以二进制方式写入内容：文本只编码一次，bytes/memoryview 直接从缓冲区写出
+        Args:
+            defer_sync: 为 True 时不在此处 fsync，由调用方登记到 flush_pending_syncs
+        Returns:
+            (实际写入的字节视图, hash 模式下的 SHA-256 摘要, size/hash 模式下 fstat 得到的文件大小)
+        """
+        data = self._as_bytes(content)
+        hasher = hashlib.sha256() if self.verify_mode == "hash" else None
+        flags = os.O_WRONLY | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        flags |= os.O_EXCL if exclusive else os.O_TRUNC
+        self._count(2)   # open + close
+        fd = os.open(path, flags, 0o666)
+        try:
+            view = data
+            while view:
+                self._count()
+                written = os.write(fd, view)
+                if hasher is not None:
+                    hasher.update(view[:written])
+                view = view[written:]
+            size = -1
+            if self.verify_mode in ("size", "hash"):
+                self._count()
+                size = os.fstat(fd).st_size
+            if self.fsync_mode != "none" and not defer_sync:
+                self._count()
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+        return data, (hasher.hexdigest() if hasher is not None else None), size
+    def _verify_written(self, path: str, data: memoryview, size: int) -> Tuple[bool, str]:
+        """按当前验证策略检查刚写入的文件"""
+        if self.verify_mode == "none":
+            return True, "未启用验证"
+        if self.verify_mode in ("size", "hash"):
+            if size != data.nbytes:
+                return False, f"内容长度不匹配: 期望{data.nbytes}, 实际{size}"
+            return True, "大小验证通过"
+        return self._verify_file_content(path, data)
+    def _verify_file_content(self, file_path: str, expected_content: Content) -> tuple[bool, str]:
+        """验证文件内容是否与期望一致（按字节比较）"""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
+            if isinstance(expected_content, str):
+                expected_content = expected_content.encode("utf-8")
+            self._count(3)   # open + read + close
+            with open(file_path, "rb") as f:
                 actual_content = f.read()
             if actual_content != expected_content:
                 if len(expected_content) != len(actual_content):
@@ -0,0 +1,150 @@
+"""
+增量解析器：在 LLM 回复仍在流式到达时识别已闭合的任务块
+"""
+import re
+from typing import List, Optional
+
+_OUTSIDE = 0        # 围栏之外，寻找分隔符或围栏起始
+_FENCE_HEADER = 1   # 已遇到 ```，等待语言标识行结束
+_IN_FENCE = 2       # 围栏之内，寻找行首的 ``` 结束标记或任务硬边界
+
+
+class IncrementalContentParser:
+    """
+    ContentParser.split_content 的增量版本
+    1. 逐段接收文本（feed），每当一个以 ------ 分隔的任务块闭合时立即返回该块
+    2. 位于 ``` 代码围栏内部的 ------ 不会被视为分隔符；围栏的闭合规则（反引号数量、嵌套的 ```lang 块、
+       不跨越 ------ + Step/Action: 硬边界）与 TaskTokenizer 一致
+    3. 每个字符只被扫描常数次，整体复杂度与输入长度成线性关系
+    """
+
+    SEPARATOR = "------"
+    FENCE = "```"
+    _outside_pattern = re.compile(r"------|```")
+    _backticks_pattern = re.compile(r"`+")
+    # 围栏内的完整行：行首 ``` 行（info 为空时是结束行），或硬边界（与 TaskTokenizer 相同）
+    _fence_event_pattern = re.compile(
+        r"\n(?:(?P<ticks>`{3,})(?P<info>[^\n]*)\n"
+        r"|(?P<boundary>-{6,}[^\S\n]*\n(?=(?:(?![^\S\n]*`)[^\n]*\n){0,5}?[^\S\n]*(?:Step|Action:))))")
+    # 窗口末尾可能随后续输入发展为上述事件的部分，留待下一段输入
+    _pending_pattern = re.compile(
+        r"\n(?:`[^\n]*|-*[^\S\n]*|-{6,}[^\S\n]*\n(?:(?![^\S\n]*`)[^\n]*\n){0,5}[^\n]*)\Z")
+
+    def __init__(self):
+        self._parts: List[str] = []   # 当前未闭合块的全部文本片段
+        self._window = ""             # 尚未确定归属的文本（自 _scan_pos 起）
+        self._scan_pos = 0            # _window 在当前未闭合块中的起始位置
+        self._state = _OUTSIDE
+        self._resume = 0              # 下次扫描在 _window 中的起始位置
+        self._ticks = 3               # 当前围栏开始行的反引号数量
+        self._nested: List[int] = []  # 围栏内未闭合的嵌套块（各自的反引号数量）
+        # 嵌套不平衡时最后一个可作为结束行的位置（_window 中）；遇到硬边界时围栏在此结束，
+        # 其后的文本按围栏之外重新扫描（与 TaskTokenizer 的退回规则一致）
+        self._fallback: Optional[int] = None
+
+    @property
+    def in_fence(self) -> bool:
+        """当前是否处于未闭合的代码围栏内"""
+        return self._state != _OUTSIDE
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        追加一段文本
+        Returns:
+            本次输入后新闭合的任务块（已 strip，空块被丢弃）
+        """
+        if not chunk:
+            return []
+        self._parts.append(chunk)
+        self._window += chunk
+        return self._scan()
+
+    def close(self) -> List[str]:
+        """
+        结束输入，返回剩余的任务块并重置解析器
+        剩余文本中的围栏若始终未闭合，按 ContentParser.split_content 的规则拆分
+        """
+        from codefileexecutorlib.core.parser import ContentParser
+        text = "".join(self._parts)
+        self._parts = []
+        self._window = ""
+        self._scan_pos = 0
+        self._resume = 0
+        self._state = _OUTSIDE
+        self._nested = []
+        self._fallback = None
+        return ContentParser.split_content(text)
+
+    def _scan(self) -> List[str]:
+        blocks = []
+        text = None     # 仅在产出块时拼接一次当前文本
+        cut = 0         # 当前未闭合块在 text 中的起始位置
+        window = self._window
+        base = self._scan_pos
+        pos = self._resume
+        while True:
+            if self._state == _OUTSIDE:
+                match = self._outside_pattern.search(window, pos)
+                if match is None:
+                    # 末尾可能是分隔符/围栏的前缀，留待下一段输入
+                    pos = max(pos, len(window) - (len(self.SEPARATOR) - 1))
+                    break
+                if match.group() == self.FENCE:
+                    # 保留开始行，以便在行结束后统计反引号数量
+                    self._state = _FENCE_HEADER
+                    pos = match.start()
+                    continue
+                if text is None:
+                    text = "".join(self._parts)
+                block = text[cut:base + match.start()].strip()
+                if block:
+                    blocks.append(block)
+                cut = base + match.end()
+                pos = match.end()
+            elif self._state == _FENCE_HEADER:
+                newline = window.find("\n", pos)
+                if newline == -1:
+                    break   # 保留开始行
+                # 从换行符本身开始查找结束围栏，以便识别紧随其后的结束行
+                self._ticks = len(self._backticks_pattern.match(window, pos).group())
+                self._nested = []
+                self._fallback = None
+                self._state = _IN_FENCE
+                pos = newline
+            else:
+                event = self._fence_event_pattern.search(window, pos)
+                if event is None:
+                    # 仅当末尾可能发展为结束行或硬边界时才保留，其余文本无需再次扫描
+                    pending = self._pending_pattern.search(window, pos)
+                    pos = pending.start() if pending else len(window)
+                    break
+                if event.group("boundary") is not None:
+                    # 围栏未闭合：在边界处（或退回的结束行处）结束，由 _OUTSIDE 状态处理其后的分隔符
+                    self._state = _OUTSIDE
+                    pos = event.start() if self._fallback is None else self._fallback
+                    self._fallback = None
+                    continue
+                # 保留行末尾的换行符，使其后的内容从新行开始扫描
+                pos = event.end() - 1
+                run = len(event.group("ticks"))
+                if event.group("info").strip():
+                    if "`" not in event.group("info"):
+                        self._nested.append(run)
+                elif self._nested:
+                    if run >= self._nested[-1]:
+                        self._nested.pop()
+                    if run >= self._ticks:
+                        self._fallback = pos
+                elif run >= self._ticks:
+                    self._state = _OUTSIDE
+                    self._fallback = None
+        keep = pos if self._fallback is None else min(pos, self._fallback)
+        self._window = window[keep:]
+        self._resume = pos - keep
+        if self._fallback is not None:
+            self._fallback -= keep
+        self._scan_pos = base + keep - cut
+        if text is not None:
+            rest = text[cut:]
+            self._parts = [rest] if rest else []
+        return blocks
@@ -0,0 +1,95 @@
+"""
+批次优化：在执行前合并同一批次中互相覆盖的冗余操作
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# 被合并的原因
+SUPERSEDED = "superseded"   # 同一文件随后被再次写入或删除
+DELETED = "deleted"         # 所在目录（或自身）随后被删除
+DUPLICATE = "duplicate"     # 重复创建同一目录
+
+_WRITE_ACTIONS = ("create file", "update file")
+_FILE_ACTIONS = ("create file", "update file", "delete file")
+_PATCH_ACTION = "patch file"
+
+
+class TaskCoalescer:
+    """
+    冗余操作合并
+    1. 同一文件的多次写入只保留最后一次（其后被删除的文件则一次也不写入）；
+       Patch file 会被之后的写入或删除覆盖，但它读取此前写入的内容，因此不会使更早的写入失效
+    2. 其后会被 Delete folder 删除的目录中的所有操作直接丢弃
+    3. 重复的 Create folder 只保留第一次（中间被删除的除外）
+    创建类操作会顺带创建缺失的上级目录，为保持这一副作用，被丢弃的创建类操作需要改为
+    确保某个目录存在（见 coalesce 的返回值）
+    依据只有操作类型与路径，不读取磁盘；被保留的操作执行失败时，最终状态可能与逐条执行不同
+    """
+
+    @staticmethod
+    def _path_key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    @staticmethod
+    def _ancestors_and_self(key: str) -> List[str]:
+        parts = key.split(os.sep)
+        return [os.sep.join(parts[:i]) for i in range(1, len(parts))] + [key]
+
+    @staticmethod
+    def coalesce(operations: List[Tuple[str, str]]) -> Dict[int, Tuple[str, int, Optional[str]]]:
+        """
+        计算可以省略的操作
+        Args:
+            operations: 按执行顺序排列的 (操作类型, 完整路径)，操作类型为小写
+        Returns:
+            被省略操作的下标 -> (原因, 使其失效的操作下标, 仍需在原位置确保存在的目录或 None)
+        """
+        keys = [TaskCoalescer._path_key(path) for _, path in operations]
+        elided: Dict[int, Tuple[str, int, Optional[str]]] = {}
+
+        # 反向扫描：已知之后的写入/删除，判断较早的写入是否被覆盖
+        later_file_op: Dict[str, int] = {}
+        later_deleted_dir: Dict[str, int] = {}
+        for idx in range(len(operations) - 1, -1, -1):
+            action, key = operations[idx][0], keys[idx]
+            creates = action in _WRITE_ACTIONS or action == "create folder"
+            deleted_by: Optional[int] = None
+            if later_deleted_dir:
+                for candidate in TaskCoalescer._ancestors_and_self(key):
+                    if candidate in later_deleted_dir:
+                        deleted_by = later_deleted_dir[candidate]
+                        break
+            if deleted_by is not None:
+                # 被删除目录之外的上级目录仍会由该操作创建
+                ensure_dir = os.path.dirname(operations[deleted_by][1]) if creates else None
+                elided[idx] = (DELETED, deleted_by, ensure_dir)
+                continue
+            if (action in _WRITE_ACTIONS or action == _PATCH_ACTION) and key in later_file_op:
+                by = later_file_op[key]
+                # 之后的写入会自行创建上级目录；之后是删除时仍需创建（补丁本身不创建目录）
+                recreate = operations[by][0] == "delete file" and action != _PATCH_ACTION
+                ensure_dir = os.path.dirname(operations[idx][1]) if recreate else None
+                elided[idx] = (SUPERSEDED, by, ensure_dir)
+                continue
+            if action in _FILE_ACTIONS:
+                later_file_op[key] = idx
+            elif action == "delete folder":
+                later_deleted_dir[key] = idx
+
+        # 正向扫描：去除重复的目录创建
+        created: Dict[str, int] = {}
+        for idx, (action, _) in enumerate(operations):
+            if idx in elided:
+                continue
+            key = keys[idx]
+            if action == "create folder":
+                if key in created:
+                    elided[idx] = (DUPLICATE, created[key], None)
+                else:
+                    created[key] = idx
+            elif action == "delete folder":
+                prefix = key if key.endswith(os.sep) else key + os.sep
+                created = {k: v for k, v in created.items() if k != key and not k.startswith(prefix)}
+            elif action == "delete file":
+                created.pop(key, None)
+        return elided
@@ -1,38 +1,38 @@
 import re
 from typing import List, Tuple
 class ContentParser:
+    _critical_patterns = ['Task<', 'List<', 'Dictionary<', 'IEnumerable<']
+    _critical_regex = re.compile("|".join(re.escape(p) for p in _critical_patterns))
+    _critical_regex_bytes = re.compile("|".join(re.escape(p) for p in _critical_patterns).encode("ascii"))
     @staticmethod
     def split_content(content: str) -> List[str]:
-        blocks = [b.strip() for b in content.split('------') if b.strip()]
-        return blocks
+        """按 ------ 拆分任务块，代码围栏内部的 ------ 不视为分隔符"""
+        from codefileexecutorlib.core.tokenizer import TaskTokenizer
+        return [content[start:end] for start, end in TaskTokenizer.split_spans(content)]
+    @staticmethod
+    def parse_content(content) -> list:
+        """
+        单遍扫描完整指令文本，直接得到 TaskModel 列表（偏移量相对于 content）
+        content 为 UTF-8 bytes 时进入零拷贝模式：任务内容以缓冲区偏移量携带，不再切片复制
+        """
+        from codefileexecutorlib.core.tokenizer import TaskTokenizer
+        return TaskTokenizer.tokenize(content)
     @staticmethod
     def parse_task_block(block: str):
+        """将单个任务块解析为 TaskModel（偏移量相对于 block）"""
+        from codefileexecutorlib.core.tokenizer import TaskTokenizer
+        tasks = TaskTokenizer.tokenize(block, split=False)
+        if tasks:
+            return tasks[0]
         from codefileexecutorlib.models.task_model import TaskModel
-        lines = block.splitlines()
-        valid, step_line, action_line, file_path_line = ContentParser.validate_task_structure(lines)
-        if not valid:
-            return TaskModel(
-                step_line="",
-                action="",
-                file_path="",
-                content="",
-                is_valid=False,
-                error_message="无效任务块",
-                code_block_count=0
-            )
-        action = action_line.replace("Action:", "").strip()
-        file_path = file_path_line.replace("File Path:", "").strip()
-        raw_code_blocks, code_block_count = ContentParser.extract_code_blocks_by_string_parsing(block)
-        selected_code = ""
-        if raw_code_blocks:
-            selected_code = raw_code_blocks[0] if len(raw_code_blocks) == 1 else max(raw_code_blocks, key=len)
         return TaskModel(
-            step_line=step_line,
-            action=action,
-            file_path=file_path,
-            content=selected_code,
-            is_valid=True,
-            code_block_count=code_block_count
+            step_line="",
+            action="",
+            file_path="",
+            content="",
+            is_valid=False,
+            error_message="无效任务块",
+            code_block_count=0
         )
     @staticmethod
     def extract_code_blocks_by_string_parsing(content: str) -> Tuple[List[str], int]:
@@ -93,10 +93,47 @@ class ContentParser:
     def verify_extracted_content(original_block: str, content: str) -> Tuple[bool, str]:
         if not content:
             return False, "提取的代码为空"
-        critical_patterns = ['Task<', 'List<', 'Dictionary<', 'IEnumerable<']
-        for pattern in critical_patterns:
-            original_count = original_block.count(pattern)
-            extracted_count = content.count(pattern)
+        original_counts = ContentParser._count_critical_patterns(original_block, 0, len(original_block))
+        extracted_counts = ContentParser._count_critical_patterns(content, 0, len(content))
+        return ContentParser._compare_critical_counts(original_counts, extracted_counts)
+    @staticmethod
+    def verify_task_content(source: str, task) -> Tuple[bool, str]:
+        """
+        基于偏移量验证任务内容，只扫描一次任务块
+        Args:
+            source: 解析 task 时使用的原始文本（零拷贝模式下为 UTF-8 bytes）
+            task: 携带 block_span / content_span 的 TaskModel
+        """
+        if task.is_zero_copy:
+            if task.content_size == 0:
+                return False, "提取的代码为空"
+        elif not task.content:
+            return False, "提取的代码为空"
+        if task.block_span is None or task.content_span is None:
+            block = source[task.block_span[0]:task.block_span[1]] if task.block_span else source
+            return ContentParser.verify_extracted_content(block, task.content)
+        original_counts = dict.fromkeys(ContentParser._critical_patterns, 0)
+        extracted_counts = dict.fromkeys(ContentParser._critical_patterns, 0)
+        code_start, code_end = task.content_span
+        zero_copy = isinstance(source, bytes)
+        regex = ContentParser._critical_regex_bytes if zero_copy else ContentParser._critical_regex
+        for match in regex.finditer(source, task.block_span[0], task.block_span[1]):
+            pattern = match.group().decode("ascii") if zero_copy else match.group()
+            original_counts[pattern] += 1
+            if code_start <= match.start() and match.end() <= code_end:
+                extracted_counts[pattern] += 1
+        return ContentParser._compare_critical_counts(original_counts, extracted_counts)
+    @staticmethod
+    def _count_critical_patterns(text: str, start: int, end: int) -> dict:
+        counts = dict.fromkeys(ContentParser._critical_patterns, 0)
+        for match in ContentParser._critical_regex.finditer(text, start, end):
+            counts[match.group()] += 1
+        return counts
+    @staticmethod
+    def _compare_critical_counts(original_counts: dict, extracted_counts: dict) -> Tuple[bool, str]:
+        for pattern in ContentParser._critical_patterns:
+            original_count = original_counts[pattern]
+            extracted_count = extracted_counts[pattern]
             if original_count > 0 and extracted_count == 0:
                 return False, f"关键泛型模式丢失: {pattern}"
             elif original_count != extracted_count:
@@ -0,0 +1,258 @@
+"""
+补丁应用：Patch file 操作的代码块可以是统一 diff（@@ 块）或 SEARCH/REPLACE 块
+按行匹配目标文件，容忍行号偏移、少量上下文差异（fuzz）与行尾空白差异，无法匹配时抛出 PatchConflictException
+"""
+import re
+from typing import List, Optional, Tuple
+
+from codefileexecutorlib.exceptions.custom_exceptions import InvalidTaskFormatException, PatchConflictException
+
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SEARCH = re.compile(r"<{5,9} ?SEARCH\s*$")
+_DIVIDER = re.compile(r"={5,9}\s*$")
+_REPLACE = re.compile(r">{5,9} ?REPLACE\s*$")
+
+UNIFIED = "unified"
+SEARCH_REPLACE = "search_replace"
+
+
+class Hunk:
+    """
+    一个补丁块
+    ops 为 (标记, 行文本)：" " 上下文、"-" 删除、"+" 新增；SEARCH/REPLACE 块只有 "-" 与 "+"
+    start 为期望的起始行（0 起），SEARCH/REPLACE 块为 None（从文件开头查找第一处匹配）
+    """
+    __slots__ = ("ops", "start", "header", "old_no_eol", "new_no_eol")
+
+    def __init__(self, start: Optional[int], header: str):
+        self.ops: List[Tuple[str, str]] = []
+        self.start = start
+        self.header = header
+        self.old_no_eol = False
+        self.new_no_eol = False
+
+    @property
+    def has_changes(self) -> bool:
+        return any(tag != " " for tag, _ in self.ops)
+
+    def context(self) -> Tuple[int, int]:
+        """首尾连续的上下文行数（fuzz 只裁剪这部分）"""
+        lead = 0
+        while lead < len(self.ops) and self.ops[lead][0] == " ":
+            lead += 1
+        trail = 0
+        while trail < len(self.ops) - lead and self.ops[len(self.ops) - 1 - trail][0] == " ":
+            trail += 1
+        return lead, trail
+
+
+class Patcher:
+    # 默认最多裁剪的首尾上下文行数（与 GNU patch 的 --fuzz 默认值一致）
+    FUZZ = 2
+
+    @staticmethod
+    def detect_format(patch: str) -> Optional[str]:
+        """识别补丁格式：search_replace / unified，无法识别时返回 None"""
+        lines = patch.split("\n")
+        if any(_SEARCH.match(line) for line in lines):
+            return SEARCH_REPLACE
+        if any(_HUNK_HEADER.match(line) for line in lines):
+            return UNIFIED
+        return None
+
+    @staticmethod
+    def parse(patch: str) -> Tuple[str, List[Hunk]]:
+        """
+        解析补丁文本
+        Returns:
+            (格式, 补丁块列表)
+        Raises:
+            InvalidTaskFormatException: 格式无法识别、块不完整或不含任何改动
+        """
+        patch_format = Patcher.detect_format(patch)
+        lines = [line[:-1] if line.endswith("\r") else line for line in patch.split("\n")]
+        if patch_format == SEARCH_REPLACE:
+            hunks = Patcher._parse_search_replace(lines)
+        elif patch_format == UNIFIED:
+            hunks = Patcher._parse_unified(lines)
+        else:
+            raise InvalidTaskFormatException("无法识别补丁格式：需要统一 diff（@@ 块）或 SEARCH/REPLACE 块")
+        hunks = [hunk for hunk in hunks if hunk.has_changes]
+        if not hunks:
+            raise InvalidTaskFormatException("补丁中没有任何改动")
+        return patch_format, hunks
+
+    @staticmethod
+    def _parse_unified(lines: List[str]) -> List[Hunk]:
+        hunks: List[Hunk] = []
+        hunk: Optional[Hunk] = None
+        seen_file_header = False
+        for idx, line in enumerate(lines):
+            header = _HUNK_HEADER.match(line)
+            if header:
+                old_start, old_count = int(header.group(1)), header.group(2)
+                # 行号从 1 起；旧行数为 0 时表示插入到该行之后
+                start = old_start if old_count == "0" else max(old_start - 1, 0)
+                hunk = Hunk(start, line.strip())
+                hunks.append(hunk)
+                continue
+            if line.startswith("--- ") and idx + 1 < len(lines) and lines[idx + 1].startswith("+++ "):
+                if seen_file_header and hunks:
+                    raise InvalidTaskFormatException("补丁包含多个文件，Patch file 每个任务只能修改一个文件")
+                seen_file_header = True
+                hunk = None
+                continue
+            if hunk is None:
+                continue   # diff --git、index、+++ 等文件头
+            if line.startswith("\\"):
+                # "\ No newline at end of file" 作用于上一行
+                if hunk.ops:
+                    tag = hunk.ops[-1][0]
+                    if tag in (" ", "-"):
+                        hunk.old_no_eol = True
+                    if tag in (" ", "+"):
+                        hunk.new_no_eol = True
+                continue
+            if line == "":
+                hunk.ops.append((" ", ""))   # 被编辑器去掉了前导空格的空上下文行
+            elif line[0] in " -+":
+                hunk.ops.append((line[0], line[1:]))
+            else:
+                hunk = None   # 块后的说明文字
+        for hunk in hunks:
+            # 末尾的裸空行多为块之间或补丁结尾的空白，去掉只会减少上下文
+            while hunk.ops and hunk.ops[-1] == (" ", ""):
+                hunk.ops.pop()
+        return hunks
+
+    @staticmethod
+    def _parse_search_replace(lines: List[str]) -> List[Hunk]:
+        hunks: List[Hunk] = []
+        search: Optional[List[str]] = None
+        replace: Optional[List[str]] = None
+        for line in lines:
+            if search is None:
+                if _SEARCH.match(line):
+                    search = []
+            elif replace is None:
+                if _DIVIDER.match(line):
+                    replace = []
+                else:
+                    search.append(line)
+            elif _REPLACE.match(line):
+                hunk = Hunk(None, f"SEARCH/REPLACE #{len(hunks) + 1}")
+                hunk.ops = [("-", text) for text in search] + [("+", text) for text in replace]
+                hunks.append(hunk)
+                search = replace = None
+            else:
+                replace.append(line)
+        if search is not None:
+            raise InvalidTaskFormatException(f"第{len(hunks) + 1}个 SEARCH/REPLACE 块不完整")
+        return hunks
+
+    @staticmethod
+    def apply(original: str, patch: str, fuzz: int = FUZZ) -> str:
+        """
+        把补丁应用到原文本
+        统一 diff 的各块按顺序在期望位置附近查找（偏移量向后累积），找不到时依次裁剪最多 fuzz 行
+        首尾上下文再试（每侧至少保留一行）；每一级都先精确比较，再忽略行尾空白比较
+        SEARCH/REPLACE 块依次作用于上一块的结果，替换第一处匹配；SEARCH 为空时追加到文件末尾
+        保留原文件的换行符风格（LF/CRLF）与结尾换行
+        Raises:
+            InvalidTaskFormatException: 补丁格式无效
+            PatchConflictException: 某个块无法在文件中定位
+        """
+        patch_format, hunks = Patcher.parse(patch)
+        eol_cr = "\r\n" in original[:original.find("\n") + 1] if "\n" in original else False
+        lines = original.split("\n") if original else []
+        final_newline = not original or original.endswith("\n")
+        if original.endswith("\n"):
+            lines.pop()
+
+        offset = 0   # 前面各块造成的行号偏移
+        floor = 0    # 统一 diff 的块不得与前一块重叠
+        for number, hunk in enumerate(hunks, 1):
+            if patch_format == SEARCH_REPLACE:
+                appending = all(tag == "+" for tag, _ in hunk.ops)
+                pos, ops, cut = Patcher._locate(lines, hunk, len(lines) if appending else 0, 0, 0)
+                if pos is None:
+                    raise PatchConflictException(f"第{number}个 SEARCH 块在文件中找不到匹配内容")
+            else:
+                pos, ops, cut = Patcher._locate(lines, hunk, hunk.start + offset, floor, fuzz)
+                if pos is None:
+                    raise PatchConflictException(
+                        f"第{number}个补丁块无法匹配（{hunk.header}，期望位置第{hunk.start + offset + 1}行）")
+            replacement = Patcher._replacement(lines, pos, ops, eol_cr)
+            removed = sum(1 for tag, _ in ops if tag != "+")
+            lines[pos:pos + removed] = replacement
+            floor = pos + len(replacement)
+            if hunk.start is not None:
+                # 原文件中紧随该块的行现在位于 floor
+                offset = floor - (hunk.start + cut + removed)
+            if floor >= len(lines):
+                # 块到达文件末尾时按 "\ No newline at end of file" 标记决定结尾换行
+                if hunk.new_no_eol:
+                    final_newline = False
+                elif hunk.old_no_eol:
+                    final_newline = True
+        if not lines:
+            return ""
+        return "\n".join(lines) + ("\n" if final_newline else "")
+
+    @staticmethod
+    def _locate(lines: List[str], hunk: Hunk, expected: int, floor: int,
+                fuzz: int) -> Tuple[Optional[int], List[Tuple[str, str]], int]:
+        """
+        定位补丁块
+        Returns:
+            (匹配的起始行或 None, 实际使用的（可能被裁剪上下文的）ops, 裁剪掉的开头上下文行数)
+        """
+        lead, trail = hunk.context()
+        tried = set()
+        for level in range(fuzz + 1):
+            # 与 GNU patch 一样，每侧至少保留一行上下文
+            cut_lead, cut_trail = min(level, max(lead - 1, 0)), min(level, max(trail - 1, 0))
+            if (cut_lead, cut_trail) in tried:
+                continue
+            ops = hunk.ops[cut_lead:len(hunk.ops) - cut_trail]
+            old = [text for tag, text in ops if tag != "+"]
+            tried.add((cut_lead, cut_trail))
+            for loose in (False, True):
+                pos = Patcher._find(lines, old, expected + cut_lead, floor, loose)
+                if pos is not None:
+                    return pos, ops, cut_lead
+        return None, hunk.ops, 0
+
+    @staticmethod
+    def _find(lines: List[str], old: List[str], expected: int, floor: int, loose: bool) -> Optional[int]:
+        """从期望位置开始向两侧交替查找 old 出现的位置"""
+        last = len(lines) - len(old)
+        if last < floor:
+            return None
+        expected = min(max(expected, floor), last)
+        if not old:
+            return expected
+        strip = (lambda text: text.rstrip()) if loose else (lambda text: text[:-1] if text.endswith("\r") else text)
+        target = [strip(text) for text in old] if loose else old
+        first = target[0]
+        for distance in range(max(expected - floor, last - expected) + 1):
+            for pos in (expected + distance, expected - distance) if distance else (expected,):
+                if floor <= pos <= last and strip(lines[pos]) == first and \
+                        all(strip(lines[pos + i]) == target[i] for i in range(1, len(target))):
+                    return pos
+        return None
+
+    @staticmethod
+    def _replacement(lines: List[str], pos: int, ops: List[Tuple[str, str]], eol_cr: bool) -> List[str]:
+        """生成替换行：上下文行保留文件中的原文，新增行按文件的换行符风格补 \\r"""
+        result = []
+        cursor = pos
+        for tag, text in ops:
+            if tag == " ":
+                result.append(lines[cursor])
+                cursor += 1
+            elif tag == "-":
+                cursor += 1
+            else:
+                result.append(text + "\r" if eol_cr else text)
+        return result
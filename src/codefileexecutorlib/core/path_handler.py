@@ -1,41 +1,100 @@
 import os
 import re
+from typing import Dict, Iterable, List, Tuple
+
+_DRIVE_PATTERN = re.compile(r"[a-zA-Z]:\\")
+# 不能直接拼接到父目录后的末级名称，交给 normpath 处理
+_SPECIAL_NAMES = ("", os.curdir, os.pardir)
+
 
 class PathHandler:
+    """
+    任务路径解析与安全校验
+    根目录的绝对路径在构造时计算一次；resolve 按父目录缓存解析结果与是否位于根目录内，
+    同一目录下的后续文件只需拼接文件名。根目录校验按路径组件比较，/root2 不会被当作 /root 的子路径
+    """
+
+    # 父目录缓存的条目上限，超过时清空重建
+    DIR_CACHE_SIZE = 4096
+
     def __init__(self, root_dir: str):
         self.root_dir = root_dir
         self.os_type = self._detect_os_type()
+        self._foreign_sep = "/" if self.os_type == "windows" else "\\"
+        self._sep = "\\" if self.os_type == "windows" else "/"
+        root = os.path.normcase(os.path.abspath(root_dir))
+        self._root = root
+        self._root_prefix = root if root.endswith(os.sep) else root + os.sep
+        # 父目录（分隔符已统一）-> (规整后的目录, 是否位于根目录内)
+        self._dirs: Dict[str, Tuple[str, bool]] = {}
 
     def normalize_path(self, path: str) -> str:
-        if self.os_type == "windows":
-            path = path.replace("/", "\\")
-        else:
-            path = path.replace("\\", "/")
-        path = os.path.normpath(path)
-        return path
+        return os.path.normpath(path.replace(self._foreign_sep, self._sep))
 
     def is_absolute_path(self, path: str) -> bool:
         if self.os_type == "windows":
-            return bool(re.match(r"^[a-zA-Z]:\\", path)) or path.startswith("\\")
+            return bool(_DRIVE_PATTERN.match(path)) or path.startswith("\\")
         else:
             return path.startswith("/")
 
     def get_full_path(self, relative_path: str) -> str:
+        return self.resolve(relative_path)[0]
+
+    def validate_path_security(self, path: str) -> bool:
+        # 防止路径遍历攻击和根目录越界
+        return self._contains(os.path.abspath(path))
+
+    def resolve(self, path: str) -> Tuple[str, bool]:
+        """
+        解析任务路径
+        Returns:
+            (完整路径, 是否位于根目录内)，分别与 get_full_path 及对其结果调用 validate_path_security 一致
+        """
+        rel = path.replace(self._foreign_sep, self._sep)
+        if self._sep == os.sep == "/":
+            # 与 posixpath.split 相同，但省去函数调用开销
+            head, found, tail = rel.rpartition("/")
+            if found:
+                head = head.rstrip("/") or head + "/"
+        else:
+            head, tail = os.path.split(rel)
+        if tail in _SPECIAL_NAMES or ":" in tail or (not head and self.is_absolute_path(tail)):
+            full_path = self._full_path(path)
+            return full_path, self.validate_path_security(full_path)
+        resolved = self._dirs.get(head)
+        if resolved is None:
+            if len(self._dirs) >= self.DIR_CACHE_SIZE:
+                self._dirs.clear()
+            directory = self._full_path(head)
+            resolved = self._dirs[head] = (directory, self.validate_path_security(directory))
+        directory, inside = resolved
+        # 根目录为 "." 等相对路径时 normpath 可能得到 "."，与 normpath(join(...)) 的结果保持一致
+        if directory == os.curdir:
+            full_path = tail
+        else:
+            full_path = directory + tail if directory.endswith(os.sep) else directory + os.sep + tail
+        # 位于根目录内的目录，其下的文件也在根目录内；目录在根目录外时文件仍可能恰好是根目录本身
+        return full_path, inside or self.validate_path_security(full_path)
+
+    def resolve_many(self, paths: Iterable[str]) -> List[Tuple[str, bool]]:
+        """批量解析，同一目录下的路径共用一次目录解析"""
+        resolve = self.resolve
+        return [resolve(path) for path in paths]
+
+    def _full_path(self, relative_path: str) -> str:
         rel = self.normalize_path(relative_path)
         if self.is_absolute_path(rel):
             return rel
         return os.path.normpath(os.path.join(self.root_dir, rel))
 
-    def validate_path_security(self, path: str) -> bool:
-        # 防止路径遍历攻击和根目录越界
-        abs_path = os.path.abspath(path)
-        root_abs = os.path.abspath(self.root_dir)
-        return abs_path.startswith(root_abs)
+    def _contains(self, abs_path: str) -> bool:
+        abs_path = os.path.normcase(abs_path)
+        return abs_path == self._root or abs_path.startswith(self._root_prefix)
 
     def _detect_os_type(self) -> str:
         win = False
-        if re.match(r"^[a-zA-Z]:\\", self.root_dir) or "\\" in self.root_dir:
+        if _DRIVE_PATTERN.match(self.root_dir) or "\\" in self.root_dir:
             win = True
         if not win and (self.root_dir.startswith("/") or "/" in self.root_dir):
             return "unix"
-        return "windows" if win else "unix"
\ No newline at end of file
+        return "windows" if win else "unix"
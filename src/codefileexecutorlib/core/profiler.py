@@ -0,0 +1,158 @@
+"""
+分阶段计时：记录批次中各阶段（预处理、解析、校验、备份、写入、验证等）的耗时，并通知外部钩子
+"""
+import threading
+import time
+from typing import Dict, Generator, Iterable, List, Optional
+
+# 阶段名称
+#   preprocess - 输入预处理（剥离思索片段等）
+#   parse      - 拆分任务块并解析为任务（两者由分词器单遍完成，不再单独计时）
+#   validate   - 单个任务的内容、路径校验
+#   syntax     - 写入前的语法检查（syntax_check；进程池中检查时为等待结果的时间）
+#   compare    - 写入前与磁盘内容比较（skip_unchanged）
+#   patch      - 解析补丁并应用到原文件内容
+#   backup     - 备份原文件
+#   write      - 写入/删除文件或目录（事务模式下为写入暂存区）
+#   verify     - 写入后验证
+#   commit     - 提交事务
+#   log        - 批次结束前写出日志缓冲
+PHASES = ("preprocess", "parse", "validate", "syntax", "compare", "patch", "backup", "write", "verify", "commit", "log")
+
+
+class PhaseHooks:
+    """
+    阶段钩子：按需覆盖两个方法，即可把阶段转发给 OpenTelemetry 等追踪器或 cProfile 会话
+    backup/write/verify 等阶段在 max_workers > 1 时于工作线程中调用，实现需线程安全
+    """
+
+    def on_phase_start(self, phase: str, step: Optional[int]):
+        """阶段开始；step 为任务序号，批次级阶段为 None"""
+
+    def on_phase_end(self, phase: str, step: Optional[int], duration_ns: int):
+        """阶段结束；duration_ns 为该阶段的耗时（纳秒）"""
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "step", "start")
+
+    def __init__(self, timer: "PhaseTimer", name: str, step: Optional[int]):
+        self.timer = timer
+        self.name = name
+        self.step = step
+
+    def __enter__(self):
+        for hook in self.timer.hooks:
+            hook.on_phase_start(self.name, self.step)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.record(self.name, self.step, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class TaskScope:
+    """绑定任务序号的计时入口，传给 FileOperationHandler 等不知道任务序号的组件"""
+    __slots__ = ("timer", "step")
+
+    def __init__(self, timer: Optional["PhaseTimer"], step: Optional[int]):
+        self.timer = timer
+        self.step = step
+
+    def phase(self, name: str):
+        if self.timer is None:
+            return _NULL_PHASE
+        return _Phase(self.timer, name, self.step)
+
+
+# 未启用计时时使用，phase() 返回共享的空上下文
+NULL_SCOPE = TaskScope(None, None)
+
+
+class PhaseTimer:
+    """
+    一个批次的阶段计时器
+    1. phase(name, step) 作为上下文管理器计时；timed() 计时生成器，不计入两次 next 之间消费方的耗时
+    2. 可被多个工作线程同时使用
+    3. summary() 给出各阶段的次数、总耗时与 p50/p95/max（毫秒）
+    """
+
+    def __init__(self, hooks: Iterable[PhaseHooks] = ()):
+        self.hooks: List[PhaseHooks] = list(hooks)
+        self._samples: Dict[str, List[int]] = {}
+        self._tasks: Dict[int, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def phase(self, name: str, step: Optional[int] = None) -> _Phase:
+        return _Phase(self, name, step)
+
+    def scope(self, step: Optional[int]) -> TaskScope:
+        return TaskScope(self, step)
+
+    def record(self, name: str, step: Optional[int], duration_ns: int):
+        with self._lock:
+            self._samples.setdefault(name, []).append(duration_ns)
+            if step is not None:
+                phases = self._tasks.setdefault(step, {})
+                phases[name] = phases.get(name, 0) + duration_ns
+        for hook in self.hooks:
+            hook.on_phase_end(name, step, duration_ns)
+
+    def timed(self, gen: Generator, name: str, step: Optional[int] = None) -> Generator:
+        """转发生成器的输出并返回其结果，只累计生成器自身的执行时间"""
+        for hook in self.hooks:
+            hook.on_phase_start(name, step)
+        elapsed = 0
+        try:
+            while True:
+                start = time.perf_counter_ns()
+                try:
+                    event = next(gen)
+                except StopIteration as stop:
+                    elapsed += time.perf_counter_ns() - start
+                    return stop.value
+                elapsed += time.perf_counter_ns() - start
+                yield event
+        finally:
+            self.record(name, step, elapsed)
+
+    def task_timings(self, step: int) -> Dict[str, float]:
+        """单个任务各阶段的耗时（毫秒）"""
+        with self._lock:
+            phases = dict(self._tasks.get(step, {}))
+        return {name: round(ns / 1e6, 3) for name, ns in phases.items()}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+        result = {}
+        for name in sorted(samples, key=lambda n: PHASES.index(n) if n in PHASES else len(PHASES)):
+            values = samples[name]
+            result[name] = {
+                "count": len(values),
+                "total_ms": round(sum(values) / 1e6, 3),
+                "p50_ms": round(self._percentile(values, 50) / 1e6, 3),
+                "p95_ms": round(self._percentile(values, 95) / 1e6, 3),
+                "max_ms": round(values[-1] / 1e6, 3),
+            }
+        return result
+
+    @staticmethod
+    def _percentile(values: List[int], percent: int) -> int:
+        """最近秩法；values 已排序且非空"""
+        rank = max(1, -(-len(values) * percent // 100))
+        return values[rank - 1]
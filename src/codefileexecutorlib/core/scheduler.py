@@ -0,0 +1,91 @@
+"""
+任务调度器：根据路径依赖关系并行执行相互独立的任务
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class TaskScheduler:
+    """
+    依赖感知的并行调度器
+    1. 两个任务的路径相同、或一方是另一方的祖先目录时视为冲突，按原始顺序串行
+       （目录创建先于其子项，同一路径的操作保持顺序，删除目录对其子项形成屏障）
+    2. 互不冲突的任务在线程池中并行执行
+    3. 结果严格按任务原始顺序产出，保证流式输出的顺序与串行执行一致
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, max_workers)
+
+    @staticmethod
+    def _path_key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    @staticmethod
+    def build_dependencies(paths: List[str]) -> List[List[int]]:
+        """
+        构建依赖图
+        Args:
+            paths: 按执行顺序排列的任务目标路径
+        Returns:
+            每个任务需要等待的先前任务下标列表
+        """
+        last_at: Dict[str, int] = {}             # 路径 -> 最近一次作用于该路径的任务
+        pending_under: Dict[str, List[int]] = {}  # 目录 -> 此后作用于其子路径的任务
+        dependencies: List[List[int]] = []
+        for idx, path in enumerate(paths):
+            key = TaskScheduler._path_key(path)
+            parts = key.split(os.sep)
+            ancestors = [os.sep.join(parts[:i]) for i in range(1, len(parts))]
+            deps = set(pending_under.get(key, ()))
+            for candidate in ancestors + [key]:
+                prev = last_at.get(candidate)
+                if prev is not None:
+                    deps.add(prev)
+            dependencies.append(sorted(deps))
+            last_at[key] = idx
+            # 后续作用于该路径或其子路径的任务都会经由 last_at 依赖本任务，可清空
+            pending_under[key] = []
+            for ancestor in ancestors:
+                pending_under.setdefault(ancestor, []).append(idx)
+        return dependencies
+
+    def run(self, paths: List[str], func: Callable[[int], Any]) -> Iterator[Tuple[int, Any, Optional[BaseException]]]:
+        """
+        并行执行任务并按原始顺序产出结果
+        Args:
+            paths: 按执行顺序排列的任务目标路径
+            func: 接收任务下标并执行该任务的可调用对象
+        Yields:
+            (任务下标, 返回值, 异常)；执行出错时返回值为 None
+        """
+        total = len(paths)
+        dependencies = self.build_dependencies(paths)
+        dependents: List[List[int]] = [[] for _ in range(total)]
+        remaining = [len(deps) for deps in dependencies]
+        for idx, deps in enumerate(dependencies):
+            for dep in deps:
+                dependents[dep].append(idx)
+
+        results: Dict[int, Tuple[Any, Optional[BaseException]]] = {}
+        next_idx = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for idx in range(total):
+                if remaining[idx] == 0:
+                    futures[pool.submit(func, idx)] = idx
+            while next_idx < total:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = futures.pop(future)
+                    error = future.exception()
+                    results[idx] = (None if error else future.result(), error)
+                    for dependent in dependents[idx]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            futures[pool.submit(func, dependent)] = dependent
+                while next_idx in results:
+                    value, error = results.pop(next_idx)
+                    yield next_idx, value, error
+                    next_idx += 1
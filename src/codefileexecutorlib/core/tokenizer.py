@@ -0,0 +1,246 @@
+"""
+单遍任务分词器：一次线性扫描完成分块、头部字段识别与代码块定位
+"""
+import re
+from typing import Dict, List, Optional, Tuple, Union
+
+from codefileexecutorlib.models.task_model import TaskModel
+
+Span = Tuple[int, int]
+Source = Union[str, bytes]
+
+
+class _Syntax:
+    """分词所用的标记与正则，分别为 str 与 UTF-8 bytes 各编译一份"""
+
+    def __init__(self, text_type: type):
+        def convert(value: str):
+            return value if text_type is str else value.encode("ascii")
+        self.separator = convert("------")
+        self.newline = convert("\n")
+        self.backtick = convert("`")
+        self.outside_pattern = re.compile(convert(r"------|`{3,}"))
+        self.fence_pattern = re.compile(convert(r"`{3,}"))
+        # 围栏内的行首 ``` 行：info 为空时是结束行，否则是嵌套围栏的开始
+        self.fence_line_pattern = re.compile(convert(r"\n```(`*)([^\n]*)"))
+        # 硬边界：行首开始、仅含 ------ 的行，其后（至多隔 5 行非围栏文本）为 Step / Action: 头部，围栏不会跨越
+        self.separator_line = convert("\n------")
+        self.fence_line = convert("\n```")
+        self.boundary_pattern = re.compile(convert(
+            r"------+[^\S\n]*\n(?=(?:(?![^\S\n]*`)[^\n]*\n){0,5}?[^\S\n]*(?:Step|Action:))"))
+        self.header_pattern = re.compile(convert(r"[^\S\n]*(Step|Action:|File Path:)"))
+        self.non_space_pattern = re.compile(convert(r"\S"))
+        self.header_keys = {convert(key): key for key in ("Step", "Action:", "File Path:")}
+
+
+_SYNTAX = {str: _Syntax(str), bytes: _Syntax(bytes)}
+
+
+class _RawBlock:
+    """扫描得到的任务块（仅记录偏移量，不复制文本）"""
+    __slots__ = ("start", "end", "headers", "code_span", "code_count")
+
+    def __init__(self, start: int, end: int, headers: Dict[str, Span],
+                 code_span: Optional[Span], code_count: int):
+        self.start = start
+        self.end = end
+        self.headers = headers
+        self.code_span = code_span
+        self.code_count = code_count
+
+
+class TaskTokenizer:
+    """
+    基于状态机的单遍分词器
+    1. 围栏之外的 ------ 视为任务分隔符，围栏内部的 ------ 保持为代码内容
+    2. 围栏之外以 Step / Action: / File Path: 开头的行视为头部字段（同名字段以最后一次为准）
+    3. 代码块以 ``` 开始，以反引号数量不少于开始行、其余只含空白的行首 ``` 行结束；
+       围栏内带语言标识的 ```bash 行开始嵌套代码块，需先由对应的结束行闭合（如 README 中的示例代码），
+       结果以原始文本中的偏移量表示
+    4. 行首开始、仅含 ------ 且其后数行内为 Step / Action: 头部的行是硬边界，围栏不会跨越：
+       边界之前找不到配对的结束行时以最后一个结束行为准，没有结束行时代码在边界处结束，
+       单个残缺代码块不会吞掉其后的任务
+    代码区域通过正则直接跳过，每个字符只被检查常数次，整体为 O(n)
+
+    source 可以是 str，也可以是 UTF-8 编码的 bytes（零拷贝模式）：
+    后者只解码头部字段，代码内容以 TaskModel.buffer + content_span 的形式携带
+    """
+
+    @staticmethod
+    def tokenize(source: Source, split: bool = True) -> List[TaskModel]:
+        """
+        将完整指令文本解析为任务列表
+        Args:
+            source: 指令文本（str 或 UTF-8 bytes）
+            split: 是否按分隔符拆分；为 False 时整段文本视为一个任务块
+        Returns:
+            TaskModel 列表，block_span / content_span 为 source 中的偏移量
+        """
+        return [TaskTokenizer._build_task(source, raw) for raw in TaskTokenizer._scan(source, split)]
+
+    @staticmethod
+    def split_spans(source: Source) -> List[Span]:
+        """返回各个非空任务块（已去除首尾空白）在 source 中的偏移量"""
+        return [(raw.start, raw.end) for raw in TaskTokenizer._scan(source, True)]
+
+    @staticmethod
+    def _scan(source: Source, split: bool) -> List[_RawBlock]:
+        syntax = _SYNTAX[type(source)]
+        token_pattern = syntax.outside_pattern if split else syntax.fence_pattern
+        header_pattern = syntax.header_pattern
+        newline = syntax.newline
+        length = len(source)
+        boundary = -1   # 最近一次查到的硬边界（查询位置单调递增，结果可复用）
+        blocks: List[_RawBlock] = []
+        block_start = 0
+        headers: Dict[str, Span] = {}
+        code_span: Optional[Span] = None
+        code_count = 0
+        pos = 0
+        while pos <= length:
+            line_end = source.find(newline, pos)
+            if line_end == -1:
+                line_end = length
+            seg = pos
+            while True:
+                match = token_pattern.search(source, seg, line_end)
+                seg_end = match.start() if match else line_end
+                header = header_pattern.match(source, seg, seg_end)
+                if header:
+                    headers[syntax.header_keys[header.group(1)]] = (seg, seg_end)
+                if match is None:
+                    break
+                if match.group() == syntax.separator:
+                    TaskTokenizer._close_block(syntax, source, block_start, match.start(), headers,
+                                               code_span, code_count, blocks)
+                    block_start = seg = match.end()
+                    headers = {}
+                    code_span = None
+                    code_count = 0
+                    continue
+                # 进入代码围栏：语言标识行之后才是代码
+                header_end = source.find(newline, match.end())
+                if header_end == -1:
+                    line_end = length
+                    break
+                code_start = header_end + 1
+                if boundary <= header_end:
+                    boundary = TaskTokenizer._next_boundary(syntax, source, header_end) if split else length
+                limit = boundary
+                closing = TaskTokenizer._find_closing(syntax, source, header_end, limit, len(match.group()))
+                if closing is None:
+                    # 未闭合：代码在边界处结束，从边界继续扫描
+                    code_end = limit
+                    while code_end > code_start and source[code_end - 1:code_end].isspace():
+                        code_end -= 1
+                else:
+                    code_end = max(code_start, closing.start())
+                code_count += 1
+                if code_span is None or code_end - code_start > code_span[1] - code_span[0]:
+                    code_span = (code_start, code_end)
+                if closing is None:
+                    line_end = limit - 1 if limit < length else length
+                    break
+                seg = closing.end()
+                line_end = source.find(newline, seg)
+                if line_end == -1:
+                    line_end = length
+            pos = line_end + 1
+        TaskTokenizer._close_block(syntax, source, block_start, length, headers, code_span, code_count, blocks)
+        return blocks
+
+    @staticmethod
+    def _next_boundary(syntax: _Syntax, source: Source, pos: int) -> int:
+        """pos 之后第一个硬边界所在行的起始偏移量，没有时返回文本长度"""
+        # 字面量查找比正则扫描快得多，只在候选行上做完整匹配
+        find = source.find
+        while True:
+            pos = find(syntax.separator_line, pos)
+            if pos == -1:
+                return len(source)
+            pos += 1
+            if syntax.boundary_pattern.match(source, pos):
+                return pos
+
+    @staticmethod
+    def _find_closing(syntax: _Syntax, source: Source, start: int, limit: int, ticks: int):
+        """
+        在 [start, limit) 内查找围栏的结束行，嵌套的 ```lang 块需先闭合
+        嵌套始终不平衡时退回边界前最后一个结束行；均没有时返回 None
+        """
+        nested: List[int] = []
+        last = None
+        find = source.find
+        match = syntax.fence_line_pattern.match
+        pos = start
+        while True:
+            pos = find(syntax.fence_line, pos, limit)
+            if pos == -1:
+                return last
+            line = match(source, pos, limit)
+            pos += 4
+            run = 3 + len(line.group(1))
+            if line.group(2).strip():
+                # 带语言标识：嵌套围栏开始（行内出现反引号的不是围栏）
+                if syntax.backtick not in line.group(2):
+                    nested.append(run)
+                continue
+            if nested:
+                if run >= nested[-1]:
+                    nested.pop()
+                if run >= ticks:
+                    last = line
+                continue
+            if run >= ticks:
+                return line
+
+    @staticmethod
+    def _close_block(syntax: _Syntax, source: Source, start: int, end: int, headers: Dict[str, Span],
+                     code_span: Optional[Span], code_count: int, blocks: List[_RawBlock]):
+        first = syntax.non_space_pattern.search(source, start, end)
+        if first is None:
+            return
+        start = first.start()
+        while end > start and source[end - 1:end].isspace():
+            end -= 1
+        blocks.append(_RawBlock(start, end, headers, code_span, code_count))
+
+    @staticmethod
+    def _build_task(source: Source, raw: _RawBlock) -> TaskModel:
+        step_span = raw.headers.get("Step")
+        action_span = raw.headers.get("Action:")
+        path_span = raw.headers.get("File Path:")
+        if not (step_span and action_span and path_span):
+            return TaskModel(
+                step_line="",
+                action="",
+                file_path="",
+                content="",
+                is_valid=False,
+                error_message="无效任务块",
+                code_block_count=0,
+                block_span=(raw.start, raw.end),
+            )
+        zero_copy = isinstance(source, bytes)
+
+        def text(span: Span) -> str:
+            value = source[span[0]:span[1]]
+            return value.decode("utf-8") if zero_copy else value
+
+        step_line = text(step_span).strip()
+        action = text(action_span).strip().replace("Action:", "").strip()
+        file_path = text(path_span).strip().replace("File Path:", "").strip()
+        content = ""
+        if raw.code_span and not zero_copy:
+            content = source[raw.code_span[0]:raw.code_span[1]]
+        return TaskModel(
+            step_line=step_line,
+            action=action,
+            file_path=file_path,
+            content=content,
+            is_valid=True,
+            code_block_count=raw.code_count,
+            block_span=(raw.start, raw.end),
+            content_span=raw.code_span,
+            buffer=source if zero_copy else None,
+        )
@@ -0,0 +1,382 @@
+"""
+事务模式：先把整个批次暂存到根目录下的 .txn，全部成功后再以一轮重命名提交
+"""
+import datetime
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+from codefileexecutorlib.core.file_operations import Content, FileOperationHandler
+from codefileexecutorlib.core.profiler import NULL_SCOPE, TaskScope
+from codefileexecutorlib.exceptions.custom_exceptions import PatchConflictException
+from codefileexecutorlib.models.result_model import OperationResult
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_WRITE_ACTIONS = ("create file", "update file", "patch file")
+
+
+class Transaction:
+    """
+    一个批次的事务
+    1. add/write：按任务顺序登记操作，写入类操作的内容先写到 .txn/<id>/data/<序号>（可并行）
+    2. commit：写入状态为 committing 的日志后依次应用各操作——原文件/目录先重命名到
+       .txn/<id>/undo/<序号>，再把暂存文件重命名到目标路径；每完成一项追加一行到 applied.log
+    3. 任一步失败即按 applied.log 逆序撤销；进程崩溃时由下次的 recover 完成撤销
+    4. 提交成功后，启用备份时被替换/删除的原文件移入备份仓库（或各自目录的 .backup），其余暂存数据删除
+    暂存区与目标位于同一根目录下，提交与撤销均为同一文件系统内的重命名
+    事务在创建暂存目录之前锁定 .txn/<id>.lock 并持有到暂存目录删除，recover 跳过锁仍被持有的事务
+    （同一根目录下其他进程或线程正在进行的批次），进程退出时锁由系统释放
+    """
+
+    DIR_NAME = ".txn"
+    JOURNAL = "journal.json"
+    APPLIED_LOG = "applied.log"
+    LOCK_SUFFIX = ".lock"
+
+    def __init__(self, root_dir: str, handler: FileOperationHandler, txn_id: Optional[str] = None):
+        self.root_dir = os.path.abspath(root_dir)
+        self.handler = handler
+        if txn_id is None:
+            now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            txn_id = f"{now}_{uuid.uuid4().hex[:8]}"
+        self.txn_id = txn_id
+        self.path = os.path.join(self.root_dir, self.DIR_NAME, txn_id)
+        self.ops: List[dict] = []
+        self._touched: Set[str] = set()
+        self._started = False
+        self._lock_fd: Optional[int] = None
+
+    @staticmethod
+    def _path_key(path: str) -> str:
+        return os.path.normcase(os.path.normpath(path))
+
+    def add(self, action: str, path: str) -> int:
+        """
+        按执行顺序登记一项操作
+        Returns:
+            操作序号，写入类操作随后需调用 write 提供内容
+        """
+        key = self._path_key(path)
+        parts = key.split(os.sep)
+        # 目标或其上级目录在本事务中已被改动时，无法与磁盘上的当前内容比较
+        touched = any(os.sep.join(parts[:i]) in self._touched for i in range(1, len(parts) + 1))
+        self.ops.append({
+            "action": action,
+            "path": path,
+            "staged": None,
+            "skip": False,
+            "check_unchanged": action in _WRITE_ACTIONS and not touched,
+        })
+        self._touched.add(key)
+        return len(self.ops) - 1
+
+    def needs_content(self, index: int) -> bool:
+        return self.ops[index]["action"] in _WRITE_ACTIONS
+
+    def write(self, index: int, content: Content, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        """把写入类操作的内容写入暂存区（不同序号之间可并行调用）"""
+        op = self.ops[index]
+        try:
+            if op["check_unchanged"] and self.handler.skip_unchanged:
+                with timer.phase("compare"):
+                    unchanged = self.handler._is_unchanged(op["path"], content)
+                if unchanged:
+                    op["skip"] = True
+                    return OperationResult(True, "文件内容未变化，跳过写入", unchanged=True)
+            self._ensure_started()
+            staged = os.path.join("data", str(index))
+            verification_result, digest = self.handler._write_and_verify(
+                os.path.join(self.path, staged), content, timer
+            )
+            if not verification_result[0]:
+                return OperationResult(False, "文件内容验证失败", error=verification_result[1])
+            op["staged"] = staged
+            return OperationResult(True, "已暂存", digest=digest, staged=True)
+        except Exception as e:
+            return OperationResult(False, "文件暂存失败", error=str(e))
+
+    def patch(self, index: int, patch: Content, timer: TaskScope = NULL_SCOPE) -> OperationResult:
+        """
+        计算补丁结果并暂存；基准内容为本事务中此前对同一文件最后一次暂存的内容，否则为磁盘上的文件
+        依赖此前的写入，须在这些写入暂存完成后调用
+        """
+        op = self.ops[index]
+        try:
+            base = self._patch_base(index)
+            if base is None and not os.path.isfile(op["path"]):
+                return OperationResult(False, "补丁应用失败", error="目标文件不存在")
+            with timer.phase("patch"):
+                _, patched = self.handler.apply_patch(op["path"], patch, base)
+        except Exception as e:
+            return OperationResult(False, "补丁应用失败", error=str(e))
+        return self.write(index, patched, timer)
+
+    def _patch_base(self, index: int) -> Optional[bytes]:
+        """补丁的基准内容；为 None 时以磁盘上的文件为准"""
+        key = self._path_key(self.ops[index]["path"])
+        for prev in reversed(self.ops[:index]):
+            prev_key = self._path_key(prev["path"])
+            if prev_key == key:
+                if prev["action"] in _WRITE_ACTIONS:
+                    if prev["staged"] is not None:
+                        with open(os.path.join(self.path, prev["staged"]), "rb") as f:
+                            return f.read()
+                    if prev["skip"]:
+                        return None   # 磁盘内容已与该写入一致
+                    raise PatchConflictException("此前对该文件的写入未能暂存")
+                raise PatchConflictException("目标文件已在本事务中被删除或替换为目录")
+            if prev["action"] == "delete folder" and key.startswith(prev_key.rstrip(os.sep) + os.sep):
+                raise PatchConflictException("目标文件所在目录已在本事务中被删除")
+        return None
+
+    def commit(self) -> int:
+        """
+        应用全部操作；失败时撤销已应用的部分并重新抛出异常
+        Returns:
+            实际应用的操作数量
+        """
+        self._ensure_started()
+        # batch 模式下暂存文件的 fsync 被推迟，须在进入 committing 状态之前落盘
+        self.handler.flush_pending_syncs()
+        self._write_journal("committing")
+        applied = 0
+        records: List[dict] = []
+        try:
+            with open(os.path.join(self.path, self.APPLIED_LOG), "a", encoding="utf-8") as log:
+                for index, op in enumerate(self.ops):
+                    if op["skip"]:
+                        continue
+                    record = self._apply(index, op)
+                    records.append(record)
+                    log.write(json.dumps(record) + "\n")
+                    log.flush()
+                    if self.handler.fsync_mode != "none":
+                        os.fsync(log.fileno())
+                    applied += 1
+        except BaseException:
+            self._undo(self.ops, records)
+            self._remove()
+            self.handler.reset_dir_cache()
+            raise
+        self._write_journal("committed")
+        self._finalize()
+        self.handler.reset_dir_cache()
+        return applied
+
+    def rollback(self):
+        """放弃尚未提交的事务，删除暂存数据"""
+        self._remove()
+
+    @classmethod
+    def recover(cls, root_dir: str, handler: FileOperationHandler) -> List[Tuple[str, str]]:
+        """
+        处理根目录下遗留的事务（进程在提交过程中退出）
+        Returns:
+            [(事务 ID, 处理结果)]，处理结果为 discarded / rolled_back / completed；仍在进行的事务不处理
+        """
+        txn_root = os.path.join(os.path.abspath(root_dir), cls.DIR_NAME)
+        if not os.path.isdir(txn_root):
+            return []
+        recovered = []
+        suffix = cls.LOCK_SUFFIX
+        names = {name[:-len(suffix)] if name.endswith(suffix) else name for name in os.listdir(txn_root)}
+        for txn_id in sorted(names):
+            txn = cls(root_dir, handler, txn_id)
+            if not txn._lock():
+                continue
+            if not os.path.isdir(txn.path):
+                # 事务在加锁前已结束，或崩溃时只留下了锁文件
+                txn._remove()
+                continue
+            journal = txn._read_journal()
+            state = journal.get("state") if journal else None
+            if state == "committing":
+                txn._undo(journal["ops"], txn._read_applied_log())
+                txn._remove()
+                outcome = "rolled_back"
+            elif state == "committed":
+                txn.ops = journal["ops"]
+                txn._finalize()
+                outcome = "completed"
+            else:
+                txn._remove()
+                outcome = "discarded"
+            recovered.append((txn_id, outcome))
+        handler.reset_dir_cache()
+        return recovered
+
+    def _lock(self) -> bool:
+        """非阻塞地锁定本事务，锁已被持有时返回 False"""
+        while True:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            try:
+                fd = os.open(self.path + self.LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o644)
+                break
+            except FileNotFoundError:
+                pass   # 其他事务结束时恰好删除了空的 .txn 目录
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+        self._lock_fd = fd
+        return True
+
+    def _ensure_started(self):
+        if not self._started:
+            if self._lock_fd is None and not self._lock():
+                raise RuntimeError(f"事务 {self.txn_id} 已被其他进程锁定")
+            os.makedirs(os.path.join(self.path, "data"), exist_ok=True)
+            os.makedirs(os.path.join(self.path, "undo"), exist_ok=True)
+            self._started = True
+
+    def _write_journal(self, state: str):
+        journal_path = os.path.join(self.path, self.JOURNAL)
+        tmp_path = journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "state": state, "ops": self.ops}, f, ensure_ascii=False)
+            if self.handler.fsync_mode != "none":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, journal_path)
+
+    def _read_journal(self) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path, self.JOURNAL), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _read_applied_log(self) -> List[dict]:
+        records = []
+        try:
+            with open(os.path.join(self.path, self.APPLIED_LOG), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break   # 崩溃时写了一半的最后一行
+        except OSError:
+            pass
+        return records
+
+    def _undo_path(self, index: int) -> str:
+        return os.path.join(self.path, "undo", str(index))
+
+    def _makedirs(self, dir_path: str) -> List[str]:
+        """创建缺失的各级目录，返回实际创建的目录（由上到下）"""
+        missing = []
+        while dir_path and not os.path.isdir(dir_path):
+            missing.append(dir_path)
+            parent = os.path.dirname(dir_path)
+            if parent == dir_path:
+                break
+            dir_path = parent
+        missing.reverse()
+        for path in missing:
+            os.mkdir(path)
+        self.handler._count(len(missing) * 2 + 1)
+        return missing
+
+    def _apply(self, index: int, op: dict) -> dict:
+        action = op["action"]
+        path = op["path"]
+        undo = self._undo_path(index)
+        record = {"index": index, "created_dirs": []}
+        if action == "create folder":
+            record["created_dirs"] = self._makedirs(path)
+        elif action == "delete folder":
+            if os.path.isdir(path):
+                os.rename(path, undo)
+        elif action == "delete file":
+            if os.path.isfile(path):
+                os.rename(path, undo)
+        else:
+            record["created_dirs"] = self._makedirs(os.path.dirname(path))
+            if os.path.isdir(path):
+                raise IsADirectoryError(f"目标路径是目录: {path}")
+            if os.path.lexists(path):
+                os.rename(path, undo)
+            os.replace(os.path.join(self.path, op["staged"]), path)
+        self.handler._count(3)
+        return record
+
+    def _undo(self, ops: List[dict], records: List[dict]):
+        """
+        逆序撤销：已记录的操作按记录撤销；未记录的操作依据暂存/撤销文件是否存在判断是否已部分应用
+        """
+        done: Dict[int, dict] = {record["index"]: record for record in records}
+        for index in range(len(ops) - 1, -1, -1):
+            op = ops[index]
+            if op.get("skip"):
+                continue
+            path = op["path"]
+            undo = self._undo_path(index)
+            if op["action"] in _WRITE_ACTIONS:
+                staged = op.get("staged")
+                moved_in = staged is not None and not os.path.lexists(os.path.join(self.path, staged))
+                if os.path.lexists(undo):
+                    os.replace(undo, path)
+                elif moved_in and os.path.lexists(path):
+                    os.remove(path)
+            elif op["action"] in ("delete file", "delete folder"):
+                if os.path.lexists(undo):
+                    os.rename(undo, path)
+            record = done.get(index)
+            if record:
+                for dir_path in reversed(record["created_dirs"]):
+                    try:
+                        os.rmdir(dir_path)
+                    except OSError:
+                        pass
+
+    def _finalize(self):
+        """提交完成后保留备份并清理暂存区"""
+        undo_dir = os.path.join(self.path, "undo")
+        if os.path.isdir(undo_dir):
+            for name in os.listdir(undo_dir):
+                undo = os.path.join(undo_dir, name)
+                index = int(name)
+                op = self.ops[index]
+                if not self.handler.backup_enabled or op["action"] == "delete folder" or not os.path.isfile(undo):
+                    continue
+                if self.handler.backup_store is not None:
+                    self.handler.backup_store.save(op["path"], source=undo, clone=os.replace)
+                elif not self._deleted_later(index):
+                    os.replace(undo, self.handler._backup_target(op["path"]))
+        self._remove()
+
+    def _deleted_later(self, index: int) -> bool:
+        """逐条执行时，备份所在目录会被之后的 Delete folder 一并删除"""
+        key = self._path_key(self.ops[index]["path"])
+        for op in self.ops[index + 1:]:
+            if op["action"] == "delete folder" and not op.get("skip"):
+                prefix = self._path_key(op["path"])
+                prefix = prefix if prefix.endswith(os.sep) else prefix + os.sep
+                if key.startswith(prefix):
+                    return True
+        return False
+
+    def _remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        if self._lock_fd is not None:
+            # 暂存目录删除后再释放锁，recover 不会看到未加锁的残留目录
+            os.close(self._lock_fd)
+            self._lock_fd = None
+            try:
+                os.remove(self.path + self.LOCK_SUFFIX)
+            except OSError:
+                pass
+        try:
+            os.rmdir(os.path.dirname(self.path))
+        except OSError:
+            pass
@@ -12,4 +12,8 @@ class PathSecurityException(CodeFileExecutorException):
 
 class FileOperationException(CodeFileExecutorException):
     """文件操作异常"""
-    pass
\ No newline at end of file
+    pass
+
+class PatchConflictException(FileOperationException):
+    """补丁与目标文件内容冲突"""
+    pass
@@ -1,7 +1,7 @@
 # 为了避免在包初始化时触发循环导入，这里不在顶层执行深层导入
 # 使用显式导入路径：from codefileexecutorlib.models.task_model import TaskModel 等
 from .result_model import OperationResult
-from .stream_data import StreamData
+from .stream_data import StreamData, StreamEvent
 class StreamType:
     INFO = "info"
     PROGRESS = "progress"
@@ -9,9 +9,49 @@ class StreamType:
     ERROR = "error"
     WARNING = "warning"
     SUMMARY = "summary"
+class EventCode:
+    # 批次级事件
+    PREPROCESSED = "batch.preprocessed"
+    PREPROCESS_FAILED = "batch.preprocess_failed"
+    PARSE_FAILED = "batch.parse_failed"
+    BATCH_START = "batch.start"
+    SYNC_FAILED = "batch.sync_failed"
+    BACKUP_PRUNE_FAILED = "batch.backup_prune_failed"
+    SUMMARY = "batch.summary"
+    # 任务级事件
+    TASK_PROGRESS = "task.progress"
+    TASK_START = "task.start"
+    TASK_INVALID = "task.invalid"
+    TASK_ERROR = "task.error"
+    MULTIPLE_CODE_BLOCKS = "task.multiple_code_blocks"
+    CONTENT_INVALID = "task.content_invalid"
+    CONTENT_INTEGRITY = "task.content_integrity"
+    CONTENT_STRUCTURE = "task.content_structure"
+    SYNTAX_WARNING = "task.syntax_warning"
+    CONTENT_TOO_LARGE = "task.content_too_large"
+    PATCH_INVALID = "task.patch_invalid"
+    PATH_TOO_LONG = "task.path_too_long"
+    ABSOLUTE_PATH = "task.absolute_path"
+    PATH_UNSAFE = "task.path_unsafe"
+    FILENAME_UNSAFE = "task.filename_unsafe"
+    UNSUPPORTED_ACTION = "task.unsupported_action"
+    TASK_SUCCESS = "task.success"
+    TASK_UNCHANGED = "task.unchanged"
+    TASK_COALESCED = "task.coalesced"
+    TASK_STAGED = "task.staged"
+    TASK_FAILED = "task.failed"
+    DIGEST_MISMATCH = "task.digest_mismatch"
+    # 事务事件
+    TXN_RECOVERED = "txn.recovered"
+    TXN_RECOVERY_FAILED = "txn.recovery_failed"
+    TXN_COMMITTED = "txn.committed"
+    TXN_ROLLED_BACK = "txn.rolled_back"
+    TXN_COMMIT_FAILED = "txn.commit_failed"
 __all__ = [
     'OperationResult',
     'StreamData',
+    'StreamEvent',
     'StreamType',
+    'EventCode',
     # 不在此处导出 TaskModel，避免第三方在导入 models 时触发 task_model 的初始化
 ]
\ No newline at end of file
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class BackupEntry:
+    path: str           # 被备份文件的绝对路径
+    timestamp: float    # 备份时间（Unix 时间戳）
+    blob: str           # 内容的 SHA-256 摘要，对应 objects/<前两位>/<摘要>
+    size: int           # 内容字节数
+
+    def to_dict(self) -> dict:
+        return {"path": self.path, "timestamp": self.timestamp, "blob": self.blob, "size": self.size}
@@ -0,0 +1,55 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+from codefileexecutorlib.models.task_model import TaskModel
+# 计划中的任务状态
+#   new       - 目标不存在，将被创建
+#   exists    - 目标已存在（将被更新/删除，或目录已存在）
+#   unchanged - 目标文件内容与新内容完全一致
+#   missing   - 删除操作的目标不存在
+#   conflict  - 目标类型与操作不符（如对目录执行文件操作）
+#   invalid   - 未通过解析或校验，执行时将被跳过
+PLAN_STATUSES = ("new", "exists", "unchanged", "missing", "conflict", "invalid")
+@dataclass
+class PlannedTask:
+    step_num: int                     # 任务序号（从 1 开始）
+    action: str                       # 规范化后的操作类型
+    path: Optional[str]               # 解析后的完整路径；未通过校验时为 None
+    size: int                         # 内容字节数
+    status: str                       # 见 PLAN_STATUSES
+    task: TaskModel = field(repr=False)
+    error: Optional[str] = None       # 未通过校验时的原因
+    messages: List[Tuple[str, str, str]] = field(default_factory=list, repr=False)   # 校验阶段产生的 (消息, 类型, 事件代码)
+    prepared: Optional[Any] = field(default=None, repr=False)                  # 通过校验、可直接执行的任务
+    def to_dict(self) -> dict:
+        return {
+            "step_num": self.step_num,
+            "step_line": self.task.step_line,
+            "action": self.action,
+            "path": self.path,
+            "size": self.size,
+            "status": self.status,
+            "error": self.error,
+        }
+@dataclass
+class ExecutionPlan:
+    root_dir: str
+    tasks: List[PlannedTask] = field(default_factory=list)
+    error: Optional[str] = None       # 预处理或解析失败的原因
+    error_code: Optional[str] = None  # 预处理或解析失败的事件代码
+    notices: List[Tuple[str, str, str]] = field(default_factory=list, repr=False)   # 解析前产生的 (消息, 类型, 事件代码)
+    stats: Dict[str, int] = field(default_factory=dict, repr=False)             # 校验阶段的统计
+    source: Optional[Union[str, bytes]] = field(default=None, repr=False)       # 任务偏移量所指向的文本
+    @property
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数量"""
+        counts = {status: 0 for status in PLAN_STATUSES}
+        for planned in self.tasks:
+            counts[planned.status] += 1
+        return counts
+    def to_dict(self) -> dict:
+        return {
+            "root_dir": self.root_dir,
+            "error": self.error,
+            "counts": self.counts,
+            "tasks": [planned.to_dict() for planned in self.tasks],
+        }
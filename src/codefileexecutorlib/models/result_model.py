@@ -6,4 +6,7 @@ class OperationResult:
     success: bool                       # 操作是否成功
     message: str                        # 结果消息
     error: Optional[str] = None         # 错误信息
-    backup_path: Optional[str] = None   # 备份文件路径（如有）
\ No newline at end of file
+    backup_path: Optional[str] = None   # 备份文件路径（如有）
+    digest: Optional[str] = None        # 写入内容的 SHA-256 摘要（hash 验证模式）
+    unchanged: bool = False             # 目标文件内容未变化，未执行写入
+    staged: bool = False                # 已写入事务暂存区，等待提交
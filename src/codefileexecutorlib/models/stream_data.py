@@ -1,3 +1,5 @@
+import datetime
+import time
 from dataclasses import dataclass
 from typing import Optional, Dict
 
@@ -6,4 +8,53 @@ class StreamData:
     message: str                  # 消息内容
     type: str                     # 消息类型: info, progress, success, error, warning, summary
     timestamp: str                # 时间戳
-    data: Optional[Dict] = None   # 附加数据
\ No newline at end of file
+    data: Optional[Dict] = None   # 附加数据
+
+# 单调时钟与系统时钟之差，用于把事件的单调时间戳换算为本地时间
+_WALL_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+class StreamEvent:
+    """
+    typed 模式下的流式事件：使用 __slots__，创建时不做任何格式化
+    字段与字典格式一一对应，另含机器可读的 code、任务序号 step 与任务标识 task_id；
+    支持 event["message"] 形式的读取以便沿用字典格式的消费代码
+    """
+    __slots__ = ("type", "code", "message", "data", "step", "task_id", "timestamp_ns")
+
+    def __init__(self, type_: str, code: str, message: str, data: Optional[Dict] = None,
+                 step: Optional[int] = None, task_id: Optional[str] = None, timestamp_ns: int = 0):
+        self.type = type_                   # 消息类型，同 StreamType
+        self.code = code                    # 机器可读的事件代码，见 EventCode
+        self.message = message              # 消息内容
+        self.data = data                    # 附加数据
+        self.step = step                    # 任务序号（从 1 开始）；批次级事件为 None
+        self.task_id = task_id              # 任务的 File Path；批次级事件为 None
+        self.timestamp_ns = timestamp_ns    # time.monotonic_ns()
+
+    @property
+    def timestamp(self) -> str:
+        """与字典格式相同的本地时间字符串（按需计算）"""
+        seconds = (self.timestamp_ns + _WALL_OFFSET_NS) / 1e9
+        return datetime.datetime.fromtimestamp(seconds).isoformat(timespec="seconds")
+
+    def __getitem__(self, key: str):
+        if key == "timestamp":
+            return self.timestamp
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def to_dict(self) -> dict:
+        return {
+            "message": self.message,
+            "type": self.type,
+            "timestamp": self.timestamp,
+            "data": self.data,
+            "code": self.code,
+            "step": self.step,
+            "task_id": self.task_id,
+        }
+
+    def __repr__(self) -> str:
+        return (f"StreamEvent(type={self.type!r}, code={self.code!r}, step={self.step!r}, "
+                f"message={self.message!r})")
@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import Optional
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Union
+_NON_SPACE_BYTES = re.compile(rb"\S")
 @dataclass
 class TaskModel:
     step_line: str                # Step行的完整文字
@@ -9,6 +11,9 @@ class TaskModel:
     is_valid: bool                # 是否为有效任务
     error_message: Optional[str] = None   # 错误信息
     code_block_count: int = 0     # 代码块数量
+    block_span: Optional[Tuple[int, int]] = None     # 任务块在原始文本中的偏移量
+    content_span: Optional[Tuple[int, int]] = None   # 代码块内容在原始文本中的偏移量
+    buffer: Optional[bytes] = field(default=None, repr=False)  # 零拷贝模式下共享的 UTF-8 缓冲区
     def __post_init__(self):
         """在初始化后进行额外的验证"""
         if self.is_valid:
@@ -18,7 +23,7 @@ class TaskModel:
     @property
     def is_file_operation(self) -> bool:
         """检查是否为文件操作（非文件夹操作）"""
-        return self.action.lower() in ['create file', 'update file', 'delete file']
+        return self.action.lower() in ['create file', 'update file', 'patch file', 'delete file']
     @property
     def is_folder_operation(self) -> bool:
         """检查是否为文件夹操作"""
@@ -26,7 +31,7 @@ class TaskModel:
     @property
     def requires_content(self) -> bool:
         """检查此操作是否需要内容"""
-        return self.action.lower() in ['create file', 'update file']
+        return self.action.lower() in ['create file', 'update file', 'patch file']
     @property
     def is_create_operation(self) -> bool:
         """检查是否为创建操作"""
@@ -39,16 +44,71 @@ class TaskModel:
     def is_update_operation(self) -> bool:
         """检查是否为更新操作"""
         return self.action.lower() == 'update file'
+    @property
+    def is_patch_operation(self) -> bool:
+        """检查是否为补丁操作（代码块为 diff 或 SEARCH/REPLACE 块）"""
+        return self.action.lower() == 'patch file'
+    @property
+    def is_zero_copy(self) -> bool:
+        """内容是否以缓冲区偏移量的形式携带"""
+        return self.buffer is not None
+    @property
+    def has_content(self) -> bool:
+        """内容是否包含非空白字符"""
+        if self.buffer is not None:
+            if self.content_span is None:
+                return False
+            return _NON_SPACE_BYTES.search(self.buffer, *self.content_span) is not None
+        return bool(self.content) and self.content.strip() != ""
+    @property
+    def content_size(self) -> int:
+        """内容的 UTF-8 字节数（零拷贝模式下无需编码）"""
+        if self.buffer is not None:
+            return self.content_span[1] - self.content_span[0] if self.content_span else 0
+        return len(self.content.encode("utf-8")) if self.content else 0
+    @property
+    def content_length(self) -> int:
+        """内容长度：普通模式为字符数，零拷贝模式为字节数"""
+        if self.buffer is not None:
+            return self.content_size
+        return len(self.content) if self.content else 0
+    @property
+    def line_count(self) -> int:
+        """内容行数"""
+        if self.buffer is not None:
+            if not self.content_span or self.content_span[0] == self.content_span[1]:
+                return 0
+            start, end = self.content_span
+            count = self.buffer.count(b"\n", start, end)
+            return count if self.buffer[end - 1:end] == b"\n" else count + 1
+        return len(self.content.splitlines()) if self.content else 0
+    def get_content(self) -> str:
+        """获取内容文本（零拷贝模式下按需解码）"""
+        if self.buffer is not None:
+            return bytes(self.content_view()).decode("utf-8")
+        return self.content
+    def get_payload(self) -> Union[str, memoryview]:
+        """获取写入文件所用的内容：零拷贝模式下为缓冲区视图，否则为文本"""
+        if self.buffer is not None:
+            return self.content_view()
+        return self.content
+    def content_view(self) -> memoryview:
+        """零拷贝模式下内容在缓冲区中的只读视图"""
+        if self.content_span is None:
+            return memoryview(b"")
+        return memoryview(self.buffer)[self.content_span[0]:self.content_span[1]]
     def to_dict(self) -> dict:
         """转换为字典表示"""
         return {
             'step_line': self.step_line,
             'action': self.action,
             'file_path': self.file_path,
-            'content': self.content,
+            'content': self.get_content(),
             'is_valid': self.is_valid,
             'error_message': self.error_message,
             'code_block_count': self.code_block_count,
+            'block_span': self.block_span,
+            'content_span': self.content_span,
             'is_file_operation': self.is_file_operation,
             'is_folder_operation': self.is_folder_operation,
             'requires_content': self.requires_content
@@ -56,7 +116,7 @@ class TaskModel:
     def validate_content_requirement(self) -> tuple[bool, str]:
         """验证内容需求是否满足"""
         if self.requires_content:
-            if not self.content or self.content.strip() == "":
+            if not self.has_content:
                 return False, f"操作 '{self.action}' 需要提供内容，但内容为空"
         return True, "内容需求验证通过"
     def get_operation_summary(self) -> str:
@@ -66,8 +126,8 @@ class TaskModel:
             f"路径: {self.file_path}"
         ]
         if self.requires_content:
-            content_length = len(self.content) if self.content else 0
-            summary_parts.append(f"内容长度: {content_length} 字符")
+            unit = "字节" if self.buffer is not None else "字符"
+            summary_parts.append(f"内容长度: {self.content_length} {unit}")
         if self.code_block_count > 0:
             summary_parts.append(f"代码块数量: {self.code_block_count}")
         return " | ".join(summary_parts)
\ No newline at end of file
@@ -1,27 +1,46 @@
 """
 内容完整性验证工具
 """
-import hashlib
 import difflib
 import re
-from typing import Tuple, List
+from typing import Callable, List, NamedTuple, Tuple
+# 签名提取的组合模式，一次扫描同时得到：
+#   generic - 泛型表达式，如 Task<IActionResult>、Dictionary<string, object>
+#             （原先分别扫描的 Task/List/IEnumerable/Dictionary/Action/Func 模式的匹配都是它的子集）
+#   async   - async Task 方法；result 组表示返回类型为 Task<IActionResult>
+#             （用先行断言，不消耗其后的 Task<...>，使其仍作为泛型表达式被提取）
+_SIGNATURE_PATTERN = re.compile(
+    r"(?P<generic>\b[A-Z]\w*<[^<>{}]+>)|async(?=\s+Task\b(?P<result><\s*IActionResult\s*>)?)"
+)
+_ASYNC_TASK_PATTERN = re.compile(r"async\s+Task\b")
+_ASYNC_ACTION_RESULT_PATTERN = re.compile(r"async\s+Task<\s*IActionResult\s*>")
+_BRACKET_PATTERN = re.compile(r"[()\[\]{}]")
+class CodeSignatures(NamedTuple):
+    """一段代码中与完整性相关的签名"""
+    generics: Tuple[str, ...]        # 去重后的泛型表达式（按首次出现的顺序）
+    async_task: bool                 # 是否含 async Task
+    async_action_result: bool        # 是否含 async Task<IActionResult>
+Extractor = Callable[[str], CodeSignatures]
 class ContentValidator:
     """内容完整性和差异验证工具"""
     @staticmethod
     def validate_content_integrity(original: str, extracted: str) -> Tuple[bool, str]:
+        return ContentValidator._integrity(original, extracted, ContentValidator.extract_signatures)
+    @staticmethod
+    def _integrity(original: str, extracted: str, extract: Extractor) -> Tuple[bool, str]:
+        """validate_content_integrity 的实现；extract 为签名提取函数（ValidatorEngine 传入带缓存的版本）"""
         if len(extracted) == 0 and len(original) > 0:
             return False, "提取的内容为空"
+        if original == extracted:
+            return True, "内容完全一致"
+        original_signatures, extracted_signatures = extract(original), extract(extracted)
         # 首先检查泛型类型完整性
-        generic_check = ContentValidator._validate_generic_types_preservation(original, extracted)
+        generic_check = ContentValidator._compare_generics(original_signatures, extracted_signatures)
         if not generic_check[0]:
             return False, f"泛型类型验证失败: {generic_check[1]}"
-        lost_detail = ContentValidator.detect_signature_loss(original, extracted)
+        lost_detail = ContentValidator._signature_loss(original_signatures, extracted_signatures)
         if lost_detail:
             return False, lost_detail
-        original_hash = hashlib.md5(original.encode('utf-8')).hexdigest()
-        extracted_hash = hashlib.md5(extracted.encode('utf-8')).hexdigest()
-        if original_hash == extracted_hash:
-            return True, "内容完全一致"
         differences = ContentValidator.analyze_differences(original, extracted)
         return False, f"内容存在差异: {differences}"
     @staticmethod
@@ -40,10 +59,16 @@ class ContentValidator:
         return f"添加了{added_lines}行，删除了{removed_lines}行"
     @staticmethod
     def check_code_syntax_integrity(original: str, extracted: str, file_extension: str = None) -> Tuple[bool, str]:
-        # 首先检查泛型类型
-        generic_check = ContentValidator._validate_generic_types_preservation(original, extracted)
-        if not generic_check[0]:
-            return False, f"泛型类型不完整: {generic_check[1]}"
+        return ContentValidator._syntax_integrity(original, extracted, file_extension,
+                                                  ContentValidator.extract_signatures)
+    @staticmethod
+    def _syntax_integrity(original: str, extracted: str, file_extension: str,
+                          extract: Extractor) -> Tuple[bool, str]:
+        # 首先检查泛型类型（内容相同时必然完整）
+        if original != extracted:
+            generic_check = ContentValidator._compare_generics(extract(original), extract(extracted))
+            if not generic_check[0]:
+                return False, f"泛型类型不完整: {generic_check[1]}"
         brackets_check = ContentValidator._check_brackets_balance(extracted)
         if not brackets_check[0]:
             return False, f"括号不匹配: {brackets_check[1]}"
@@ -56,7 +81,9 @@ class ContentValidator:
     def _check_brackets_balance(code: str) -> Tuple[bool, str]:
         stack = []
         bracket_pairs = {'(': ')', '[': ']', '{': '}'}  # 移除尖括号，单独处理泛型
-        for i, char in enumerate(code):
+        # 只遍历括号字符，跳过其余内容
+        for match in _BRACKET_PATTERN.finditer(code):
+            i, char = match.start(), match.group()
             if char in bracket_pairs:
                 stack.append((char, i))
             elif char in bracket_pairs.values():
@@ -114,20 +141,39 @@ class ContentValidator:
         检测代码签名丢失
         改进：使用更准确的泛型检测
         """
-        # 使用改进的泛型表达式提取
-        original_generics = ContentValidator._extract_generic_expressions_improved(original)
-        extracted_generics = ContentValidator._extract_generic_expressions_improved(extracted)
+        extract = ContentValidator.extract_signatures
+        return ContentValidator._signature_loss(extract(original), extract(extracted))
+    @staticmethod
+    def _signature_loss(original: CodeSignatures, extracted: CodeSignatures) -> str:
         # 检查是否有泛型表达式丢失
-        for generic in original_generics:
+        extracted_generics = set(extracted.generics)
+        for generic in original.generics:
             if generic not in extracted_generics:
                 return f"泛型表达式丢失: {generic}"
         # 特别检查C#的async Task<IActionResult>模式
-        if re.search(r'async\s+Task<\s*IActionResult\s*>', original) and not re.search(r'async\s+Task<\s*IActionResult\s*>', extracted):
+        if original.async_action_result and not extracted.async_action_result:
             return "方法签名的 Task<IActionResult> 泛型返回类型丢失"
-        if re.search(r'async\s+Task\b', original) and not re.search(r'async\s+Task\b', extracted):
+        if original.async_task and not extracted.async_task:
             return "async Task 方法的 async 修饰符丢失"
         return ""
     @staticmethod
+    def extract_signatures(code: str) -> CodeSignatures:
+        """用组合模式一次扫描提取泛型表达式与 async Task 签名"""
+        generics = {}
+        async_task = action_result = False
+        for match in _SIGNATURE_PATTERN.finditer(code):
+            generic = match.group("generic")
+            if generic is None:
+                async_task = True
+                action_result = action_result or match.group("result") is not None
+                continue
+            generics[generic] = None
+            if "async" in generic:
+                # 被泛型表达式消耗掉的 async Task（如 Func<async Task>）
+                async_task = async_task or _ASYNC_TASK_PATTERN.search(generic) is not None
+                action_result = action_result or _ASYNC_ACTION_RESULT_PATTERN.search(generic) is not None
+        return CodeSignatures(tuple(generics), async_task, action_result)
+    @staticmethod
     def _extract_generic_expressions(code: str) -> List[str]:
         """
         保留原方法以兼容现有代码
@@ -136,41 +182,26 @@ class ContentValidator:
     @staticmethod
     def _extract_generic_expressions_improved(code: str) -> List[str]:
         """
-        改进的泛型表达式提取方法
+        改进的泛型表达式提取方法（去重，按首次出现的顺序）
         """
-        generic_expressions = []
-        # 改进的泛型模式，更精确地匹配
-        patterns = [
-            r'\bTask<[^<>{}]+>',              # Task<IActionResult>, Task<string> 等
-            r'\bList<[^<>{}]+>',              # List<string>, List<User> 等
-            r'\bIEnumerable<[^<>{}]+>',       # IEnumerable<string> 等
-            r'\bDictionary<[^<>{}]+,\s*[^<>{}]+>', # Dictionary<string, object> 等
-            r'\bAction<[^<>{}]+>',            # Action<string> 等
-            r'\bFunc<[^<>{}]+>',              # Func<string, bool> 等
-            r'\b[A-Z]\w*<[^<>{}]+>',          # 其他泛型类型
-        ]
-        for pattern in patterns:
-            matches = re.findall(pattern, code)
-            generic_expressions.extend(matches)
-        # 去重
-        return list(set(generic_expressions))
+        return list(ContentValidator.extract_signatures(code).generics)
     @staticmethod
     def _validate_generic_types_preservation(original: str, extracted: str) -> Tuple[bool, str]:
         """
         验证泛型类型是否在提取过程中得到保留
         """
-        original_generics = ContentValidator._extract_generic_expressions_improved(original)
-        extracted_generics = ContentValidator._extract_generic_expressions_improved(extracted)
-        if not original_generics:
+        extract = ContentValidator.extract_signatures
+        return ContentValidator._compare_generics(extract(original), extract(extracted))
+    @staticmethod
+    def _compare_generics(original: CodeSignatures, extracted: CodeSignatures) -> Tuple[bool, str]:
+        if not original.generics:
             return True, "无泛型类型需要验证"
-        missing_generics = []
-        for generic in original_generics:
-            if generic not in extracted_generics:
-                missing_generics.append(generic)
+        extracted_generics = set(extracted.generics)
+        missing_generics = [generic for generic in original.generics if generic not in extracted_generics]
         if missing_generics:
             return False, f"以下泛型类型在提取过程中丢失: {', '.join(missing_generics)}"
         # 检查是否有泛型语法错误
-        for generic in extracted_generics:
+        for generic in extracted.generics:
             if generic.count('<') != generic.count('>'):
                 return False, f"泛型类型语法错误: {generic}"
-        return True, "泛型类型保留完整"
\ No newline at end of file
+        return True, "泛型类型保留完整"
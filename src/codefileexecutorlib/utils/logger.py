@@ -1,11 +1,48 @@
 import os
 import datetime
+import threading
+from typing import List, Optional, TextIO
 
 class Logger:
-    def __init__(self, log_dir: str = 'log'):
+    """
+    带缓冲的分级文件日志
+    1. 低于 level 的记录在格式化之前即被丢弃
+    2. 日志文件在首次写出时打开并保持打开，记录先进入内存缓冲区，
+       达到 buffer_size 条或调用 flush 时一次性写出
+    3. 指定 flush_interval 时由后台线程定期写出，调用方线程只做追加；使用后应调用 close
+    4. 构造时不访问文件系统：日志目录与文件名在首次写出时才确定；log_dir 为 None 时不记录日志
+    """
+    LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+    def __init__(self, log_dir: Optional[str] = 'log', level: str = 'INFO', buffer_size: int = 256,
+                 flush_interval: Optional[float] = None):
+        level = level.upper()
+        if level not in self.LEVELS:
+            raise ValueError(f"不支持的日志级别: {level}")
         self.log_dir = log_dir
-        os.makedirs(self.log_dir, exist_ok=True)
-        self.log_file = self._create_log_file()
+        self.level = level
+        self.buffer_size = max(1, buffer_size)
+        self.flush_interval = flush_interval
+        self._log_file: Optional[str] = None
+        # 禁用日志时阈值高于所有级别，记录在格式化之前即被丢弃
+        self._threshold = self.LEVELS[level] if log_dir is not None else float("inf")
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()      # 保护缓冲区
+        self._io_lock = threading.Lock()   # 保证多次 flush 按顺序写出
+        self._stream: Optional[TextIO] = None
+        self._wake: Optional[threading.Event] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def log_file(self) -> Optional[str]:
+        """日志文件路径，首次访问时按当前时间生成；禁用日志时为 None"""
+        if self._log_file is None and self.log_dir is not None:
+            self._log_file = self._create_log_file()
+        return self._log_file
+
+    def debug(self, message: str, step_num: int = None):
+        self._write_log("DEBUG", message, step_num)
 
     def info(self, message: str, step_num: int = None):
         self._write_log("INFO", message, step_num)
@@ -16,16 +53,69 @@ class Logger:
     def error(self, message: str, step_num: int = None):
         self._write_log("ERROR", message, step_num)
 
+    def flush(self):
+        """把缓冲区中的记录写入日志文件"""
+        with self._io_lock:
+            with self._lock:
+                if not self._buffer:
+                    return
+                records, self._buffer = self._buffer, []
+            if self._stream is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._stream = open(self.log_file, "a", encoding="utf-8")
+            self._stream.write("".join(records))
+            self._stream.flush()
+
+    def close(self):
+        """停止后台线程，写出剩余记录并关闭文件"""
+        self._closed = True
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            self._wake.set()
+            flusher.join()
+        self.flush()
+        with self._io_lock:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+
     def _write_log(self, level: str, message: str, step_num: int = None):
+        if self.LEVELS[level] < self._threshold:
+            return
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         prefix = f"[{now}] [{level}]"
         if step_num is not None:
             prefix += f" [Step {step_num}]"
         log_content = f"{prefix} {message}\n"
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(log_content)
+        with self._lock:
+            self._buffer.append(log_content)
+            full = len(self._buffer) >= self.buffer_size
+        if self.flush_interval is not None and not self._closed:
+            if self._flusher is None:
+                self._start_flusher()
+            if full:
+                self._wake.set()
+        elif full:
+            self.flush()
+
+    def _start_flusher(self):
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._wake = threading.Event()
+            self._flusher = threading.Thread(target=self._flush_loop, name="logger-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
 
     def _create_log_file(self) -> str:
         now = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"execution_{now}.log"
-        return os.path.join(self.log_dir, filename)
\ No newline at end of file
+        return os.path.join(self.log_dir, filename)
@@ -12,35 +12,52 @@ class Preprocessor:
     2. 删除结尾 [to be continued]/[to be continue]
     """
 
+    # 开头可剥离的片段，在当前偏移处锚定匹配（不使用 ^，以便配合 match(content, pos)）；
+    # 前导空白由调用方先行越过，各分支不以 \s* 开头，避免相邻的 \s* 在长空白上回溯出 O(n²)
     _think_start_pattern = re.compile(
         "|".join(
             [
-                r"^\s*<think>[\s\S]*?</think>\s*",
-                r"^\s*\*Thinking.*?\*\s*",
-                r"^\s*(?:Thinking\.\.\.\s*\(\d+s elapsed\)\s*)+",
-                r"^\s*[-*\u2022]?\s*(?:Thinking|Reflection|Reasoning|思考|推理|反思)[:：].*?\n+",
-                r"^\s*(?:让我们思考一下|以下是我的推理|推理如下|思考如下)[：:]?\s*\n+",
-                r"^\s*>[^\n]*\n+",
+                r"<think>[\s\S]*?</think>",
+                r"\*Thinking.*?\*",
+                r"(?:Thinking\.\.\.\s*\(\d+s elapsed\)\s*)+",
+                r"[-*\u2022]?\s*(?:Thinking|Reflection|Reasoning|思考|推理|反思)[:：].*?\n+",
+                r"(?:让我们思考一下|以下是我的推理|推理如下|思考如下)[：:]?\s*\n+",
+                r">[^\n]*\n+",
             ]
         ),
         re.IGNORECASE,
     )
+    _space_pattern = re.compile(r"\s*")
 
-    _to_be_continued_pattern = re.compile(r"\s*\[to be continue(?:d)?\]\s*$", re.IGNORECASE)
+    _to_be_continued_pattern = re.compile(r"\[to be continue(?:d)?\]$", re.IGNORECASE)
+    _TO_BE_CONTINUED_MAX = len("[to be continued]")
 
     @staticmethod
     def trim_assistant_reply(content: Optional[str]) -> str:
+        """
+        用一个偏移量依次越过开头的思索/引用片段，最后只切片一次
+        复杂度：最坏 O(n)。每一轮先越过前导空白，再做锚定匹配：要么失败并结束扫描，要么前进到匹配末尾；
+        各分支不以可变长度的空白开头，失败的分支至多扫描到当前行末
+        （未闭合的 <think> 扫描到文本末尾，但随即结束扫描）。
+        结尾标记在去掉尾部空白后的固定长度窗口内查找，不受空白长度影响
+        """
         if not content:
             return "" if content is None else content
 
-        result = content
-
+        pattern = Preprocessor._think_start_pattern
+        skip_space = Preprocessor._space_pattern.match
+        pos = 0
         while True:
-            prev = result
-            result = Preprocessor._think_start_pattern.sub("", result)
-            if result == prev:
+            pos = skip_space(content, pos).end()
+            match = pattern.match(content, pos)
+            if match is None or match.end() == pos:
                 break
+            pos = match.end()
 
-        result = Preprocessor._to_be_continued_pattern.sub("", result)
+        end = len(content.rstrip())
+        window = max(pos, end - Preprocessor._TO_BE_CONTINUED_MAX)
+        match = Preprocessor._to_be_continued_pattern.search(content, window, end)
+        if match is not None:
+            end = match.start()
 
-        return result.strip()
\ No newline at end of file
+        return content[pos:end].strip()
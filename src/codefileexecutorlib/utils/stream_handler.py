@@ -1,11 +1,63 @@
 import datetime
+import time
+from typing import Optional
+from codefileexecutorlib.models import StreamType
+from codefileexecutorlib.models.stream_data import StreamEvent
 
 class StreamHandler:
-    def build_stream(self, message: str, type_: str, data: dict = None):
-        now = datetime.datetime.now().isoformat(timespec="seconds")
+    # 事件格式：
+    #   dict  - 字典 {"message", "type", "timestamp", "data"}（默认，与历史行为一致）
+    #   typed - StreamEvent 对象，带 code/step/task_id 与单调时钟纳秒时间戳，不格式化时间
+    EVENT_MODES = ("dict", "typed")
+    # 输出级别：各级别保留的事件类型，None 表示全部保留
+    VERBOSITY_LEVELS = {
+        "all": None,
+        "results": (StreamType.SUCCESS, StreamType.WARNING, StreamType.ERROR, StreamType.SUMMARY),
+        "errors": (StreamType.WARNING, StreamType.ERROR, StreamType.SUMMARY),
+        "summary": (StreamType.SUMMARY,),
+    }
+
+    def __init__(self, event_mode: str = "dict", verbosity: str = "all"):
+        if event_mode not in self.EVENT_MODES:
+            raise ValueError(f"不支持的事件格式: {event_mode}")
+        if verbosity not in self.VERBOSITY_LEVELS:
+            raise ValueError(f"不支持的输出级别: {verbosity}")
+        self.event_mode = event_mode
+        self.verbosity = verbosity
+        self._types = self.VERBOSITY_LEVELS[verbosity]
+        # 当前任务，typed 模式下写入事件的 step/task_id
+        self.step: Optional[int] = None
+        self.task_id: Optional[str] = None
+        self._second = None
+        self._iso = ""
+
+    def wants(self, type_: str) -> bool:
+        """该类型的事件是否需要输出；构建 data 等开销较大时调用方据此提前跳过"""
+        return self._types is None or type_ in self._types
+
+    def set_task(self, step: Optional[int], task_id: Optional[str] = None):
+        self.step = step
+        self.task_id = task_id
+
+    def build_stream(self, message: str, type_: str, data: dict = None, code: Optional[str] = None):
+        """构建事件；按输出级别被过滤的类型返回 None"""
+        if self._types is not None and type_ not in self._types:
+            return None
+        if self.event_mode == "typed":
+            return StreamEvent(type_, code or type_, message, data, self.step, self.task_id, time.monotonic_ns())
+        # 时间戳精确到秒，同一秒内的事件复用已格式化的字符串
+        second = int(time.time())
+        if second != self._second:
+            self._second = second
+            self._iso = datetime.datetime.fromtimestamp(second).isoformat(timespec="seconds")
         return {
             "message": message,
             "type": type_,
-            "timestamp": now,
+            "timestamp": self._iso,
             "data": data
-        }
\ No newline at end of file
+        }
+
+    def emit(self, message: str, type_: str, data: dict = None, code: Optional[str] = None) -> tuple:
+        """供生成器 yield from 使用：返回只含该事件的元组，被过滤时为空元组"""
+        event = self.build_stream(message, type_, data, code)
+        return () if event is None else (event,)
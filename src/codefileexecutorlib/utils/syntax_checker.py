@@ -0,0 +1,276 @@
+"""
+按文件扩展名做真实的语法检查，在写入前发现被截断或损坏的代码
+Python 用 ast、JSON 用 json、TOML 用 tomllib、XML 用 xml.etree，C 系语言做忽略字符串与注释的括号平衡检查
+（启发式：预处理分支、JSX 文本等合法代码也可能不平衡，见 is_strict）；CPU 密集的解析可交给进程池，避免阻塞文件 I/O
+"""
+import ast
+import json
+import os
+import re
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+# 扩展名 -> 检查器
+LANGUAGES = {
+    ".py": "python", ".pyi": "python",
+    ".json": "json",
+    ".toml": "toml",
+    ".xml": "xml", ".csproj": "xml", ".fsproj": "xml", ".vbproj": "xml", ".props": "xml", ".targets": "xml",
+    ".xaml": "xml", ".resx": "xml", ".nuspec": "xml", ".svg": "xml", ".plist": "xml",
+    # C 系：单引号为字符字面量
+    ".c": "c", ".h": "c", ".cc": "c", ".cpp": "c", ".cxx": "c", ".hpp": "c", ".hh": "c", ".cs": "c",
+    ".java": "c", ".kt": "c", ".kts": "c", ".scala": "c", ".go": "c", ".rs": "c", ".swift": "c",
+    # 单引号为字符串，且有正则字面量
+    ".js": "js", ".jsx": "js", ".mjs": "js", ".cjs": "js", ".ts": "js", ".tsx": "js", ".mts": "js",
+    ".cts": "js", ".dart": "js",
+}
+# 使用真实解析器的检查器，其余为括号平衡的启发式检查
+STRICT_LANGUAGES = frozenset(("python", "json", "toml", "xml"))
+# 允许注释的 JSON（JSONC），不按严格 JSON 检查
+_JSONC_PREFIXES = ("tsconfig", "jsconfig", ".eslintrc", ".babelrc")
+_JSONC_DIRS = (".vscode", ".devcontainer")
+
+_C_COMMON = r"""
+    //[^\n]*
+  | /\*{comment_tail}                   # 块注释
+  | @"(?:[^"]|"")*"?                  # C# 逐字字符串
+  | \"\"\"[\s\S]*?(?:\"\"\"|\Z)        # 三引号字符串（Kotlin/Swift/C# 原始字符串）
+  | "(?:\\.|[^"\\\n])*"?              # 普通字符串（单行，未闭合时到行尾）
+  | `(?:\\.|[^`\\])*`?                # 模板字符串 / Go 原始字符串
+"""
+_C_LITERALS = {
+    "c": r"""
+  | '(?:\\.[^'\n]{0,8}|[^'\\\n])'     # 字符字面量（Rust 生命周期 'a 不匹配）
+""",
+    "js": r"""
+  | '(?:\\.|[^'\\\n])*'
+  | (?<=[(,=:\[!&|?{};])[^\S\n]*/(?![/*])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n])+/   # 正则字面量
+""",
+}
+# 快速路径：删去注释与字符串（未闭合的块注释保留下来，由 "/*" 发现），再删去括号以外的字符
+_NOISE = {language: re.compile(_C_COMMON.format(comment_tail=r"[\s\S]*?\*/") + literals, re.X)
+          for language, literals in _C_LITERALS.items()}
+# 逐个记号扫描，用于定位错误：未闭合的块注释匹配到末尾
+_BRACKET_TOKENS = {language: re.compile(_C_COMMON.format(comment_tail=r"(?:[\s\S]*?\*/|[\s\S]*)") + literals
+                                        + r"| [()\[\]{}]", re.X)
+                   for language, literals in _C_LITERALS.items()}
+_NON_BRACKET = re.compile(r"[^()\[\]{}]+")
+_EMPTY_PAIRS = re.compile(r"\(\)|\[\]|\{\}")
+_CLOSING = {")": "(", "]": "[", "}": "{"}
+
+
+def language_for(path: str) -> Optional[str]:
+    """按文件路径确定检查器，不支持的类型返回 None"""
+    name = os.path.basename(path).lower()
+    language = LANGUAGES.get(os.path.splitext(name)[1])
+    if language == "json":
+        parts = path.replace("\\", "/").split("/")
+        if name.startswith(_JSONC_PREFIXES) or any(part in _JSONC_DIRS for part in parts):
+            return None
+    if language == "toml" and tomllib is None:
+        return None
+    return language
+
+
+def check_source(language: str, content: str) -> Optional[str]:
+    """
+    检查一段源码
+    Returns:
+        错误说明；通过时返回 None
+    """
+    try:
+        if language == "python":
+            ast.parse(content)
+        elif language == "json":
+            json.loads(content)
+        elif language == "toml":
+            tomllib.loads(content)
+        elif language == "xml":
+            ElementTree.fromstring(content)
+        elif language in _BRACKET_TOKENS:
+            return _check_brackets(language, content)
+        return None
+    except SyntaxError as e:
+        # ElementTree.ParseError 也是 SyntaxError 的子类
+        line = getattr(e, "lineno", None) or (getattr(e, "position", None) or (None,))[0]
+        return f"语法错误（第{line}行）: {getattr(e, 'msg', None) or e}" if line else f"语法错误: {e}"
+    except json.JSONDecodeError as e:
+        return f"JSON 解析失败（第{e.lineno}行第{e.colno}列）: {e.msg}"
+    except Exception as e:
+        return f"解析失败: {e}"
+
+
+def check_many(items: Sequence[Tuple[str, str]]) -> List[Optional[str]]:
+    """逐个检查 (检查器, 源码)；作为进程池中的一个工作单元"""
+    return [check_source(language, content) for language, content in items]
+
+
+def _check_brackets(language: str, content: str) -> Optional[str]:
+    stripped = _NOISE[language].sub("", content)
+    if "/*" not in stripped:
+        # 反复删去相邻的空括号对，趟数等于最大嵌套深度
+        brackets = _NON_BRACKET.sub("", stripped)
+        while True:
+            reduced = _EMPTY_PAIRS.sub("", brackets)
+            if len(reduced) == len(brackets):
+                break
+            brackets = reduced
+        if not brackets:
+            return None
+    return _locate_bracket_error(_BRACKET_TOKENS[language], content)
+
+
+def _locate_bracket_error(pattern, content: str) -> Optional[str]:
+    stack: List[Tuple[str, int]] = []
+    for match in pattern.finditer(content):
+        token = match.group()
+        if len(token) != 1:
+            if token.startswith("/*") and not token.endswith("*/"):
+                return f"未闭合的块注释（第{_line(content, match.start())}行）"
+            continue
+        if token in "([{":
+            stack.append((token, match.start()))
+            continue
+        if token not in _CLOSING:
+            continue
+        if not stack:
+            return f"多余的 '{token}'（第{_line(content, match.start())}行）"
+        opening, position = stack.pop()
+        if opening != _CLOSING[token]:
+            return (f"括号不匹配：第{_line(content, position)}行的 '{opening}' "
+                    f"与第{_line(content, match.start())}行的 '{token}'")
+    if stack:
+        opening, position = stack[-1]
+        return f"未闭合的 '{opening}'（第{_line(content, position)}行），内容可能被截断"
+    return None
+
+
+def _usable_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _line(content: str, position: int) -> int:
+    return content.count("\n", 0, position) + 1
+
+
+class _Result:
+    """检查结果句柄：result() 返回错误说明或 None"""
+    __slots__ = ("_future", "_index", "_value", "_item")
+
+    def __init__(self, future: Optional[Future] = None, index: int = 0, value: Optional[str] = None,
+                 item: Optional[Tuple[str, str]] = None):
+        self._future = future
+        self._index = index
+        self._value = value
+        self._item = item
+
+    def result(self) -> Optional[str]:
+        if self._future is None:
+            return self._value
+        try:
+            return self._future.result()[self._index]
+        except BrokenProcessPool:
+            # 工作进程异常退出时在当前进程重新检查
+            return check_source(*self._item)
+
+
+class SyntaxChecker:
+    """
+    语法检查器
+    submit 把一批内容按大小分组提交到进程池，立即返回结果句柄；
+    总量小于 min_pool_bytes 时直接在当前进程检查（进程间传输内容的开销大于解析本身）。
+    进程池在首次需要时创建并在 close 前一直复用；无法创建（如受限环境）时退回当前进程检查。
+    使用 spawn/forkserver 启动方式的平台上，调用方脚本需要 if __name__ == "__main__" 保护
+    """
+
+    CHUNK_BYTES = 256 * 1024
+
+    def __init__(self, max_workers: Optional[int] = None, min_pool_bytes: int = 256 * 1024):
+        self.max_workers = max_workers
+        self.min_pool_bytes = min_pool_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_failed = False
+
+    @staticmethod
+    def language_for(path: str) -> Optional[str]:
+        return language_for(path)
+
+    @staticmethod
+    def is_strict(path: str) -> bool:
+        """该类型的检查是否为真实解析（结果可作为失败依据）；括号平衡检查只宜作为警告"""
+        return language_for(path) in STRICT_LANGUAGES
+
+    def check(self, path: str, content: str) -> Optional[str]:
+        """在当前进程检查单个文件，不支持的类型返回 None"""
+        language = language_for(path)
+        return check_source(language, content) if language else None
+
+    def submit(self, items: Sequence[Tuple[str, str]]) -> List[Optional[_Result]]:
+        """
+        提交一批 (路径, 内容)
+        Returns:
+            与 items 一一对应的结果句柄，不支持的类型为 None
+        """
+        handles: List[Optional[_Result]] = [None] * len(items)
+        pending = []
+        for idx, (path, content) in enumerate(items):
+            language = language_for(path)
+            if language:
+                pending.append((idx, (language, content)))
+        total = sum(len(item[1]) for _, item in pending)
+        pool = self._get_pool() if total >= self.min_pool_bytes else None
+        if pool is None:
+            for idx, item in pending:
+                handles[idx] = _Result(value=check_source(*item))
+            return handles
+        chunk: list = []
+        size = 0
+        for entry in pending:
+            chunk.append(entry)
+            size += len(entry[1][1])
+            if size >= self.CHUNK_BYTES:
+                self._submit_chunk(pool, chunk, handles)
+                chunk, size = [], 0
+        if chunk:
+            self._submit_chunk(pool, chunk, handles)
+        return handles
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _submit_chunk(self, pool: ProcessPoolExecutor, chunk: list, handles: list):
+        items = [item for _, item in chunk]
+        try:
+            future = pool.submit(check_many, items)
+        except (BrokenProcessPool, RuntimeError, OSError):
+            for idx, item in chunk:
+                handles[idx] = _Result(value=check_source(*item))
+            return
+        for offset, (idx, item) in enumerate(chunk):
+            handles[idx] = _Result(future, offset, item=item)
+
+    def _get_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self._pool is None and not self._pool_failed:
+            if (self.max_workers or _usable_cpus()) < 2:
+                # 单核时进程池只增加传输开销
+                self._pool_failed = True
+                return None
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            except (OSError, ValueError, NotImplementedError):
+                self._pool_failed = True
+        return self._pool
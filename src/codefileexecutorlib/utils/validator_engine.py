@@ -0,0 +1,80 @@
+"""
+带缓存的内容校验引擎：在 ContentValidator 之上按内容摘要缓存签名与校验结果
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+from codefileexecutorlib.utils.content_validator import CodeSignatures, ContentValidator
+
+
+class ValidatorEngine:
+    """
+    ContentValidator 的缓存版本
+    1. 签名（泛型表达式、async Task）由 ContentValidator.extract_signatures 一次扫描得到，按内容摘要缓存
+    2. validate_content_integrity / check_code_syntax_integrity 的结果按 (原文摘要, 提取内容摘要, 扩展名) 缓存
+    两类缓存共用一个有界 LRU；同一内容再次校验（如重新生成后内容未变）只需计算一次摘要
+    摘要为 BLAKE2b-128，缓存只保存摘要与结果，不保留原文；可在多个线程中共用
+    """
+
+    DEFAULT_CACHE_SIZE = 1024
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE):
+        if cache_size < 0:
+            raise ValueError(f"缓存大小不能为负数: {cache_size}")
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def signatures(self, code: str) -> CodeSignatures:
+        return self._cached(("signatures", self.digest(code)),
+                            lambda: ContentValidator.extract_signatures(code))
+
+    def validate_content_integrity(self, original: str, extracted: str) -> Tuple[bool, str]:
+        """与 ContentValidator.validate_content_integrity 结果一致"""
+        key = ("integrity", self.digest(original), self.digest(extracted))
+        return self._cached(key, lambda: ContentValidator._integrity(original, extracted, self.signatures))
+
+    def check_code_syntax_integrity(self, original: str, extracted: str,
+                                    file_extension: Optional[str] = None) -> Tuple[bool, str]:
+        """与 ContentValidator.check_code_syntax_integrity 结果一致"""
+        extracted_digest = self.digest(extracted)
+        original_digest = extracted_digest if original is extracted else self.digest(original)
+        key = ("syntax", original_digest, extracted_digest, file_extension)
+        return self._cached(key, lambda: ContentValidator._syntax_integrity(
+            original, extracted, file_extension, self.signatures))
+
+    def cache_info(self) -> Dict[str, int]:
+        """{"hits", "misses", "size", "maxsize"}"""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "size": len(self._cache),
+                    "maxsize": self.cache_size}
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = 0
+
+    def _cached(self, key: Hashable, compute):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return self._cache[key]
+            self._misses += 1
+        # 计算在锁外进行；并发计算同一内容时结果相同，后写入者覆盖即可
+        value = compute()
+        if self.cache_size:
+            with self._lock:
+                self._cache[key] = value
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
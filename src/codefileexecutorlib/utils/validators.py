@@ -12,4 +12,7 @@ def is_safe_path(path: str) -> bool:
         return True  # 绝对路径由路径处理器进一步判断
     return True
 def is_content_length_valid(content: str, max_bytes: int = 10*1024*1024) -> bool:
-    return len(content.encode("utf-8")) <= max_bytes
\ No newline at end of file
+    return len(content.encode("utf-8")) <= max_bytes
+def is_content_size_valid(size: int, max_bytes: int = 10*1024*1024) -> bool:
+    # 已知字节数时直接比较，避免重复编码
+    return size <= max_bytes
\ No newline at end of file
@@ -0,0 +1,43 @@
+"""
+异步执行器：并发批次各自统计，结果与单独执行同一批次一致
+"""
+import asyncio
+
+from codefileexecutorlib import AsyncCodeFileExecutor
+
+CONTENT = "\n------\n".join(
+    f"Step [{i}/20] - 创建 d{i % 4}/f{i}.txt\nAction: Create file\nFile Path: d{i % 4}/f{i}.txt\n\n```\n{i}\n```"
+    for i in range(1, 21)
+)
+COUNTERS = ("total_tasks", "successful_tasks", "failed_tasks", "unchanged_tasks", "fs_syscalls")
+
+
+def _counters(events):
+    summary = [event for event in events if event["type"] == "summary"][-1]["data"]
+    return {key: summary[key] for key in COUNTERS}
+
+
+async def _run(executor, root):
+    return _counters([event async for event in executor.codeFileExecutHelper(root, CONTENT)])
+
+
+async def _stream(executor, root):
+    async def chunks():
+        for start in range(0, len(CONTENT), 64):
+            yield CONTENT[start:start + 64]
+    return _counters([event async for event in executor.codeFileExecutStreamHelper(root, chunks())])
+
+
+def test_concurrent_batches_match_solo_run(tmp_path):
+    async def main():
+        async with AsyncCodeFileExecutor(max_threads=4, log_dir=None, backup_enabled=False) as executor:
+            solo = await _run(executor, str(tmp_path / "solo"))
+            batches = [_run(executor, str(tmp_path / f"batch{i}")) for i in range(6)]
+            streams = [_stream(executor, str(tmp_path / f"stream{i}")) for i in range(3)]
+            results = await asyncio.gather(*batches, *streams)
+            return solo, results, executor.executor.op_handler.syscall_count
+
+    solo, results, shared_count = asyncio.run(main())
+    assert solo["successful_tasks"] == 20
+    assert results == [solo] * 9
+    assert shared_count == 0
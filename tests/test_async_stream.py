@@ -0,0 +1,37 @@
+"""
+异步流式接口：解析与文件操作不在事件循环所在线程中执行
+"""
+import asyncio
+import threading
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core import executor as executor_module
+
+CONTENT = "\n------\n".join(
+    f"Step [{i}/3] - 创建 f{i}.txt\nAction: Create file\nFile Path: f{i}.txt\n\n```\n{i}\n```" for i in (1, 2, 3)
+)
+
+
+def test_stream_steps_run_off_the_event_loop(tmp_path, monkeypatch):
+    threads = set()
+    original = executor_module._StreamingSession._run_block
+
+    def record(self, *args, **kwargs):
+        threads.add(threading.get_ident())
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(executor_module._StreamingSession, "_run_block", record)
+
+    async def chunks():
+        for start in range(0, len(CONTENT), 16):
+            yield CONTENT[start:start + 16]
+
+    async def main():
+        executor = CodeFileExecutor(log_dir=None, backup_enabled=False)
+        events = [event async for event in executor.acodeFileExecutStreamHelper(str(tmp_path), chunks())]
+        return threading.get_ident(), events
+
+    loop_thread, events = asyncio.run(main())
+    assert threads and loop_thread not in threads
+    assert events[-1]["data"]["successful_tasks"] == 3
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["f1.txt", "f2.txt", "f3.txt"]
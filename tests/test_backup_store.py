@@ -0,0 +1,100 @@
+"""
+集中式备份仓库：相同内容只保存一份，按数量/时间/总大小清理并删除不再被引用的内容
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.backup_store import BackupStore
+
+
+def _blobs(store):
+    objects = os.path.join(store.store_dir, BackupStore.OBJECTS)
+    return sorted(name for _, _, files in os.walk(objects) for name in files if not name.startswith(".tmp"))
+
+
+def _backup(store, path, text, timestamp=None):
+    path.write_text(text)
+    store.save(str(path))
+    if timestamp is not None:
+        store.entries()[-1].timestamp = timestamp
+
+
+def test_dedup(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    _backup(store, a, "same")
+    _backup(store, b, "same")
+    _backup(store, a, "same")
+    _backup(store, a, "other")
+    assert len(store.entries()) == 4 and len(store.entries(str(a))) == 3
+    assert len(_blobs(store)) == 2
+    # 索引可被新实例重新读取，记录不因同一秒内多次备份而互相覆盖
+    reloaded = BackupStore(str(tmp_path / "store"))
+    assert [entry.blob for entry in reloaded.entries()] == [entry.blob for entry in store.entries()]
+    restored = reloaded.restore(str(a), dest=str(tmp_path / "restored.txt"))
+    assert open(restored).read() == "other"
+
+
+def test_prune_keep(tmp_path):
+    store = BackupStore(str(tmp_path / "store"), keep=2)
+    a, b = tmp_path / "a.txt", tmp_path / "b.txt"
+    for text in ("1", "2", "3"):
+        _backup(store, a, text)
+    _backup(store, b, "1")
+    assert store.prune() == 1
+    assert [entry.blob for entry in store.entries(str(a))] == [entry.blob for entry in store.entries()[:2]]
+    # "1" 仍被 b 的备份引用，不会被删除
+    assert len(_blobs(store)) == 3
+    _backup(store, b, "4")
+    _backup(store, b, "5")
+    assert store.prune() == 1
+    assert len(_blobs(store)) == 4
+
+
+def test_prune_max_age(tmp_path):
+    store = BackupStore(str(tmp_path / "store"), max_age=100)
+    a = tmp_path / "a.txt"
+    _backup(store, a, "old", timestamp=1000)
+    _backup(store, a, "new", timestamp=1150)
+    assert store.prune(now=1200) == 1
+    assert len(store.entries()) == 1 and len(_blobs(store)) == 1
+    assert BackupStore(str(tmp_path / "store")).entries()[0].timestamp == 1150
+
+
+def test_prune_max_bytes(tmp_path):
+    store = BackupStore(str(tmp_path / "store"), max_bytes=10)
+    a = tmp_path / "a.txt"
+    for text in ("aaaa", "bbbb", "aaaa", "cccc"):
+        _backup(store, a, text)
+    # 从最早的记录删起，直到仍被引用的内容不超过 10 字节
+    assert store.prune() == 2
+    assert len(_blobs(store)) == 2
+    assert sum(entry.size for entry in store.entries()) == 8
+
+
+def test_prune_if_needed(tmp_path):
+    store = BackupStore(str(tmp_path / "store"))
+    _backup(store, tmp_path / "a.txt", "1")
+    assert store.prune_if_needed() == 0
+    with pytest.raises(ValueError):
+        BackupStore(str(tmp_path / "store"), keep=0)
+
+
+def test_executor_retention(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "root"
+    root.mkdir()
+    executor = CodeFileExecutor(log_dir=None, backup_dir="store", backup_keep=2)
+    try:
+        for i in range(5):
+            (root / "a.txt").write_text(f"v{i}")
+            content = f"Step [1/1] - 更新 a.txt\nAction: Update file\nFile Path: a.txt\n\n```\nnew\n```"
+            assert list(executor.codeFileExecutHelper(str(root), content))[-1]["data"]["successful_tasks"] == 1
+    finally:
+        executor.close()
+    store = BackupStore("store")
+    assert [open(store.blob_path(entry.blob)).read() for entry in store.entries()] == ["v3", "v4"]
+    assert len(_blobs(store)) == 2
+    assert not (root / ".backup").exists()
@@ -0,0 +1,92 @@
+"""
+备份策略：硬链接跨设备时退回复制；备份在文件更新后仍保持旧内容，不与现有文件共用 inode
+"""
+import errno
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.backup_store import BackupStore
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+
+def _cross_device(src, dst, *args, **kwargs):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+def _same_inode(a, b):
+    sa, sb = os.stat(a), os.stat(b)
+    return (sa.st_dev, sa.st_ino) == (sb.st_dev, sb.st_ino)
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_hardlink_across_devices_falls_back_to_copy(tmp_path, monkeypatch):
+    handler = FileOperationHandler(backup_strategy="hardlink", atomic_write=True)
+    src, dst = tmp_path / "a.txt", tmp_path / "a.bak"
+    src.write_text("old")
+    monkeypatch.setattr(os, "link", _cross_device)
+    assert handler._clone_file(str(src), str(dst), allow_link=True) == "copy"
+    assert dst.read_text() == "old" and not _same_inode(src, dst)
+
+
+@pytest.mark.parametrize("strategy", ["hardlink", "auto"])
+def test_hardlink_used_only_when_inode_is_not_modified(tmp_path, strategy):
+    src = tmp_path / "a.txt"
+    src.write_text("old")
+    handler = FileOperationHandler(backup_strategy=strategy)
+    assert handler._clone_file(str(src), str(tmp_path / "copy.bak"), allow_link=False) in ("copy", "reflink")
+    assert not _same_inode(src, tmp_path / "copy.bak")
+    used = handler._clone_file(str(src), str(tmp_path / "link.bak"), allow_link=True)
+    assert used in ("hardlink", "reflink")
+    assert _same_inode(src, tmp_path / "link.bak") == (used == "hardlink")
+
+
+@pytest.mark.parametrize("cross_device", [False, True])
+@pytest.mark.parametrize("atomic_write", [False, True])
+@pytest.mark.parametrize("use_store", [False, True])
+def test_backup_keeps_old_content_after_update(tmp_path, monkeypatch, cross_device, atomic_write, use_store):
+    if cross_device:
+        monkeypatch.setattr(os, "link", _cross_device)
+    root = tmp_path / "root"
+    root.mkdir()
+    path = root / "a.txt"
+    path.write_text("old")
+    store = BackupStore(str(tmp_path / "store")) if use_store else None
+    handler = FileOperationHandler(backup_strategy="hardlink", atomic_write=atomic_write, backup_store=store)
+    result = handler.update_file(str(path), "new")
+    assert result.success and result.backup_path
+    assert path.read_text() == "new"
+    assert _read(result.backup_path) == "old"
+    assert not _same_inode(path, result.backup_path)
+    # 再次更新也不影响已有的备份（.backup 文件名只精确到秒，同一秒内的备份会互相覆盖，只检查仓库）
+    if use_store:
+        assert handler.update_file(str(path), "newer").success
+        assert _read(result.backup_path) == "old"
+
+
+@pytest.mark.parametrize("atomic_write", [False, True])
+def test_executor_hardlink_backups(tmp_path, monkeypatch, atomic_write):
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "a.txt").write_text("old")
+    (root / "b.txt").write_text("gone")
+    content = ("Step [1/2] - 更新 a.txt\nAction: Update file\nFile Path: a.txt\n\n```\nnew\n```\n------\n"
+               "Step [2/2] - 删除 b.txt\nAction: Delete file\nFile Path: b.txt\n")
+    executor = CodeFileExecutor(log_dir=None, backup_strategy="hardlink", atomic_write=atomic_write,
+                                backup_dir="store")
+    try:
+        summary = list(executor.codeFileExecutHelper(str(root), content))[-1]["data"]
+    finally:
+        executor.close()
+    assert summary["successful_tasks"] == 2
+    assert (root / "a.txt").read_text() == "new"
+    store = BackupStore("store")
+    backups = {os.path.basename(entry.path): store.blob_path(entry.blob) for entry in store.entries()}
+    assert _read(backups["a.txt"]) == "old" and _read(backups["b.txt"]) == "gone"
+    assert not _same_inode(root / "a.txt", backups["a.txt"])
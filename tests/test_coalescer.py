@@ -0,0 +1,122 @@
+"""
+冗余操作合并：被覆盖的写入、随后被删除目录中的操作被省略，合并前后的执行结果一致
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.optimizer import DELETED, DUPLICATE, SUPERSEDED, TaskCoalescer
+
+
+def _ops(root, *steps):
+    return [(action, os.path.join(str(root), *path.split("/"))) for action, path in steps]
+
+
+def _run(root, steps, coalesce):
+    blocks = []
+    for i, (action, path, body) in enumerate(steps):
+        block = f"Step [{i + 1}/{len(steps)}] - 操作 {path}\nAction: {action}\nFile Path: {path}\n"
+        if body is not None:
+            block += f"\n```\n{body}\n```"
+        blocks.append(block)
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, coalesce=coalesce)
+    try:
+        return list(executor.codeFileExecutHelper(str(root), "\n------\n".join(blocks)))[-1]["data"]
+    finally:
+        executor.close()
+
+
+def _tree(root):
+    result = {}
+    for dir_path, dirs, files in os.walk(root):
+        rel = os.path.relpath(dir_path, root)
+        result[rel] = None
+        for name in files:
+            with open(os.path.join(dir_path, name), encoding="utf-8") as f:
+                result[os.path.join(rel, name)] = f.read()
+    return result
+
+
+def _assert_same_result(tmp_path, steps, coalesced, setup=None):
+    """逐条执行与合并执行得到相同的目录树，返回合并执行后的目录树"""
+    trees = []
+    for coalesce in (False, True):
+        root = tmp_path / str(coalesce)
+        root.mkdir()
+        if setup is not None:
+            setup(root)
+        summary = _run(root, steps, coalesce)
+        assert summary["coalesced_tasks"] == (coalesced if coalesce else 0)
+        trees.append(_tree(root))
+    assert trees[0] == trees[1]
+    return trees[1]
+
+
+def test_superseded_writes(tmp_path):
+    ops = _ops(tmp_path, ("create file", "a.txt"), ("update file", "a.txt"), ("update file", "a.txt"))
+    # 均记为被最后一次保留的写入覆盖
+    assert TaskCoalescer.coalesce(ops) == {0: (SUPERSEDED, 2, None), 1: (SUPERSEDED, 2, None)}
+    steps = [("Create file", "d/a.txt", "1"), ("Update file", "d/a.txt", "2"), ("Update file", "d/a.txt", "3")]
+    assert _assert_same_result(tmp_path, steps, 2)[os.path.join("d", "a.txt")] == "3"
+
+
+def test_patch_keeps_earlier_write(tmp_path):
+    ops = _ops(tmp_path, ("update file", "a.txt"), ("patch file", "a.txt"))
+    assert TaskCoalescer.coalesce(ops) == {}
+    steps = [("Create file", "a.txt", "one"),
+             ("Patch file", "a.txt", "<<<<<<< SEARCH\none\n=======\ntwo\n>>>>>>> REPLACE")]
+    assert _assert_same_result(tmp_path, steps, 0)[os.path.join(".", "a.txt")] == "two"
+
+
+def test_patch_between_updates(tmp_path):
+    ops = _ops(tmp_path, ("update file", "a.txt"), ("patch file", "a.txt"), ("update file", "a.txt"))
+    # 补丁被之后的写入覆盖，补丁读取的第一次写入也随之失效
+    assert TaskCoalescer.coalesce(ops) == {0: (SUPERSEDED, 2, None), 1: (SUPERSEDED, 2, None)}
+    steps = [("Create file", "a.txt", "one"),
+             ("Patch file", "a.txt", "<<<<<<< SEARCH\none\n=======\ntwo\n>>>>>>> REPLACE"),
+             ("Update file", "a.txt", "three")]
+    assert _assert_same_result(tmp_path, steps, 2)[os.path.join(".", "a.txt")] == "three"
+
+
+def test_write_then_delete_keeps_parent_dir(tmp_path):
+    ops = _ops(tmp_path, ("create file", "d/a.txt"), ("delete file", "d/a.txt"))
+    assert TaskCoalescer.coalesce(ops) == {0: (SUPERSEDED, 1, ops[0][1].rsplit(os.sep, 1)[0])}
+    tree = _assert_same_result(tmp_path, [("Create file", "d/a.txt", "a"), ("Delete file", "d/a.txt", None)], 1)
+    assert tree == {".": None, "d": None}
+
+
+def test_writes_under_deleted_folder(tmp_path):
+    ops = _ops(tmp_path, ("create file", "x/d/sub/a.txt"), ("create folder", "x/d/e"),
+               ("patch file", "x/d/b.txt"), ("delete folder", "x/d"), ("create file", "x/c.txt"))
+    ensure_dir = os.path.join(str(tmp_path), "x")
+    assert TaskCoalescer.coalesce(ops) == {
+        0: (DELETED, 3, ensure_dir), 1: (DELETED, 3, ensure_dir), 2: (DELETED, 3, None),
+    }
+    steps = [("Create file", "x/d/sub/a.txt", "a"), ("Create folder", "x/d/e", None), ("Delete folder", "x/d", None)]
+    # 被省略的创建操作原本会创建 x，合并后仍需确保它存在
+    assert _assert_same_result(tmp_path, steps, 2) == {".": None, "x": None}
+
+
+@pytest.mark.parametrize("steps", [
+    [("delete file", "a.txt"), ("create file", "a.txt")],
+    [("delete folder", "d"), ("create folder", "d")],
+    [("delete folder", "d"), ("create file", "d/a.txt")],
+])
+def test_delete_then_create_is_kept(tmp_path, steps):
+    assert TaskCoalescer.coalesce(_ops(tmp_path, *steps)) == {}
+
+
+def test_delete_then_create_end_to_end(tmp_path):
+    def setup(root):
+        (root / "a.txt").write_text("old", encoding="utf-8")
+    steps = [("Delete file", "a.txt", None), ("Create file", "a.txt", "new")]
+    assert _assert_same_result(tmp_path, steps, 0, setup)[os.path.join(".", "a.txt")] == "new"
+
+
+def test_duplicate_create_folder(tmp_path):
+    ops = _ops(tmp_path, ("create folder", "d"), ("create folder", "d"),
+               ("delete folder", "d"), ("create folder", "d"))
+    assert TaskCoalescer.coalesce(ops) == {0: (DELETED, 2, str(tmp_path)), 1: (DELETED, 2, str(tmp_path))}
+    ops = _ops(tmp_path, ("create folder", "d"), ("create folder", "d"))
+    assert TaskCoalescer.coalesce(ops) == {1: (DUPLICATE, 0, None)}
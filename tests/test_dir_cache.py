@@ -0,0 +1,92 @@
+"""
+目录缓存：同一批次中每个目录至多检查/创建一次，删除目录后失效；汇总报告文件系统调用次数
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+
+@pytest.fixture
+def dir_checks(monkeypatch):
+    """记录 _ensure_dir 对文件系统的目录检查"""
+    checked = []
+    real_isdir = os.path.isdir
+
+    def isdir(path):
+        checked.append(os.path.normpath(path))
+        return real_isdir(path)
+
+    monkeypatch.setattr(os.path, "isdir", isdir)
+    return checked
+
+
+def test_known_dirs_are_not_checked_again(tmp_path, dir_checks):
+    handler = FileOperationHandler(backup_enabled=False)
+    nested = tmp_path / "a" / "b"
+    before = handler.syscall_count
+    assert handler.create_file(str(nested / "x.txt"), "x").success
+    first = handler.syscall_count - before
+    assert dir_checks == [str(nested)]
+    assert handler.create_file(str(nested / "y.txt"), "y").success
+    # 上级目录也已知存在
+    assert handler.create_file(str(tmp_path / "a" / "z.txt"), "z").success
+    assert handler.create_folder(str(tmp_path / "a")).success
+    assert dir_checks == [str(nested)]
+    # 缓存命中的写入比第一次少了目录检查与创建
+    before = handler.syscall_count
+    assert handler.create_file(str(nested / "w.txt"), "w").success
+    assert handler.syscall_count - before == first - 2
+
+
+def test_delete_folder_invalidates_cache(tmp_path, dir_checks):
+    handler = FileOperationHandler(backup_enabled=False)
+    assert handler.create_file(str(tmp_path / "a" / "b" / "x.txt"), "x").success
+    assert handler.create_file(str(tmp_path / "c" / "x.txt"), "x").success
+    assert handler.delete_folder(str(tmp_path / "a")).success
+    dir_checks.clear()
+    assert handler.create_file(str(tmp_path / "a" / "b" / "y.txt"), "y").success
+    assert handler.create_file(str(tmp_path / "c" / "y.txt"), "y").success
+    assert dir_checks == [str(tmp_path / "a" / "b")]
+    assert (tmp_path / "a" / "b" / "y.txt").read_text() == "y"
+
+
+def _content(paths):
+    return "\n------\n".join(
+        f"Step [{i + 1}/{len(paths)}] - 创建 {path}\nAction: Create file\nFile Path: {path}\n\n```\n{path}\n```"
+        for i, path in enumerate(paths)
+    )
+
+
+def test_cache_is_reset_between_batches(tmp_path):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False)
+    try:
+        paths = [f"d/f{i}.txt" for i in range(5)]
+        first = list(executor.codeFileExecutHelper(str(tmp_path), _content(paths)))[-1]["data"]
+        assert first["successful_tasks"] == 5
+        assert 0 < first["fs_syscalls"] == executor.op_handler.syscall_count
+        # 批次之间目录被外部删除
+        for name in os.listdir(tmp_path / "d"):
+            os.remove(tmp_path / "d" / name)
+        os.rmdir(tmp_path / "d")
+        second = list(executor.codeFileExecutHelper(str(tmp_path), _content(paths)))[-1]["data"]
+        assert second["successful_tasks"] == 5
+        assert second["fs_syscalls"] == first["fs_syscalls"]
+    finally:
+        executor.close()
+    assert sorted(os.listdir(tmp_path / "d")) == [f"f{i}.txt" for i in range(5)]
+
+
+def test_fs_syscalls_per_batch(tmp_path):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, verify_mode="none")
+    try:
+        one = list(executor.codeFileExecutHelper(str(tmp_path / "one"), _content(["d/f0.txt"])))[-1]["data"]
+        many = list(executor.codeFileExecutHelper(str(tmp_path / "many"),
+                                                  _content([f"d/f{i}.txt" for i in range(10)])))[-1]["data"]
+    finally:
+        executor.close()
+    # 目录只在第一个文件时检查/创建，之后每个文件的调用次数相同
+    per_file = (many["fs_syscalls"] - one["fs_syscalls"]) / 9
+    assert per_file == int(per_file) and one["fs_syscalls"] - per_file == 2
@@ -0,0 +1,24 @@
+"""
+执行池：并发批次各自统计文件系统调用，互不清空目录缓存
+"""
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.executor_pool import ExecutorPool
+
+CONTENT = "\n------\n".join(
+    f"Step [{i}/20] - 创建 d{i % 4}/f{i}.txt\nAction: Create file\nFile Path: d{i % 4}/f{i}.txt\n\n```\n{i}\n```"
+    for i in range(1, 21)
+)
+
+
+def _summary(events):
+    return [event for event in events if event["type"] == "summary"][-1]["data"]
+
+
+def test_fs_syscalls_are_counted_per_batch(tmp_path):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False)
+    expected = _summary(executor.codeFileExecutHelper(str(tmp_path / "solo"), CONTENT))["fs_syscalls"]
+    with ExecutorPool(max_workers=4, log_dir=None, backup_enabled=False) as pool:
+        handles = [pool.submit(str(tmp_path / f"root{i}"), CONTENT) for i in range(8)]
+        summaries = [handle.result(timeout=30) for handle in handles]
+    assert [summary["fs_syscalls"] for summary in summaries] == [expected] * 8
+    assert pool.executor.op_handler.syscall_count == 0
@@ -0,0 +1,82 @@
+"""
+fsync_mode：batch 把文件与父目录的 fsync 推迟到批次结束且各只同步一次；原子模式下临时文件仍在替换前同步
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+
+@pytest.fixture
+def synced(monkeypatch):
+    """记录每次 fsync 的 (st_dev, st_ino)"""
+    calls = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        st = os.fstat(fd)
+        calls.append((st.st_dev, st.st_ino))
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, "fsync", fsync)
+    return calls
+
+
+def _ino(path):
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+
+def test_batch_defers_file_and_dir_syncs(tmp_path, synced):
+    handler = FileOperationHandler(backup_enabled=False, fsync_mode="batch")
+    path = str(tmp_path / "a" / "x.txt")
+    assert handler.create_file(path, "1").success
+    assert handler.update_file(path, "2").success
+    assert handler.create_file(str(tmp_path / "a" / "gone.txt"), "3").success
+    assert handler.delete_file(str(tmp_path / "a" / "gone.txt")).success
+    assert synced == []
+    assert handler.flush_pending_syncs() == (2, 1)
+    assert sorted(synced) == sorted([_ino(path), _ino(tmp_path / "a")])
+    assert handler.flush_pending_syncs() == (0, 0)
+
+
+def test_batch_atomic_syncs_temp_file_before_replace(tmp_path, synced):
+    handler = FileOperationHandler(backup_enabled=False, fsync_mode="batch", atomic_write=True)
+    paths = [str(tmp_path / name) for name in ("x.txt", "y.txt")]
+    for path in paths:
+        assert handler.create_file(path, "1").success
+    # 临时文件替换后即目标文件，同一 inode
+    assert synced == [_ino(path) for path in paths]
+    assert handler.flush_pending_syncs() == (0, 1)
+    assert synced[-1] == _ino(tmp_path)
+
+
+def test_file_mode_syncs_immediately(tmp_path, synced):
+    handler = FileOperationHandler(backup_enabled=False, fsync_mode="file")
+    path = str(tmp_path / "x.txt")
+    assert handler.create_file(path, "1").success
+    assert synced == [_ino(path)]
+    assert handler.flush_pending_syncs() == (0, 0)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"atomic_write": True}, {"transactional": True}, {"max_workers": 2}])
+def test_batch_mode_end_to_end(tmp_path, synced, kwargs):
+    files = ["a/x.txt", "a/y.txt", "b/z.txt"]
+    content = "\n------\n".join(
+        f"Step [{i + 1}/{len(files)}] - 创建 {path}\nAction: Create file\nFile Path: {path}\n\n```\n{path}\n```"
+        for i, path in enumerate(files)
+    )
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, fsync_mode="batch", **kwargs)
+    try:
+        summary = list(executor.codeFileExecutHelper(str(tmp_path), content))[-1]["data"]
+    finally:
+        executor.close()
+    assert summary["successful_tasks"] == 3
+    for path in files:
+        assert (tmp_path / path).read_text() == path
+        assert synced.count(_ino(tmp_path / path)) == 1
+    if not kwargs.get("transactional"):
+        for folder in ("a", "b"):
+            assert synced.count(_ino(tmp_path / folder)) == 1
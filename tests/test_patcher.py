@@ -0,0 +1,84 @@
+"""
+补丁应用：统一 diff（含行号偏移）、SEARCH/REPLACE、冲突报告与换行符风格保留
+"""
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.patcher import SEARCH_REPLACE, UNIFIED, Patcher
+from codefileexecutorlib.exceptions.custom_exceptions import InvalidTaskFormatException, PatchConflictException
+
+ORIGINAL = "".join(f"line {i}\n" for i in range(1, 11))
+UNIFIED_PATCH = "--- a/f.txt\n+++ b/f.txt\n@@ -4,3 +4,3 @@\n line 4\n-line 5\n+LINE 5\n line 6\n"
+SEARCH_REPLACE_PATCH = "<<<<<<< SEARCH\nline 5\n=======\nLINE 5\n>>>>>>> REPLACE\n"
+EXPECTED = ORIGINAL.replace("line 5\n", "LINE 5\n")
+
+
+def test_detect_format():
+    assert Patcher.detect_format(UNIFIED_PATCH) == UNIFIED
+    assert Patcher.detect_format(SEARCH_REPLACE_PATCH) == SEARCH_REPLACE
+    assert Patcher.detect_format("line 5") is None
+    with pytest.raises(InvalidTaskFormatException):
+        Patcher.apply(ORIGINAL, "line 5")
+
+
+def test_unified_diff():
+    assert Patcher.apply(ORIGINAL, UNIFIED_PATCH) == EXPECTED
+
+
+def test_unified_diff_with_offset():
+    shifted = "header 1\nheader 2\nheader 3\n" + ORIGINAL
+    assert Patcher.apply(shifted, UNIFIED_PATCH) == "header 1\nheader 2\nheader 3\n" + EXPECTED
+    # 第二块的期望位置随第一块造成的偏移一同移动
+    patch = "@@ -1,2 +1,4 @@\n line 1\n+new a\n+new b\n line 2\n@@ -8,2 +10,2 @@\n line 8\n-line 9\n+LINE 9\n"
+    expected = ORIGINAL.replace("line 1\n", "line 1\nnew a\nnew b\n").replace("line 9\n", "LINE 9\n")
+    assert Patcher.apply(ORIGINAL, patch) == expected
+
+
+def test_search_replace():
+    assert Patcher.apply(ORIGINAL, SEARCH_REPLACE_PATCH) == EXPECTED
+    # 各块依次作用于上一块的结果，SEARCH 为空时追加到末尾
+    patch = SEARCH_REPLACE_PATCH + "<<<<<<< SEARCH\nLINE 5\nline 6\n=======\nLINE 56\n>>>>>>> REPLACE\n" \
+        "<<<<<<< SEARCH\n=======\nline 11\n>>>>>>> REPLACE\n"
+    expected = ORIGINAL.replace("line 5\nline 6\n", "LINE 56\n") + "line 11\n"
+    assert Patcher.apply(ORIGINAL, patch) == expected
+
+
+def test_hunk_conflict():
+    patch = UNIFIED_PATCH + "@@ -8,2 +8,2 @@\n-line 80\n+LINE 80\n line 9\n"
+    with pytest.raises(PatchConflictException, match="第2个补丁块无法匹配.*@@ -8,2 \\+8,2 @@"):
+        Patcher.apply(ORIGINAL, patch)
+    with pytest.raises(PatchConflictException, match="第1个 SEARCH 块"):
+        Patcher.apply(ORIGINAL, "<<<<<<< SEARCH\nline 50\n=======\nx\n>>>>>>> REPLACE\n")
+
+
+@pytest.mark.parametrize("patch", [UNIFIED_PATCH, SEARCH_REPLACE_PATCH,
+                                   UNIFIED_PATCH.replace("\n", "\r\n"), SEARCH_REPLACE_PATCH.replace("\n", "\r\n")])
+def test_crlf_preserved(patch):
+    assert Patcher.apply(ORIGINAL.replace("\n", "\r\n"), patch) == EXPECTED.replace("\n", "\r\n")
+
+
+def _run(root, patch, transactional=False):
+    content = f"Step [1/1] - 修改 f.txt\nAction: Patch file\nFile Path: f.txt\n\n```diff\n{patch}```"
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, event_mode="typed", transactional=transactional)
+    try:
+        return list(executor.codeFileExecutHelper(str(root), content))
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize("transactional", [False, True])
+@pytest.mark.parametrize("patch", [UNIFIED_PATCH, SEARCH_REPLACE_PATCH])
+def test_patch_end_to_end(tmp_path, patch, transactional):
+    (tmp_path / "f.txt").write_bytes(ORIGINAL.replace("\n", "\r\n").encode())
+    events = _run(tmp_path, patch, transactional)
+    assert events[-1].data["successful_tasks"] == 1
+    assert (tmp_path / "f.txt").read_bytes() == EXPECTED.replace("\n", "\r\n").encode()
+
+
+def test_patch_conflict_end_to_end(tmp_path):
+    (tmp_path / "f.txt").write_text(ORIGINAL)
+    events = _run(tmp_path, UNIFIED_PATCH.replace("line 5", "line 50"))
+    errors = [event for event in events if event.type == "error"]
+    assert len(errors) == 1 and "第1个补丁块无法匹配（@@ -4,3 +4,3 @@" in errors[0].message
+    assert events[-1].data["failed_tasks"] == 1
+    assert (tmp_path / "f.txt").read_text() == ORIGINAL
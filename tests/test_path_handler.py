@@ -0,0 +1,83 @@
+"""
+路径解析：根目录校验按路径组件比较（/root2 不属于 /root），按目录缓存的结果与逐条解析一致
+"""
+import os
+import random
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.path_handler import PathHandler
+
+
+def _reference(root, path):
+    """不使用缓存的解析结果"""
+    full_path = os.path.normpath(os.path.join(root, path.replace("\\", "/")))
+    if path.startswith("/"):
+        full_path = os.path.normpath(path)
+    root = os.path.abspath(root)
+    inside = full_path == root or full_path.startswith(root.rstrip(os.sep) + os.sep)
+    return full_path, inside
+
+
+@pytest.mark.parametrize("path, inside", [
+    ("a.txt", True), ("d/a.txt", True), (".", True), ("d/..", True), ("d/../../root/a.txt", True),
+    ("..", False), ("../root2", False), ("../root2/a.txt", False), ("d/../../root2/a.txt", False),
+    ("../roo", False), ("../root_x/a.txt", False),
+])
+def test_containment(tmp_path, path, inside):
+    root = str(tmp_path / "root")
+    handler = PathHandler(root)
+    assert handler.resolve(path) == _reference(root, path)
+    assert handler.resolve(path)[1] is inside
+    assert handler.validate_path_security(handler.get_full_path(path)) is inside
+
+
+def test_absolute_paths(tmp_path):
+    root = str(tmp_path / "root")
+    handler = PathHandler(root)
+    assert handler.resolve(root + "/a.txt") == (os.path.join(root, "a.txt"), True)
+    assert handler.resolve(root + "2/a.txt") == (os.path.join(root + "2", "a.txt"), False)
+    assert handler.resolve(root) == (root, True)
+    assert not handler.validate_path_security(root + "2")
+    # 根目录以分隔符结尾时同样按组件比较
+    assert not PathHandler(root + "/").resolve("../root2/a.txt")[1]
+
+
+def test_cached_matches_reference(tmp_path, monkeypatch):
+    root = str(tmp_path / "root")
+    handler = PathHandler(root)
+    # 较小的缓存上限使解析过程中多次清空缓存
+    monkeypatch.setattr(handler, "DIR_CACHE_SIZE", 5)
+    rng = random.Random(3)
+    parts = ["a", "b", "..", ".", "root", "root2", "c.txt"]
+    for _ in range(2000):
+        path = "/".join(rng.choice(parts) for _ in range(rng.randrange(1, 6)))
+        if rng.random() < 0.2:
+            path = path.replace("/", "\\")
+        assert handler.resolve(path) == _reference(root, path), path
+        assert len(handler._dirs) <= 5
+
+
+def test_cache_is_per_root(tmp_path):
+    paths = ["d/a.txt", "../root2/d/a.txt", "../root/d/a.txt"]
+    first = PathHandler(str(tmp_path / "root")).resolve_many(paths)
+    second = PathHandler(str(tmp_path / "root2")).resolve_many(paths)
+    assert [inside for _, inside in first] == [True, False, True]
+    assert [inside for _, inside in second] == [True, True, False]
+
+
+def test_executor_rejects_sibling_root(tmp_path):
+    root, sibling = tmp_path / "root", tmp_path / "root2"
+    root.mkdir()
+    sibling.mkdir()
+    content = ("Step [1/2] - 创建\nAction: Create file\nFile Path: ../root2/a.txt\n\n```\nx\n```\n------\n"
+               "Step [2/2] - 创建\nAction: Create file\nFile Path: ../root/b.txt\n\n```\ny\n```")
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, event_mode="typed")
+    try:
+        events = list(executor.codeFileExecutHelper(str(root), content))
+    finally:
+        executor.close()
+    assert [event.step for event in events if event.code == "task.path_unsafe"] == [1]
+    assert not (sibling / "a.txt").exists()
+    assert (root / "b.txt").read_text() == "y"
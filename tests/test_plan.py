@@ -0,0 +1,42 @@
+"""
+试运行计划：同一计划重复执行时各次汇总互不累加
+"""
+import shutil
+
+from codefileexecutorlib import CodeFileExecutor
+
+CONTENT = "\n------\n".join([
+    "Step [1/3] - 创建 a.txt\nAction: Create file\nFile Path: a.txt\n\n```\na\n```",
+    "Step [2/3] - 创建 b/c.txt\nAction: Create file\nFile Path: b/c.txt\n\n```\nc\n```",
+    "Step [3/3] - 创建 ../x.txt\nAction: Create file\nFile Path: ../x.txt\n\n```\nx\n```",
+])
+
+
+def _summary(events):
+    summary = dict(events[-1]["data"])
+    for key in ("execution_time", "log_file", "fs_syscalls"):
+        summary.pop(key, None)
+    for timing in summary.get("phase_timings", {}).values():
+        for key in [key for key in timing if key != "count"]:
+            del timing[key]
+    return summary
+
+
+def test_execute_plan_twice(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, profile=True,
+                                verify_mode="hash", verify_digest=True)
+    try:
+        plan = executor.plan(str(root), CONTENT)
+        first = _summary(list(executor.execute(plan)))
+        shutil.rmtree(root)
+        root.mkdir()
+        second = _summary(list(executor.execute(plan)))
+    finally:
+        executor.close()
+    assert first["successful_tasks"] == 2
+    assert first["invalid_tasks"] + first["failed_tasks"] == 1
+    assert first["phase_timings"]["write"]["count"] == 2
+    assert second == first
+    assert (root / "b" / "c.txt").read_text() == "c"
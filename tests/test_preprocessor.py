@@ -0,0 +1,33 @@
+"""
+回复预处理：剥离开头的思索片段，长段前导空白不会引起回溯
+"""
+import time
+
+import pytest
+
+from codefileexecutorlib.utils.preprocessor import Preprocessor
+
+TASK = "Step [1/1] - 创建 a.txt\nAction: Create file\nFile Path: a.txt\n\n```\na\n```"
+
+
+@pytest.mark.parametrize("prefix", [
+    "<think>推理</think>\n",
+    "  - Thinking: 先看目录结构\n\n",
+    "Thinking... (3s elapsed)\n",
+    "> 引用\n> 引用\n",
+    "\n\n  推理如下：\n",
+])
+def test_strips_leading_thoughts(prefix):
+    assert Preprocessor.trim_assistant_reply(prefix + TASK + "\n[to be continued]  \n") == TASK
+
+
+@pytest.mark.parametrize("make", [
+    lambda n: " " * n + "x",
+    lambda n: " " * (n // 2) + "-" + " " * (n // 2) + "x",
+])
+def test_leading_whitespace_is_linear(make):
+    content = make(200_000)
+    start = time.perf_counter()
+    assert Preprocessor.trim_assistant_reply(content).endswith("x")
+    # 平方复杂度下 40 KB 已需数十秒
+    assert time.perf_counter() - start < 1.0
@@ -0,0 +1,106 @@
+"""
+任务调度：冲突的任务按原始顺序串行，结果按原始顺序产出，并行执行的结果与串行一致
+"""
+import os
+import random
+import threading
+import time
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.scheduler import TaskScheduler
+
+
+def _paths(*paths):
+    return [os.path.join("root", *path.split("/")) for path in paths]
+
+
+def test_build_dependencies():
+    paths = _paths("d", "d/a", "d/b", "e", "d/a", "d", "e/x")
+    assert TaskScheduler.build_dependencies(paths) == [[], [0], [0], [], [0, 1], [0, 1, 2, 4], [3]]
+
+
+def test_run_respects_dependencies_and_order():
+    paths = _paths("d", "d/a", "e", "d/a/x", "f", "d")
+    dependencies = TaskScheduler.build_dependencies(paths)
+    lock = threading.Lock()
+    started, finished = {}, {}
+
+    def func(idx):
+        with lock:
+            started[idx] = time.monotonic()
+        # 越靠前的任务耗时越长，若无依赖约束，后面的任务会先完成
+        time.sleep(0.01 * (len(paths) - idx))
+        with lock:
+            finished[idx] = time.monotonic()
+        if idx == 4:
+            raise ValueError("boom")
+        return idx * 10
+
+    results = list(TaskScheduler(max_workers=4).run(paths, func))
+    assert [idx for idx, _, _ in results] == list(range(len(paths)))
+    assert [value for _, value, _ in results] == [0, 10, 20, 30, None, 50]
+    assert isinstance(results[4][2], ValueError)
+    for idx, deps in enumerate(dependencies):
+        assert all(finished[dep] <= started[idx] for dep in deps)
+    # 互不冲突的任务确实并行执行
+    assert started[2] < finished[0]
+
+
+def _content(rng, count):
+    dirs = ["a", "a/b", "c", "a/b/d"]
+    blocks = []
+    for i in range(count):
+        kind = rng.random()
+        path = rng.choice(dirs)
+        if kind < 0.15:
+            action, body = "Create folder", None
+        elif kind < 0.25:
+            action, body = "Delete folder", None
+        else:
+            path += f"/f{rng.randrange(3)}.txt"
+            action, body = (("Delete file", None) if kind < 0.35
+                            else (rng.choice(["Create file", "Update file"]), f"v{i}"))
+        block = f"Step [{i + 1}/{count}] - 操作 {path}\nAction: {action}\nFile Path: {path}\n"
+        if body is not None:
+            block += f"\n```\n{body}\n```"
+        blocks.append(block)
+    return "\n------\n".join(blocks)
+
+
+def _tree(root):
+    result = {}
+    for dir_path, dirs, files in os.walk(root):
+        rel = os.path.relpath(dir_path, root)
+        result[rel] = None
+        for name in files:
+            with open(os.path.join(dir_path, name), encoding="utf-8") as f:
+                result[os.path.join(rel, name)] = f.read()
+    return result
+
+
+def _execute(root, content, max_workers):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, max_workers=max_workers)
+    try:
+        events = list(executor.codeFileExecutHelper(str(root), content))
+    finally:
+        executor.close()
+    summary = dict(events[-1]["data"])
+    for key in ("execution_time", "log_file", "fs_syscalls"):
+        summary.pop(key, None)
+    # 并行模式先解析全部任务再执行，只比较各任务的执行结果（须按原始顺序产出）
+    outcomes = [(event["type"], event["message"]) for event in events[:-1]
+                if event["type"] not in ("info", "progress")]
+    return outcomes, summary
+
+
+def test_parallel_matches_serial(tmp_path):
+    rng = random.Random(7)
+    for case in range(30):
+        content = _content(rng, rng.randrange(3, 25))
+        serial_root, parallel_root = tmp_path / f"s{case}", tmp_path / f"p{case}"
+        serial_root.mkdir()
+        parallel_root.mkdir()
+        serial = _execute(serial_root, content, 1)
+        parallel = _execute(parallel_root, content, 4)
+        assert parallel == serial, content
+        assert _tree(parallel_root) == _tree(serial_root), content
@@ -0,0 +1,79 @@
+"""
+内容未变化的文件跳过备份与写入，修改时间保持不变
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+OLD_MTIME_NS = 1_600_000_000 * 10 ** 9
+
+
+def _steps(*steps):
+    return "\n------\n".join(
+        f"Step [{i + 1}/{len(steps)}] - 操作 {path}\nAction: {action}\nFile Path: {path}\n\n```\n{body}\n```"
+        for i, (action, path, body) in enumerate(steps)
+    )
+
+
+def _run(root, content, **kwargs):
+    executor = CodeFileExecutor(log_dir=None, event_mode="typed", **kwargs)
+    try:
+        return list(executor.codeFileExecutHelper(str(root), content))
+    finally:
+        executor.close()
+
+
+def _prepare(root, name, text):
+    path = root / name
+    path.write_bytes(text.encode("utf-8"))
+    os.utime(path, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    return path
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    written = []
+    real_write = FileOperationHandler._write_content
+
+    def record(self, path, *args, **kwargs):
+        written.append(os.path.basename(path))
+        return real_write(self, path, *args, **kwargs)
+
+    monkeypatch.setattr(FileOperationHandler, "_write_content", record)
+    return written
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"atomic_write": True}, {"max_workers": 2}, {"transactional": True},
+                                    {"zero_copy": True}, {"verify_mode": "hash"}])
+def test_unchanged_file_is_not_written(tmp_path, writes, kwargs):
+    same = _prepare(tmp_path, "same.txt", "一\n二")
+    created = _prepare(tmp_path, "created.txt", "x")
+    changed = _prepare(tmp_path, "changed.txt", "abc")
+    patched = _prepare(tmp_path, "patched.txt", "keep\n")
+    content = _steps(("Update file", "same.txt", "一\n二"), ("Create file", "created.txt", "x"),
+                     ("Update file", "changed.txt", "abd"),
+                     ("Patch file", "patched.txt", "<<<<<<< SEARCH\nkeep\n=======\nkeep\n>>>>>>> REPLACE"))
+    events = _run(tmp_path, content, **kwargs)
+    unchanged = [event.step for event in events if event.code == "task.unchanged"]
+    assert unchanged == [1, 2, 4]
+    summary = events[-1].data
+    assert summary["successful_tasks"] == 4 and summary["unchanged_tasks"] == 3
+    for path in (same, created, patched):
+        assert path.stat().st_mtime_ns == OLD_MTIME_NS
+    assert changed.read_text() == "abd" and changed.stat().st_mtime_ns != OLD_MTIME_NS
+    # 只写入了 changed.txt（原子模式写临时文件，事务模式写暂存文件）
+    assert len(writes) == 1
+    # 未变化的文件不做备份
+    backups = os.listdir(tmp_path / ".backup") if (tmp_path / ".backup").exists() else []
+    assert all(name.startswith("changed.txt") for name in backups)
+
+
+def test_skip_unchanged_disabled(tmp_path, writes):
+    same = _prepare(tmp_path, "same.txt", "v")
+    events = _run(tmp_path, _steps(("Update file", "same.txt", "v")), skip_unchanged=False, backup_enabled=False)
+    assert events[-1].data["unchanged_tasks"] == 0
+    assert writes == ["same.txt"]
+    assert same.stat().st_mtime_ns != OLD_MTIME_NS
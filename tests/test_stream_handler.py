@@ -0,0 +1,34 @@
+"""
+输出级别：被过滤的事件不会生成，流中不出现 None
+"""
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.models import StreamType
+from codefileexecutorlib.utils.stream_handler import StreamHandler
+
+CONTENT = "\n------\n".join([
+    "Step [1/2] - 创建 a.txt\nAction: Create file\nFile Path: a.txt\n\n```\na\n```",
+    "Step [2/2] - 删除 b.txt\nAction: Remove file\nFile Path: b.txt\n",
+])
+
+
+def test_filtered_types_are_not_built():
+    stream = StreamHandler(verbosity="errors")
+    assert stream.build_stream("x", StreamType.INFO) is None
+    assert stream.emit("x", StreamType.SUCCESS) == ()
+    (event,) = stream.emit("x", StreamType.ERROR)
+    assert event["type"] == StreamType.ERROR
+
+
+@pytest.mark.parametrize("verbosity, types", [
+    ("all", {"progress", "info", "success", "error", "summary"}),
+    ("results", {"success", "error", "summary"}),
+    ("errors", {"error", "summary"}),
+    ("summary", {"summary"}),
+])
+def test_executor_respects_verbosity(tmp_path, verbosity, types):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, verbosity=verbosity)
+    events = list(executor.codeFileExecutHelper(str(tmp_path), CONTENT))
+    assert None not in events
+    assert {event["type"] for event in events} == types
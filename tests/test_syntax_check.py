@@ -0,0 +1,47 @@
+"""
+写入前语法检查：真实解析器的结论使任务失败，括号平衡的启发式检查只给出警告
+"""
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.utils.syntax_checker import SyntaxChecker
+
+# 合法的 C 代码，按预处理分支逐个计数时括号不平衡
+IFDEF_C = "#ifdef A\nint f() {\n#else\nint f(int x) {\n#endif\n    return 0;\n}\n"
+
+
+def _run(root, files, **kwargs):
+    content = "\n------\n".join(
+        f"Step [{i + 1}/{len(files)}] - 创建 {path}\nAction: Create file\nFile Path: {path}\n\n```\n{body}\n```"
+        for i, (path, body) in enumerate(files)
+    )
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, syntax_check=True, event_mode="typed", **kwargs)
+    try:
+        return list(executor.codeFileExecutHelper(str(root), content))
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"max_workers": 2}, {"transactional": True}])
+def test_bracket_heuristic_only_warns(tmp_path, kwargs):
+    events = _run(tmp_path, [("a.c", IFDEF_C), ("b.py", "x = 1")], **kwargs)
+    warnings = [event for event in events if event.type == "warning"]
+    assert [event.code for event in warnings] == ["task.syntax_warning"]
+    assert (tmp_path / "a.c").read_text() == IFDEF_C
+    summary = events[-1].data
+    assert summary["successful_tasks"] == 2
+    assert summary["content_integrity_warnings"] == 1
+
+
+def test_real_parser_failure_blocks_write(tmp_path):
+    events = _run(tmp_path, [("bad.py", "def f(:"), ("ok.json", '{"a": 1}')])
+    errors = [event for event in events if event.type == "error"]
+    assert len(errors) == 1 and "语法检查未通过" in errors[0].message
+    assert not (tmp_path / "bad.py").exists()
+    assert (tmp_path / "ok.json").exists()
+
+
+def test_is_strict():
+    assert SyntaxChecker.is_strict("a.py") and SyntaxChecker.is_strict("a.csproj")
+    assert not SyntaxChecker.is_strict("a.c") and not SyntaxChecker.is_strict("a.tsx")
+    assert SyntaxChecker.language_for("index.php") is None
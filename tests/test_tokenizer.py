@@ -0,0 +1,129 @@
+"""
+任务分词：围栏不得跨越 ------ + Step/Action: 硬边界，残缺或嵌套的代码块不能吞掉其后的任务
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.incremental_parser import IncrementalContentParser
+from codefileexecutorlib.core.parser import ContentParser
+
+
+def _task(step: int, total: int, path: str, body: str) -> str:
+    return f"Step [{step}/{total}] - 创建 {path}\nAction: Create file\nFile Path: {path}\n\n{body}\n"
+
+
+# 任务 1 的围栏没有结束行
+UNCLOSED = "\n------\n".join([
+    _task(1, 3, "a.py", '```python\nprint("a")\n'),
+    _task(2, 3, "b.py", '```python\nprint("b")\n```'),
+    _task(3, 3, "c.py", '```python\nprint("c")\n```'),
+])
+
+README_BODY = "# 标题\n\n安装：\n\n```bash\npip install x\n```\n\n结尾说明"
+# README 外层围栏与内层 ```bash 同为三个反引号
+NESTED = "\n------\n".join([
+    _task(1, 2, "README.md", f"```markdown\n{README_BODY}\n```"),
+    _task(2, 2, "c.py", '```python\nprint("c")\n```'),
+])
+# 外层使用四个反引号
+FOUR_TICKS = "\n------\n".join([
+    _task(1, 2, "README.md", f"````markdown\n{README_BODY}\n````"),
+    _task(2, 2, "c.py", '```python\nprint("c")\n```'),
+])
+
+EXPECTED = {
+    "unclosed": (UNCLOSED, {"a.py": 'print("a")', "b.py": 'print("b")', "c.py": 'print("c")'}),
+    "nested": (NESTED, {"README.md": README_BODY, "c.py": 'print("c")'}),
+    "four_ticks": (FOUR_TICKS, {"README.md": README_BODY, "c.py": 'print("c")'}),
+}
+
+
+@pytest.fixture(params=sorted(EXPECTED))
+def case(request):
+    return EXPECTED[request.param]
+
+
+def test_parse_content(case):
+    content, expected = case
+    tasks = ContentParser.parse_content(content)
+    assert {task.file_path: task.content for task in tasks} == expected
+    assert all(task.is_valid for task in tasks)
+
+
+def test_parse_content_zero_copy(case):
+    content, expected = case
+    tasks = ContentParser.parse_content(content.encode("utf-8"))
+    assert {task.file_path: task.get_content() for task in tasks} == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 100000])
+def test_incremental_split_matches_full_parse(case, chunk_size):
+    content, expected = case
+    parser = IncrementalContentParser()
+    blocks = []
+    for start in range(0, len(content), chunk_size):
+        blocks.extend(parser.feed(content[start:start + chunk_size]))
+    blocks.extend(parser.close())
+    assert blocks == ContentParser.split_content(content)
+    assert len(blocks) == len(expected)
+
+
+def _read_all(root: str) -> dict:
+    result = {}
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                result[name] = f.read()
+    return result
+
+
+@pytest.mark.parametrize("options", [{}, {"max_workers": 2}, {"transactional": True}])
+def test_executor_writes_every_task(case, tmp_path, options):
+    content, expected = case
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, **options)
+    try:
+        summary = _drain(executor.codeFileExecutHelper(str(tmp_path), content))
+    finally:
+        executor.close()
+    assert summary["successful_tasks"] == len(expected)
+    assert _read_all(str(tmp_path)) == expected
+
+
+def test_stream_executor_writes_every_task(case, tmp_path):
+    content, expected = case
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False)
+    chunks = [content[i:i + 5] for i in range(0, len(content), 5)]
+    try:
+        summary = _drain(executor.codeFileExecutStreamHelper(str(tmp_path), chunks))
+    finally:
+        executor.close()
+    assert summary["successful_tasks"] == len(expected)
+    assert _read_all(str(tmp_path)) == expected
+
+
+def _drain(generator):
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value
+
+
+def test_unclosed_fence_stops_at_separator_before_prose_and_header():
+    # 分隔符与头部之间隔着说明文字时同样是硬边界
+    content = UNCLOSED.replace("Step [2/3]", "接下来创建 b.py：\nStep [2/3]")
+    tasks = ContentParser.parse_content(content)
+    assert [(task.file_path, task.content) for task in tasks] == [
+        ("a.py", 'print("a")'), ("b.py", 'print("b")'), ("c.py", 'print("c")')]
+    parser = IncrementalContentParser()
+    blocks = [block for char in content for block in parser.feed(char)] + parser.close()
+    assert blocks == ContentParser.split_content(content)
+
+
+def test_separator_inside_fence_is_kept_as_code():
+    code = "text\n------\nmore"
+    content = _task(1, 1, "notes.md", f"```markdown\n{code}\n```")
+    assert [task.content for task in ContentParser.parse_content(content)] == [code]
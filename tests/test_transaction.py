@@ -0,0 +1,52 @@
+"""
+事务：recover 只处理崩溃遗留的事务，不触碰仍在进行的事务；回滚的批次不把已暂存的任务计为成功
+"""
+import os
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+from codefileexecutorlib.core.transaction import Transaction
+
+
+def _handler() -> FileOperationHandler:
+    return FileOperationHandler(backup_enabled=False)
+
+
+def test_recover_skips_live_transaction(tmp_path):
+    handler = _handler()
+    txn = Transaction(str(tmp_path), handler)
+    index = txn.add("create file", str(tmp_path / "a.txt"))
+    assert txn.write(index, "a").success
+    assert Transaction.recover(str(tmp_path), _handler()) == []
+    assert os.path.isdir(txn.path)
+    assert txn.commit() == 1
+    assert (tmp_path / "a.txt").read_text() == "a"
+    assert not os.path.exists(tmp_path / Transaction.DIR_NAME)
+
+
+def test_recover_discards_abandoned_transaction(tmp_path):
+    handler = _handler()
+    txn = Transaction(str(tmp_path), handler)
+    index = txn.add("create file", str(tmp_path / "a.txt"))
+    assert txn.write(index, "a").success
+    # 模拟进程退出：锁随文件描述符一同释放，暂存目录保留
+    os.close(txn._lock_fd)
+    txn._lock_fd = None
+    assert Transaction.recover(str(tmp_path), _handler()) == [(txn.txn_id, "discarded")]
+    assert not os.path.exists(tmp_path / Transaction.DIR_NAME)
+    assert not (tmp_path / "a.txt").exists()
+
+
+def test_rolled_back_batch_reports_no_successes(tmp_path):
+    content = "\n------\n".join([
+        "Step [1/2] - 创建 a.txt\nAction: Create file\nFile Path: a.txt\n\n```\na\n```",
+        "Step [2/2] - 删除 missing\nAction: Remove file\nFile Path: missing.txt\n",
+    ])
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, transactional=True)
+    summary = [event for event in executor.codeFileExecutHelper(str(tmp_path), content)
+               if event["type"] == "summary"][-1]["data"]
+    assert summary["transaction"] == "rolled_back"
+    assert summary["successful_tasks"] == 0
+    assert summary["rolled_back_tasks"] == 1
+    assert summary["success_rate"] == "0.0%"
+    assert not (tmp_path / "a.txt").exists()
@@ -0,0 +1,31 @@
+"""
+内容结构检查：以原始任务块为基准，提取出的代码丢失块中的泛型签名时给出警告
+"""
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+
+FULL = "public async Task<IActionResult> Get(int id)\n{\n    var items = new List<string>();\n    return Ok(items);\n}"
+# 块中先给出签名片段，较大的代码块里签名被改写，取最大代码块时丢失了 Task<IActionResult>
+LOST = ("```csharp\npublic async Task<IActionResult> Get(int id);\n```\n\n"
+        "```csharp\npublic async Get(int id)\n{\n    var items = new List<string>();\n    return Ok(items);\n}\n```")
+
+
+def _run(root, body, **kwargs):
+    content = f"Step [1/1] - 创建 A.cs\nAction: Create file\nFile Path: A.cs\n\n{body}\n"
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, validate_content=True,
+                                event_mode="typed", **kwargs)
+    return list(executor.codeFileExecutHelper(str(root), content))
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"zero_copy": True}])
+def test_lost_generic_is_reported(tmp_path, kwargs):
+    events = _run(tmp_path, LOST, **kwargs)
+    warnings = [event for event in events if event.code == "task.content_structure"]
+    assert len(warnings) == 1 and "Task<IActionResult>" in warnings[0].message
+
+
+def test_intact_content_passes(tmp_path):
+    events = _run(tmp_path, f"```csharp\n{FULL}\n```")
+    assert not [event for event in events if event.code == "task.content_structure"]
+    assert (tmp_path / "A.cs").read_text() == FULL
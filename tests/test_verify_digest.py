@@ -0,0 +1,53 @@
+"""
+hash 验证模式：摘要随 success 消息输出，verify_digest 在批次结束时复核磁盘内容
+"""
+import hashlib
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+CONTENT = "\n------\n".join([
+    "Step [1/3] - 创建 a.txt\nAction: Create file\nFile Path: a.txt\n\n```\nfirst\n```",
+    "Step [2/3] - 更新 a.txt\nAction: Update file\nFile Path: a.txt\n\n```\nsecond\n```",
+    "Step [3/3] - 创建 b.txt\nAction: Create file\nFile Path: b.txt\n\n```\nb\n```",
+])
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"transactional": True}])
+def test_success_events_carry_digest(tmp_path, kwargs):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, verify_mode="hash", verify_digest=True,
+                                event_mode="typed", **kwargs)
+    events = list(executor.codeFileExecutHelper(str(tmp_path), CONTENT))
+    digests = [event.data["digest"] for event in events if event.type == "success"]
+    assert digests == [_digest("first"), _digest("second"), _digest("b")]
+    assert events[-1].data["successful_tasks"] == 3
+
+
+def test_digest_mismatch_fails_task(tmp_path, monkeypatch):
+    original = FileOperationHandler.verify_digest
+
+    def tampered(self, path, expected_digest, *args):
+        if path.endswith("b.txt"):
+            with open(path, "w") as f:
+                f.write("tampered")
+        return original(self, path, expected_digest, *args)
+
+    monkeypatch.setattr(FileOperationHandler, "verify_digest", tampered)
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, verify_mode="hash", verify_digest=True,
+                                event_mode="typed")
+    events = list(executor.codeFileExecutHelper(str(tmp_path), CONTENT))
+    errors = [event for event in events if event.type == "error"]
+    assert [(event.code, event.step) for event in errors] == [("task.digest_mismatch", 3)]
+    summary = events[-1].data
+    assert (summary["successful_tasks"], summary["failed_tasks"]) == (2, 1)
+
+
+def test_verify_digest_requires_hash_mode():
+    with pytest.raises(ValueError):
+        CodeFileExecutor(log_dir=None, verify_digest=True)
@@ -0,0 +1,74 @@
+"""
+零拷贝模式：任务内容以 memoryview 从输入缓冲区直接写出，得到的文件与普通模式逐字节一致
+"""
+import os
+
+import pytest
+
+from codefileexecutorlib import CodeFileExecutor
+from codefileexecutorlib.core.file_operations import FileOperationHandler
+
+BODIES = {
+    "a.txt": "plain ascii",
+    "中文/说明.md": "# 标题\n多字节内容 ✓ 😀\n",
+    "crlf.txt": "line 1\r\nline 2\r\n",
+    "nested/deep/code.py": "def f():\n    return '```'\n",
+}
+
+
+def _content():
+    return "\n------\n".join(
+        f"Step [{i + 1}/{len(BODIES)}] - 创建 {path}\nAction: Create file\nFile Path: {path}\n\n```\n{body}\n```"
+        for i, (path, body) in enumerate(BODIES.items())
+    )
+
+
+def _files(root):
+    result = {}
+    for dir_path, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(dir_path, name)
+            with open(path, "rb") as f:
+                result[os.path.relpath(path, root)] = f.read()
+    return result
+
+
+def _run(root, **kwargs):
+    executor = CodeFileExecutor(log_dir=None, backup_enabled=False, **kwargs)
+    try:
+        return list(executor.codeFileExecutHelper(str(root), _content()))[-1]["data"]
+    finally:
+        executor.close()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"verify_mode": "hash"}, {"atomic_write": True},
+                                    {"max_workers": 4}, {"transactional": True}])
+def test_zero_copy_files_are_identical(tmp_path, monkeypatch, kwargs):
+    copied, zero_copy = tmp_path / "copied", tmp_path / "zero_copy"
+    copied.mkdir()
+    zero_copy.mkdir()
+    assert _run(copied, **kwargs)["successful_tasks"] == len(BODIES)
+    written = []
+    real_write = FileOperationHandler._write_content
+
+    def record(self, path, content, *args, **kw):
+        written.append(type(content))
+        return real_write(self, path, content, *args, **kw)
+
+    monkeypatch.setattr(FileOperationHandler, "_write_content", record)
+    assert _run(zero_copy, zero_copy=True, **kwargs)["successful_tasks"] == len(BODIES)
+    assert written and set(written) == {memoryview}
+    assert _files(zero_copy) == _files(copied)
+    assert len(_files(copied)) == len(BODIES)
+
+
+def test_memoryview_write(tmp_path):
+    buffer = "前缀|正文 ✓\r\n|后缀".encode("utf-8")
+    view = memoryview(buffer)[buffer.index(b"|") + 1:buffer.rindex(b"|")]
+    handler = FileOperationHandler(backup_enabled=False, verify_mode="full")
+    path = str(tmp_path / "x.txt")
+    assert handler.create_file(path, view).success
+    with open(path, "rb") as f:
+        assert f.read() == view.tobytes()
+    # 内容相同的 memoryview 与 str 视为未变化
+    assert handler.update_file(path, "正文 ✓\r\n").unchanged